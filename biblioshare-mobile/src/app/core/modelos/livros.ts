@@ -19,6 +19,12 @@ export interface Livro {
   atualizado_em: string;
 }
 
+// Perfil "cartao" das listagens (?campos=cartao): só o que os cards exibem.
+export type LivroCartao = Pick<
+  Livro,
+  'id' | 'dono' | 'dono_cidade' | 'dono_estado' | 'titulo' | 'autor' | 'capa_url' | 'modalidades' | 'disponivel'
+>;
+
 export type LivroPayload = Omit<Livro, 'id' | 'dono' | 'criado_em' | 'atualizado_em'>;
 
 export interface ListaDesejoItem {
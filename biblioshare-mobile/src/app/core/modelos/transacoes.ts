@@ -33,6 +33,21 @@ export interface Transacao {
   atualizado_em: string;
 }
 
+export interface TransacaoResumo {
+  id: number;
+  tipo: TransacaoTipo;
+  status: TransacaoStatus;
+  papel: 'SOLICITANTE' | 'DONO';
+  livro_titulo: string;
+  livro_autor: string;
+  outros_livros: number;
+  contraparte_nome: string;
+  ultima_mensagem: string;
+  ultima_mensagem_em: string | null;
+  nao_lidas: number;
+  atualizado_em: string;
+}
+
 export interface CriarTransacaoPayload {
   tipo: TransacaoTipo;
   livro_principal: number;
@@ -53,4 +68,17 @@ export interface MensagemTransacao {
   criado_em: string;
 }
 
+export interface PaginaMensagens {
+  results: MensagemTransacao[];
+  has_more: boolean;
+  antes_de: number | null;
+  depois_de: number | null;
+}
+
+export interface VersaoChat {
+  versao: string;
+  ultima_mensagem_id: number;
+  transacao_atualizada_em: number;
+}
+
 
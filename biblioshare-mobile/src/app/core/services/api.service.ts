@@ -3,10 +3,11 @@ import { Injectable } from '@angular/core';
 import { Observable } from 'rxjs';
 
 import { environment } from '../../../environments/environment';
-import { Livro } from '../modelos/livros';
+import { Livro, LivroCartao } from '../modelos/livros';
 import {
   CriarTransacaoPayload,
   Transacao,
+  TransacaoResumo,
 } from '../modelos/transacoes';
 
 @Injectable({
@@ -38,16 +39,20 @@ export class ApiService {
     return this.http.delete<T>(url);
   }
 
-  buscarLivros(parametros?: Record<string, string | number | boolean>): Observable<Livro[]> {
-    return this.obter<Livro[]>('livros/buscar/', parametros);
+  buscarLivros(parametros?: Record<string, string | number | boolean>): Observable<LivroCartao[]> {
+    return this.obter<LivroCartao[]>('livros/buscar/', { ...parametros, campos: 'cartao' });
+  }
+
+  listarMeusLivros(): Observable<LivroCartao[]> {
+    return this.obter<LivroCartao[]>('livros/', { campos: 'cartao' });
   }
 
   obterLivroOferta(id: number): Observable<Livro> {
     return this.obter<Livro>(`livros/oferta/${id}/`);
   }
 
-  listarTransacoes(parametros?: Record<string, string | number | boolean>): Observable<Transacao[]> {
-    return this.obter<Transacao[]>('transacoes/', parametros);
+  listarTransacoes(parametros?: Record<string, string | number | boolean>): Observable<TransacaoResumo[]> {
+    return this.obter<TransacaoResumo[]>('transacoes/', parametros);
   }
 
   obterTransacao(id: number): Observable<Transacao> {
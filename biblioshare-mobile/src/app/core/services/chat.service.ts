@@ -1,15 +1,14 @@
 import { HttpClient, HttpParams } from '@angular/common/http';
 import { Injectable } from '@angular/core';
-import { Observable, map } from 'rxjs';
+import { Observable } from 'rxjs';
 
 import { environment } from '../../../environments/environment';
-import { MensagemTransacao } from '../modelos/transacoes';
+import { MensagemTransacao, PaginaMensagens, VersaoChat } from '../modelos/transacoes';
 
-type MensagensResposta =
-  | MensagemTransacao[]
-  | {
-      results?: MensagemTransacao[];
-    };
+export interface CursoresMensagens {
+  depoisDe?: number;
+  antesDe?: number;
+}
 
 @Injectable({
   providedIn: 'root',
@@ -19,20 +18,21 @@ export class ChatService {
 
   constructor(private readonly http: HttpClient) {}
 
-  listarMensagens(transacaoId: number, depoisDeId?: number): Observable<MensagemTransacao[]> {
+  listarMensagens(transacaoId: number, cursores: CursoresMensagens = {}): Observable<PaginaMensagens> {
     const url = `${this.baseUrl}/transacoes/${transacaoId}/mensagens/`;
     let params = new HttpParams();
-    if (depoisDeId) {
-      params = params.set('depois_de', depoisDeId);
+    if (cursores.depoisDe) {
+      params = params.set('depois_de', cursores.depoisDe);
+    }
+    if (cursores.antesDe) {
+      params = params.set('antes_de', cursores.antesDe);
     }
-    return this.http.get<MensagensResposta>(url, { params }).pipe(
-      map((payload) => {
-        if (Array.isArray(payload)) {
-          return payload;
-        }
-        return payload?.results ?? [];
-      }),
-    );
+    return this.http.get<PaginaMensagens>(url, { params });
+  }
+
+  obterVersao(transacaoId: number): Observable<VersaoChat> {
+    const url = `${this.baseUrl}/transacoes/${transacaoId}/mensagens/versao/`;
+    return this.http.get<VersaoChat>(url);
   }
 
   enviarMensagem(transacaoId: number, conteudo: string): Observable<MensagemTransacao> {
@@ -6,7 +6,7 @@ import { IonicModule } from '@ionic/angular';
 import { Subscription } from 'rxjs';
 import { finalize } from 'rxjs/operators';
 
-import { Livro } from '../../core/modelos/livros';
+import { LivroCartao } from '../../core/modelos/livros';
 import { ApiService } from '../../core/services/api.service';
 import {
   AutenticacaoService,
@@ -28,8 +28,8 @@ interface FiltrosBusca {
   imports: [CommonModule, FormsModule, IonicModule],
 })
 export class BuscaPage implements OnDestroy {
-  livros: Livro[] = [];
-  private livrosOriginais: Livro[] = [];
+  livros: LivroCartao[] = [];
+  private livrosOriginais: LivroCartao[] = [];
   carregando = false;
   erroCarregamento = false;
   usuario?: UsuarioPerfil | null;
@@ -103,11 +103,11 @@ export class BuscaPage implements OnDestroy {
     this.buscarLivros();
   }
 
-  trackByLivro(_: number, livro: Livro): number {
+  trackByLivro(_: number, livro: LivroCartao): number {
     return livro.id;
   }
 
-  abrirOferta(livro: Livro, event?: Event): void {
+  abrirOferta(livro: LivroCartao, event?: Event): void {
     event?.stopPropagation();
     this.router.navigate(['/oferta', livro.id], {
       state: { livro },
@@ -16,6 +16,7 @@ import {
   MensagemTransacao,
   Transacao,
   TransacaoLivroResumo,
+  VersaoChat,
 } from '../../core/modelos/transacoes';
 import { ApiService } from '../../core/services/api.service';
 import {
@@ -41,6 +42,8 @@ export class DetalhesTransacaoPage implements OnDestroy {
   mensagens: MensagemTransacao[] = [];
   novaMensagem = '';
   sincronizandoChat = false;
+  haMensagensAnteriores = false;
+  carregandoAnteriores = false;
   enviandoMensagem = false;
   chatStatus = 'Conectando...';
   chatErro?: string;
@@ -48,6 +51,7 @@ export class DetalhesTransacaoPage implements OnDestroy {
   private usuario?: UsuarioPerfil | null;
   private readonly subscriptions = new Subscription();
   private ultimaMensagemId: number | null = null;
+  private versaoChat?: VersaoChat;
   private pollingMensagens?: Subscription;
 
   constructor(
@@ -257,12 +261,35 @@ export class DetalhesTransacaoPage implements OnDestroy {
     }
     this.carregarMensagens(false);
     this.encerrarPollingMensagens();
-    this.pollingMensagens = interval(4000).subscribe(() => this.carregarMensagens(true));
+    this.pollingMensagens = interval(4000).subscribe(() => this.verificarVersaoChat());
+  }
+
+  // A cada ciclo só o carimbo de versão é consultado; mensagens e transação são recarregadas
+  // apenas quando a parte correspondente do carimbo muda.
+  private verificarVersaoChat(): void {
+    if (this.sincronizandoChat) {
+      return;
+    }
+    const versaoSub = this.chatService.obterVersao(this.transacaoId).subscribe({
+      next: (versao) => {
+        const anterior = this.versaoChat;
+        this.versaoChat = versao;
+        if (!anterior || versao.ultima_mensagem_id !== anterior.ultima_mensagem_id) {
+          this.carregarMensagens(true);
+        }
+        if (anterior && versao.transacao_atualizada_em !== anterior.transacao_atualizada_em) {
+          this.buscarTransacao();
+        }
+      },
+      error: () => this.carregarMensagens(true),
+    });
+    this.subscriptions.add(versaoSub);
   }
 
   private encerrarPollingMensagens(): void {
     this.pollingMensagens?.unsubscribe();
     this.pollingMensagens = undefined;
+    this.versaoChat = undefined;
   }
 
   private carregarMensagens(incremental: boolean): void {
@@ -273,13 +300,26 @@ export class DetalhesTransacaoPage implements OnDestroy {
       return;
     }
     const depoisDe = incremental && this.ultimaMensagemId ? this.ultimaMensagemId : undefined;
+    let continuar = false;
     this.sincronizandoChat = true;
     const sincronizacaoSub = this.chatService
-      .listarMensagens(this.transacaoId, depoisDe)
-      .pipe(finalize(() => (this.sincronizandoChat = false)))
+      .listarMensagens(this.transacaoId, { depoisDe })
+      .pipe(
+        finalize(() => {
+          this.sincronizandoChat = false;
+          if (continuar) {
+            this.carregarMensagens(true);
+          }
+        }),
+      )
       .subscribe({
-        next: (mensagens) => {
-          this.registrarMensagens(mensagens, !incremental);
+        next: (pagina) => {
+          this.registrarMensagens(pagina.results, !incremental);
+          if (incremental) {
+            continuar = pagina.has_more;
+          } else {
+            this.haMensagensAnteriores = pagina.has_more;
+          }
           this.chatErro = undefined;
           if (this.mensagens.length) {
             this.atualizarStatusChat();
@@ -295,7 +335,27 @@ export class DetalhesTransacaoPage implements OnDestroy {
     this.subscriptions.add(sincronizacaoSub);
   }
 
-  private registrarMensagens(recebidas: MensagemTransacao[], substituir: boolean): void {
+  carregarMensagensAnteriores(): void {
+    if (!this.mensagens.length || this.carregandoAnteriores) {
+      return;
+    }
+    this.carregandoAnteriores = true;
+    const anterioresSub = this.chatService
+      .listarMensagens(this.transacaoId, { antesDe: this.mensagens[0].id })
+      .pipe(finalize(() => (this.carregandoAnteriores = false)))
+      .subscribe({
+        next: (pagina) => {
+          this.registrarMensagens(pagina.results, false, false);
+          this.haMensagensAnteriores = pagina.has_more;
+        },
+        error: async () => {
+          await this.exibirToast('Não foi possível carregar mensagens anteriores.');
+        },
+      });
+    this.subscriptions.add(anterioresSub);
+  }
+
+  private registrarMensagens(recebidas: MensagemTransacao[], substituir: boolean, rolar = true): void {
     if (substituir) {
       this.mensagens = [];
     }
@@ -307,7 +367,9 @@ export class DetalhesTransacaoPage implements OnDestroy {
     recebidas.forEach((mensagem) => existentes.set(mensagem.id, mensagem));
     this.mensagens = Array.from(existentes.values()).sort((a, b) => a.id - b.id);
     this.atualizarUltimaMensagem();
-    this.rolarChatParaBase();
+    if (rolar) {
+      this.rolarChatParaBase();
+    }
   }
 
   private atualizarUltimaMensagem(): void {
@@ -4,7 +4,7 @@ import { Router } from '@angular/router';
 import { IonicModule, ToastController } from '@ionic/angular';
 import { finalize } from 'rxjs/operators';
 
-import { Livro } from '../../core/modelos/livros';
+import { LivroCartao } from '../../core/modelos/livros';
 import { ApiService } from '../../core/services/api.service';
 
 @Component({
@@ -15,7 +15,7 @@ import { ApiService } from '../../core/services/api.service';
   imports: [CommonModule, IonicModule],
 })
 export class MeusLivrosPage {
-  livros: Livro[] = [];
+  livros: LivroCartao[] = [];
   carregando = false;
 
   constructor(
@@ -31,7 +31,7 @@ export class MeusLivrosPage {
   carregarLivros(event?: CustomEvent): void {
     this.carregando = true;
     this.apiService
-      .obter<Livro[]>('livros/')
+      .listarMeusLivros()
       .pipe(
         finalize(() => {
           this.carregando = false;
@@ -52,11 +52,11 @@ export class MeusLivrosPage {
     this.router.navigate(['/adicionar-livro']);
   }
 
-  abrirDetalhes(livro: Livro): void {
+  abrirDetalhes(livro: LivroCartao): void {
     this.router.navigate(['/livros', livro.id]);
   }
 
-  trackByLivro(_: number, livro: Livro): number {
+  trackByLivro(_: number, livro: LivroCartao): number {
     return livro.id;
   }
 
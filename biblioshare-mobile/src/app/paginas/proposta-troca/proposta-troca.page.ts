@@ -5,7 +5,7 @@ import { Router } from '@angular/router';
 import { IonicModule, NavController, ToastController } from '@ionic/angular';
 import { finalize } from 'rxjs/operators';
 
-import { Livro } from '../../core/modelos/livros';
+import { Livro, LivroCartao } from '../../core/modelos/livros';
 import { ApiService } from '../../core/services/api.service';
 
 @Component({
@@ -18,7 +18,7 @@ import { ApiService } from '../../core/services/api.service';
 export class PropostaTrocaPage {
   formulario: FormGroup;
   livroDestino?: Livro;
-  meusLivros: Livro[] = [];
+  meusLivros: LivroCartao[] = [];
   carregandoLivros = false;
   enviando = false;
 
@@ -42,7 +42,7 @@ export class PropostaTrocaPage {
     this.carregarMeusLivros();
   }
 
-  get livrosElegiveis(): Livro[] {
+  get livrosElegiveis(): LivroCartao[] {
     return this.meusLivros.filter(
       (livro) => livro.disponivel && livro.modalidades?.includes('TROCA'),
     );
@@ -87,7 +87,7 @@ export class PropostaTrocaPage {
   private carregarMeusLivros(): void {
     this.carregandoLivros = true;
     this.apiService
-      .obter<Livro[]>('livros/')
+      .listarMeusLivros()
       .pipe(finalize(() => (this.carregandoLivros = false)))
       .subscribe({
         next: (dados) => {
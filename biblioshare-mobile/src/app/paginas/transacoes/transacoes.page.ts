@@ -7,14 +7,11 @@ import { finalize } from 'rxjs/operators';
 import { Subscription } from 'rxjs';
 
 import {
-  Transacao,
+  TransacaoResumo,
   TransacaoStatus,
 } from '../../core/modelos/transacoes';
 import { ApiService } from '../../core/services/api.service';
-import {
-  AutenticacaoService,
-  UsuarioPerfil,
-} from '../../core/services/autenticacao.service';
+import { AutenticacaoService } from '../../core/services/autenticacao.service';
 
 type FiltroStatus = 'TODAS' | TransacaoStatus;
 
@@ -26,7 +23,7 @@ type FiltroStatus = 'TODAS' | TransacaoStatus;
   imports: [CommonModule, FormsModule, IonicModule],
 })
 export class TransacoesPage implements OnDestroy {
-  transacoes: Transacao[] = [];
+  transacoes: TransacaoResumo[] = [];
   carregando = false;
   erroCarregamento = false;
   statusFiltro: FiltroStatus = 'TODAS';
@@ -38,18 +35,13 @@ export class TransacoesPage implements OnDestroy {
     { valor: 'CONCLUIDA' as TransacaoStatus, label: 'Concluídas' },
     { valor: 'CANCELADA' as TransacaoStatus, label: 'Canceladas' },
   ];
-  private usuario?: UsuarioPerfil | null;
   private readonly subscriptions = new Subscription();
 
   constructor(
     private readonly apiService: ApiService,
     private readonly autenticacaoService: AutenticacaoService,
     private readonly router: Router,
-  ) {
-    this.subscriptions.add(
-      this.autenticacaoService.usuario$.subscribe((usuario) => (this.usuario = usuario)),
-    );
-  }
+  ) {}
 
   ngOnDestroy(): void {
     this.subscriptions.unsubscribe();
@@ -85,26 +77,17 @@ export class TransacoesPage implements OnDestroy {
     this.statusFiltro = event.detail.value as FiltroStatus;
   }
 
-  get transacoesFiltradas(): Transacao[] {
+  get transacoesFiltradas(): TransacaoResumo[] {
     if (this.statusFiltro === 'TODAS') {
       return this.transacoes;
     }
     return this.transacoes.filter((transacao) => transacao.status === this.statusFiltro);
   }
 
-  abrirDetalhes(transacao: Transacao): void {
+  abrirDetalhes(transacao: TransacaoResumo): void {
     this.router.navigate(['/transacoes/detalhes', transacao.id]);
   }
 
-  contraparte(transacao: Transacao): string {
-    if (!this.usuario) {
-      return transacao.dono.nome_completo;
-    }
-    return this.usuario.id === transacao.solicitante.id
-      ? transacao.dono.nome_completo
-      : transacao.solicitante.nome_completo;
-  }
-
   rotuloTipo(tipo: string): string {
     const mapa: Record<string, string> = {
       DOACAO: 'Doação',
@@ -126,7 +109,7 @@ export class TransacoesPage implements OnDestroy {
     return mapa[status] ?? status;
   }
 
-  trackById(_: number, transacao: Transacao): number {
+  trackById(_: number, transacao: TransacaoResumo): number {
     return transacao.id;
   }
 
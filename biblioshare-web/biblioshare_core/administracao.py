@@ -0,0 +1,54 @@
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Abaixo disso o COUNT(*) é barato e a contagem exata vale mais que a economia.
+LIMITE_CONTAGEM_EXATA = 10_000
+
+
+class PaginadorEstimado(Paginator):
+    # Sem filtros, a contagem vem das estatísticas do PostgreSQL (pg_class.reltuples), mantidas
+    # pelo autovacuum/ANALYZE, em vez de um COUNT(*) que varre a tabela inteira a cada página.
+
+    @cached_property
+    def count(self):
+        estimativa = self._estimativa()
+        if estimativa is not None and estimativa >= LIMITE_CONTAGEM_EXATA:
+            return estimativa
+        return super().count
+
+    def _estimativa(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is None or query.where or query.distinct or query.combinator:
+            return None
+        conexao = connections[queryset.db]
+        if conexao.vendor != 'postgresql':
+            return None
+        with conexao.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)',
+                [queryset.model._meta.db_table],
+            )
+            linha = cursor.fetchone()
+        if not linha or linha[0] < 0:
+            return None
+        return int(linha[0])
+
+
+class AdminEscalavelMixin:
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # Também vale para o autocomplete e para o formulário de edição, que montam __str__
+        # a partir das mesmas relações.
+        queryset = super().get_queryset(request)
+        if isinstance(self.list_select_related, (list, tuple)) and self.list_select_related:
+            queryset = queryset.select_related(*self.list_select_related)
+        return queryset
+
+
+class ModelAdminEscalavel(AdminEscalavelMixin, admin.ModelAdmin):
+    pass
@@ -0,0 +1,92 @@
+from contextlib import ExitStack
+from typing import Optional
+
+import dj_database_url
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+PREFIXO_API = '/api/'
+
+
+def configurar_banco(
+    url: str,
+    idade_maxima: int = 600,
+    verificar_conexao: bool = True,
+    pool: Optional[dict] = None,
+    sqlite_mmap_bytes: int = 0,
+    sqlite_espera_segundos: float = 5.0,
+) -> dict:
+    # Monta a entrada de DATABASES a partir da URL. Conexões persistentes passam pela verificação
+    # do Django antes de cada requisição, para que uma conexão derrubada pelo servidor seja trocada
+    # em vez de virar erro. No PostgreSQL, pool={'min_size', 'max_size', 'timeout'} liga o pool do
+    # psycopg 3 (um por processo), que substitui a persistência.
+    configuracao = dj_database_url.parse(
+        url,
+        conn_max_age=0 if pool else idade_maxima,
+        conn_health_checks=verificar_conexao,
+        ssl_require=False,
+    )
+    opcoes = configuracao.setdefault('OPTIONS', {})
+    if configuracao['ENGINE'] == 'django.db.backends.postgresql' and pool:
+        opcoes['pool'] = pool
+    elif configuracao['ENGINE'] == 'django.db.backends.sqlite3':
+        # WAL deixa leituras seguirem durante uma escrita; com ele, synchronous=NORMAL só perde as
+        # últimas transações numa queda de energia, sem corromper o arquivo. IMMEDIATE pega o lock de
+        # escrita no início da transação, para que a espera do busy timeout valha também para ela.
+        pragmas = ['PRAGMA journal_mode=WAL', 'PRAGMA synchronous=NORMAL']
+        if sqlite_mmap_bytes:
+            pragmas.append(f'PRAGMA mmap_size={int(sqlite_mmap_bytes)}')
+        opcoes.update(
+            init_command=';'.join(pragmas),
+            timeout=sqlite_espera_segundos,
+            transaction_mode='IMMEDIATE',
+        )
+    return configuracao
+
+
+class TempoLimiteConsultas:
+    # execute_wrapper que aplica statement_timeout na primeira consulta de cada conexão PostgreSQL;
+    # requisições que não usam o banco não chegam a abrir conexão.
+    def __init__(self, limite_ms: int):
+        self.limite_ms = int(limite_ms)
+        self.aplicados = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        conexao = context['connection']
+        if conexao.vendor == 'postgresql' and conexao.alias not in self.aplicados:
+            self.aplicados.add(conexao.alias)
+            context['cursor'].cursor.execute(f'SET statement_timeout = {self.limite_ms}')
+        return execute(sql, params, many, context)
+
+    def restaurar(self) -> None:
+        # A conexão (persistente ou do pool) serve depois páginas e comandos sem limite.
+        for alias in self.aplicados:
+            conexao = connections[alias]
+            if conexao.connection is None:
+                continue
+            try:
+                with conexao.cursor() as cursor:
+                    cursor.execute('RESET statement_timeout')
+            except DatabaseError:
+                conexao.close()
+
+
+class TempoLimiteConsultasMiddleware:
+    # Nas rotas da API, o PostgreSQL cancela consultas acima de BANCO_TEMPO_LIMITE_API_MS. O limite
+    # vale enquanto a view roda: exportações em streaming leem o banco depois e ficam de fora.
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        limite = settings.BANCO_TEMPO_LIMITE_API_MS
+        if not limite or not request.path.startswith(PREFIXO_API):
+            return self.get_response(request)
+        aplicador = TempoLimiteConsultas(limite)
+        try:
+            with ExitStack() as pilha:
+                for conexao in connections.all():
+                    pilha.enter_context(conexao.execute_wrapper(aplicador))
+                return self.get_response(request)
+        finally:
+            aplicador.restaurar()
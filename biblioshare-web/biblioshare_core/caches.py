@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+
+# Backends cujo conteúdo só existe no processo que o gravou: com mais de um worker, cada um tem a
+# sua cópia e não vê o que os outros gravaram ou apagaram.
+BACKENDS_DO_PROCESSO = frozenset({
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+})
+
+
+def cache_compartilhado(alias: str = DEFAULT_CACHE_ALIAS) -> bool:
+    return settings.CACHES[alias]['BACKEND'] not in BACKENDS_DO_PROCESSO
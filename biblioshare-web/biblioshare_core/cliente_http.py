@@ -0,0 +1,130 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from django.conf import settings
+
+_prazo: ContextVar[Optional[float]] = ContextVar('prazo_http', default=None)
+
+
+class PrazoEsgotado(httpx.TimeoutException):
+    pass
+
+
+@contextmanager
+def prazo(segundos: float):
+    limite = time.monotonic() + segundos
+    atual = _prazo.get()
+    token = _prazo.set(limite if atual is None else min(atual, limite))
+    try:
+        yield
+    finally:
+        _prazo.reset(token)
+
+
+def tempo_restante() -> Optional[float]:
+    limite = _prazo.get()
+    if limite is None:
+        return None
+    return limite - time.monotonic()
+
+
+class ClienteHttp:
+    # As conexões vivem em um laço de eventos próprio, em uma thread dedicada. Assim o mesmo pool
+    # atende o laço do ASGI e os laços temporários criados pelo async_to_sync.
+
+    def __init__(
+        self,
+        limite_por_host: Optional[int] = None,
+        max_conexoes: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.limite_por_host = limite_por_host
+        self.max_conexoes = max_conexoes
+        self.timeout = timeout
+        self._trava = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pid: Optional[int] = None
+        self._cliente: Optional[httpx.AsyncClient] = None
+        self._semaforos: Dict[str, asyncio.Semaphore] = {}
+
+    async def get(self, url: str, params=None, headers=None) -> httpx.Response:
+        tempo_limite = self._tempo_limite()
+        loop = self._laco()
+        futuro = asyncio.run_coroutine_threadsafe(self._requisitar('GET', url, params, headers, tempo_limite), loop)
+        return await asyncio.wrap_future(futuro)
+
+    def fechar(self) -> None:
+        with self._trava:
+            loop, cliente = self._loop, self._cliente
+            self._loop = self._cliente = None
+            self._semaforos = {}
+        if loop is None or self._pid != os.getpid():
+            return
+        if cliente is not None:
+            asyncio.run_coroutine_threadsafe(cliente.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    def _tempo_limite(self) -> float:
+        padrao = self.timeout or getattr(settings, 'CLIENTE_HTTP_TIMEOUT_SEGUNDOS', 5.0)
+        restante = tempo_restante()
+        if restante is None:
+            return padrao
+        if restante <= 0:
+            raise PrazoEsgotado('Prazo da requisição esgotado antes da chamada externa.')
+        return min(padrao, restante)
+
+    def _laco(self) -> asyncio.AbstractEventLoop:
+        with self._trava:
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._pid = os.getpid()
+                self._cliente = None
+                self._semaforos = {}
+                threading.Thread(target=self._loop.run_forever, name='cliente-http', daemon=True).start()
+            return self._loop
+
+    def _httpx(self) -> httpx.AsyncClient:
+        if self._cliente is None:
+            max_conexoes = self.max_conexoes or getattr(settings, 'CLIENTE_HTTP_MAX_CONEXOES', 100)
+            self._cliente = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=max_conexoes, max_keepalive_connections=max_conexoes),
+                headers={'User-Agent': 'BiblioShare'},
+            )
+        return self._cliente
+
+    def _semaforo(self, host: str) -> asyncio.Semaphore:
+        semaforo = self._semaforos.get(host)
+        if semaforo is None:
+            limite = self.limite_por_host or getattr(settings, 'CLIENTE_HTTP_LIMITE_POR_HOST', 10)
+            semaforo = self._semaforos[host] = asyncio.Semaphore(limite)
+        return semaforo
+
+    async def _requisitar(self, metodo, url, params, headers, tempo_limite: float) -> httpx.Response:
+        limite = time.monotonic() + tempo_limite
+        semaforo = self._semaforo(urlsplit(url).netloc)
+        try:
+            await asyncio.wait_for(semaforo.acquire(), tempo_limite)
+        except asyncio.TimeoutError as erro:
+            raise PrazoEsgotado(f'Prazo esgotado aguardando vaga para {urlsplit(url).netloc}.') from erro
+        try:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                raise PrazoEsgotado(f'Prazo esgotado aguardando vaga para {urlsplit(url).netloc}.')
+            return await asyncio.wait_for(
+                self._httpx().request(metodo, url, params=params, headers=headers, timeout=restante),
+                restante,
+            )
+        except asyncio.TimeoutError as erro:
+            raise PrazoEsgotado(f'Prazo esgotado consultando {url}.') from erro
+        finally:
+            semaforo.release()
+
+
+cliente_http = ClienteHttp()
@@ -0,0 +1,125 @@
+import re
+import zlib
+from typing import Optional
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PESO = re.compile(r'q\s*=\s*([0-9.]+)')
+
+
+class CompressorGzip:
+    def __init__(self):
+        self._zlib = zlib.compressobj(settings.COMPRESSAO_NIVEL_GZIP, zlib.DEFLATED, 31)
+
+    def comprimir(self, dados: bytes) -> bytes:
+        return self._zlib.compress(dados)
+
+    def descarregar(self) -> bytes:
+        return self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finalizar(self) -> bytes:
+        return self._zlib.flush()
+
+
+class CompressorBrotli:
+    def __init__(self):
+        self._brotli = brotli.Compressor(quality=settings.COMPRESSAO_QUALIDADE_BROTLI)
+
+    def comprimir(self, dados: bytes) -> bytes:
+        return self._brotli.process(dados)
+
+    def descarregar(self) -> bytes:
+        return self._brotli.flush()
+
+    def finalizar(self) -> bytes:
+        return self._brotli.finish()
+
+
+# Em ordem de preferência quando o cliente aceita mais de uma com o mesmo peso.
+COMPRESSORES = {'br': CompressorBrotli, 'gzip': CompressorGzip} if brotli else {'gzip': CompressorGzip}
+
+
+def escolher_codificacao(accept_encoding: str) -> Optional[str]:
+    pesos = {}
+    for parte in accept_encoding.split(','):
+        nome, _, parametros = parte.partition(';')
+        nome = nome.strip().lower()
+        if not nome:
+            continue
+        peso = PESO.search(parametros)
+        try:
+            pesos[nome] = float(peso.group(1)) if peso else 1.0
+        except ValueError:
+            pesos[nome] = 0.0
+    aceitas = {nome: pesos.get(nome, pesos.get('*', 0.0)) for nome in COMPRESSORES}
+    melhor = max(aceitas, key=aceitas.get)
+    return melhor if aceitas[melhor] > 0 else None
+
+
+class CompressaoMiddleware:
+    # Comprime as respostas da API (JSON, NDJSON, CSV) com brotli ou gzip, conforme o
+    # Accept-Encoding. HTML fica de fora: as páginas levam o token CSRF e a compressão abriria
+    # espaço para o BREACH. Respostas em streaming são comprimidas pedaço a pedaço, com flush a
+    # cada envio, para que a exportação continue chegando aos poucos.
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding') or not self._comprimivel(response):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSAO_TAMANHO_MINIMO:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codificacao = escolher_codificacao(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if codificacao is None:
+            return response
+
+        compressor = COMPRESSORES[codificacao]()
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _comprimir_assincrono(response.streaming_content, compressor)
+            else:
+                response.streaming_content = _comprimir_fluxo(response.streaming_content, compressor)
+            if response.has_header('Content-Length'):
+                del response.headers['Content-Length']
+        else:
+            comprimido = compressor.comprimir(response.content) + compressor.finalizar()
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response.headers['Content-Length'] = str(len(comprimido))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codificacao
+        return response
+
+    @staticmethod
+    def _comprimivel(response) -> bool:
+        tipo = response.get('Content-Type', '').split(';')[0].strip().lower()
+        return tipo in settings.COMPRESSAO_TIPOS
+
+
+def _comprimir_fluxo(conteudo, compressor):
+    for pedaco in conteudo:
+        saida = compressor.comprimir(pedaco) + compressor.descarregar()
+        if saida:
+            yield saida
+    yield compressor.finalizar()
+
+
+async def _comprimir_assincrono(conteudo, compressor):
+    async for pedaco in conteudo:
+        saida = compressor.comprimir(pedaco) + compressor.descarregar()
+        if saida:
+            yield saida
+    yield compressor.finalizar()
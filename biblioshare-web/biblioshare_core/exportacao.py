@@ -0,0 +1,143 @@
+import csv
+import io
+from datetime import date
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, Iterator, Optional, Sequence
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import permissions
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.views import APIView
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+LINHAS_POR_ENVIO = 500
+
+Transformacao = Callable[[Dict], Dict]
+
+
+def resposta_exportacao(
+    queryset,
+    colunas: Sequence[str],
+    formato: str,
+    nome_arquivo: str,
+    transformar: Optional[Transformacao] = None,
+    assincrono: bool = False,
+) -> StreamingHttpResponse:
+    # values() + iterator(): as linhas saem do cursor em lotes, sem instanciar modelos nem guardar
+    # o resultado no cache do queryset, então a memória não cresce com o tamanho da tabela.
+    linhas = queryset.order_by('pk').values(*colunas).iterator(chunk_size=settings.EXPORTACAO_TAMANHO_LOTE)
+    if transformar is not None:
+        linhas = map(transformar, linhas)
+    conteudo = _csv(linhas, colunas) if formato == 'csv' else _ndjson(linhas)
+    response = StreamingHttpResponse(
+        _assincrono(conteudo) if assincrono else conteudo,
+        content_type=FORMATOS[formato],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}-{timezone.now():%Y%m%d}.{formato}"'
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+class ExportacaoAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    colunas: Sequence[str] = ()
+    nome_arquivo = 'exportacao'
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get_queryset_completo(self):
+        raise NotImplementedError
+
+    def transformar(self, linha: Dict) -> Dict:
+        return linha
+
+    def get(self, request):
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in FORMATOS:
+            raise ValidationError({'formato': f'Formato inválido. Use um de: {", ".join(FORMATOS)}.'})
+        if request.query_params.get('escopo') == 'todos':
+            if not request.user.is_staff:
+                raise PermissionDenied('Apenas a equipe pode exportar todos os registros.')
+            queryset = self.get_queryset_completo()
+        else:
+            queryset = self.get_queryset()
+        return resposta_exportacao(
+            queryset,
+            self.colunas,
+            formato,
+            self.nome_arquivo,
+            transformar=self.transformar,
+            assincrono=hasattr(request, 'scope'),
+        )
+
+
+def acao_exportar(formato: str, colunas: Sequence[str], nome_arquivo: str, transformar=None):
+    def exportar(modeladmin, request, queryset):
+        return resposta_exportacao(
+            queryset,
+            colunas,
+            formato,
+            nome_arquivo,
+            transformar=transformar,
+            assincrono=hasattr(request, 'scope'),
+        )
+
+    exportar.__name__ = f'exportar_{formato}'
+    exportar.short_description = f'Exportar selecionados ({formato.upper()})'
+    return exportar
+
+
+def _csv(linhas: Iterator[Dict], colunas: Sequence[str]) -> Iterator[str]:
+    primeira = next(linhas, None)
+    cabecalho = list(primeira) if primeira is not None else list(colunas)
+    if primeira is not None:
+        linhas = chain([primeira], linhas)
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(cabecalho)
+    for lote in _lotes(linhas):
+        escritor.writerows([_valor_csv(linha[coluna]) for coluna in cabecalho] for linha in lote)
+        yield _esvaziar(buffer)
+    if buffer.tell():
+        yield _esvaziar(buffer)
+
+
+def _ndjson(linhas: Iterator[Dict]) -> Iterator[str]:
+    codificador = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for lote in _lotes(linhas):
+        yield ''.join(f'{codificador.encode(linha)}\n' for linha in lote)
+
+
+async def _assincrono(conteudo: Iterator[str]):
+    # Sob ASGI o Django consumiria um iterador síncrono inteiro com list() antes de enviar;
+    # aqui o cursor avança um envio por vez na thread das views síncronas.
+    proximo = sync_to_async(lambda: next(conteudo, None), thread_sensitive=True)
+    while (parte := await proximo()) is not None:
+        yield parte
+
+
+def _lotes(linhas: Iterable[Dict]) -> Iterator[list]:
+    linhas = iter(linhas)
+    while lote := list(islice(linhas, LINHAS_POR_ENVIO)):
+        yield lote
+
+
+def _valor_csv(valor):
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+
+def _esvaziar(buffer: io.StringIO) -> str:
+    conteudo = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return conteudo
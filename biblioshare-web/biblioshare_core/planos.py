@@ -0,0 +1,72 @@
+import re
+from typing import List, Optional, Tuple
+
+from django.db import connections
+
+VARREDURA_SEQUENCIAL = 'varredura_sequencial'
+ORDENACAO_TEMPORARIA = 'ordenacao_temporaria'
+INDICE_ESPERADO = 'indice_esperado'
+
+_ORDENACAO_POSTGRES = re.compile(r'^\s*(->\s*)?Sort\b')
+
+
+def plano_da_consulta(queryset) -> str:
+    conexao = connections[queryset.db]
+    if conexao.vendor != 'postgresql':
+        return queryset.explain()
+    with conexao.cursor() as cursor:
+        cursor.execute('SET enable_seqscan = off')
+        cursor.execute('SET enable_sort = off')
+        try:
+            return queryset.explain()
+        finally:
+            cursor.execute('RESET enable_seqscan')
+            cursor.execute('RESET enable_sort')
+
+
+def problemas_do_plano(queryset, plano: Optional[str] = None) -> List[Tuple[str, str]]:
+    vendor = connections[queryset.db].vendor
+    if vendor not in ('sqlite', 'postgresql'):
+        return []
+    if plano is None:
+        plano = plano_da_consulta(queryset)
+    return _problemas_sqlite(plano) if vendor == 'sqlite' else _problemas_postgres(plano)
+
+
+def _problemas_sqlite(plano: str) -> List[Tuple[str, str]]:
+    problemas = []
+    for linha in plano.splitlines():
+        detalhe = linha.split(' ', 3)[-1].strip()
+        if detalhe.startswith('SCAN ') and 'USING' not in detalhe and '(' not in detalhe:
+            problemas.append((VARREDURA_SEQUENCIAL, detalhe))
+        elif detalhe.startswith('USE TEMP B-TREE FOR ORDER BY'):
+            problemas.append((ORDENACAO_TEMPORARIA, detalhe))
+    return problemas
+
+
+def _problemas_postgres(plano: str) -> List[Tuple[str, str]]:
+    problemas = []
+    for linha in plano.splitlines():
+        if 'Seq Scan on' in linha:
+            problemas.append((VARREDURA_SEQUENCIAL, linha.strip()))
+        elif _ORDENACAO_POSTGRES.match(linha):
+            problemas.append((ORDENACAO_TEMPORARIA, linha.strip()))
+    return problemas
+
+
+class PlanoConsultaMixin:
+    def assertPlanoIndexado(self, queryset, ignorar=(), indice=None):
+        # indice: nome do índice que o plano precisa usar; sem ele, basta não haver varredura
+        # sequencial nem ordenação temporária.
+        plano = plano_da_consulta(queryset)
+        problemas = [
+            (tipo, detalhe) for tipo, detalhe in problemas_do_plano(queryset, plano) if tipo not in ignorar
+        ]
+        if indice and not re.search(rf'\b{re.escape(indice)}\b', plano):
+            problemas.append((INDICE_ESPERADO, f'{indice} não aparece no plano:\n{plano}'))
+        if problemas:
+            self.fail(
+                'Plano de consulta regrediu:\n'
+                + '\n'.join(f'- {tipo}: {detalhe}' for tipo, detalhe in problemas)
+                + f'\nSQL: {queryset.query}'
+            )
@@ -0,0 +1,30 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Datas passam pelo encoder do DRF (milissegundos e sufixo Z), para que a saída seja a mesma do
+# JSONRenderer padrão; o orjson cuida do resto em C.
+OPCOES_ORJSON = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    # Usa o orjson quando instalado e cai no JSONRenderer do DRF sem ele, com indentação pedida
+    # pelo cliente ou com valores que o orjson recusa (inteiros acima de 64 bits, por exemplo).
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            data is None
+            or orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            conteudo = orjson.dumps(data, default=self.encoder_class().default, option=OPCOES_ORJSON)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        return conteudo.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
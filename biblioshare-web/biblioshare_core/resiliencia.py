@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict
+
+from django.core.cache import cache
+
+FECHADO = 'fechado'
+ABERTO = 'aberto'
+MEIO_ABERTO = 'meio_aberto'
+
+
+class Circuito:
+    # Estado guardado no cache para ser compartilhado entre workers: contador de falhas
+    # consecutivas, instante até o qual o circuito fica aberto e a vaga da sonda em meio aberto.
+
+    def __init__(self, nome: str, limite_falhas: int = 5, espera: float = 30.0):
+        self.nome = nome
+        self.limite_falhas = limite_falhas
+        self.espera = espera
+
+    def _chave(self, sufixo: str) -> str:
+        return f'circuito:{self.nome}:{sufixo}'
+
+    def estado(self) -> str:
+        aberto_ate = cache.get(self._chave('aberto_ate'))
+        if aberto_ate is None:
+            return FECHADO
+        if time.time() < aberto_ate:
+            return ABERTO
+        return MEIO_ABERTO
+
+    def segundos_para_tentar(self) -> float:
+        aberto_ate = cache.get(self._chave('aberto_ate'))
+        if aberto_ate is None:
+            return 0.0
+        return max(0.0, aberto_ate - time.time())
+
+    def permitir(self) -> bool:
+        estado = self.estado()
+        if estado == FECHADO:
+            return True
+        if estado == ABERTO:
+            return False
+        return cache.add(self._chave('sonda'), 1, timeout=self.espera)
+
+    def registrar_sucesso(self) -> None:
+        cache.delete_many([self._chave('falhas'), self._chave('aberto_ate'), self._chave('sonda')])
+
+    def registrar_falha(self) -> None:
+        chave = self._chave('falhas')
+        cache.add(chave, 0, timeout=self.espera * 10)
+        try:
+            falhas = cache.incr(chave)
+        except ValueError:
+            falhas = 1
+        if falhas >= self.limite_falhas or self.estado() == MEIO_ABERTO:
+            cache.set(self._chave('aberto_ate'), time.time() + self.espera, timeout=None)
+            cache.delete(self._chave('sonda'))
+
+
+class BaldeTokens:
+    def __init__(self, nome: str, capacidade: float, taxa_por_segundo: float):
+        self.nome = nome
+        self.capacidade = capacidade
+        self.taxa_por_segundo = taxa_por_segundo
+
+    def consumir(self, tokens: float = 1) -> bool:
+        # Se outro worker segurar a trava além da espera, a conta segue sem ela: no pior caso dois
+        # workers leem o mesmo saldo e a cota cede um token a mais. Recusar faria a disputa pela
+        # trava parecer cota esgotada.
+        chave = f'balde:{self.nome}'
+        with _trava_no_cache(f'{chave}:trava'):
+            agora = time.time()
+            disponiveis, atualizado_em = cache.get(chave) or (self.capacidade, agora)
+            disponiveis = min(self.capacidade, disponiveis + (agora - atualizado_em) * self.taxa_por_segundo)
+            liberado = disponiveis >= tokens
+            if liberado:
+                disponiveis -= tokens
+            cache.set(chave, (disponiveis, agora), timeout=None)
+            return liberado
+
+
+class VooUnico:
+    # Chamadas concorrentes com a mesma chave neste processo aguardam o resultado da primeira,
+    # mesmo vindas de laços de eventos diferentes.
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._voos: Dict[str, Future] = {}
+
+    async def executar(self, chave: str, funcao: Callable[[], Awaitable]):
+        with self._trava:
+            futuro = self._voos.get(chave)
+            lider = futuro is None
+            if lider:
+                futuro = self._voos[chave] = Future()
+        if not lider:
+            return await asyncio.shield(asyncio.wrap_future(futuro))
+        try:
+            resultado = await funcao()
+        except asyncio.CancelledError:
+            futuro.set_exception(TimeoutError(f'Chamada líder para {chave} cancelada.'))
+            raise
+        except Exception as erro:
+            futuro.set_exception(erro)
+            raise
+        else:
+            futuro.set_result(resultado)
+            return resultado
+        finally:
+            with self._trava:
+                self._voos.pop(chave, None)
+
+    def em_andamento(self) -> int:
+        with self._trava:
+            return len(self._voos)
+
+
+@contextmanager
+def _trava_no_cache(chave: str, espera: float = 0.1, validade: int = 1):
+    # O valor identifica quem pegou a trava: depois da validade ela pode ter passado a outro worker,
+    # e só o dono a apaga.
+    dono = uuid.uuid4().hex
+    limite = time.monotonic() + espera
+    obtida = cache.add(chave, dono, timeout=validade)
+    while not obtida and time.monotonic() < limite:
+        time.sleep(0.005)
+        obtida = cache.add(chave, dono, timeout=validade)
+    try:
+        yield obtida
+    finally:
+        if obtida and cache.get(chave) == dono:
+            cache.delete(chave)
@@ -0,0 +1,136 @@
+import random
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core import checks
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .caches import cache_compartilhado
+
+PRIMARIO = 'default'
+# Sessões são gravadas no login e lidas logo na requisição seguinte; uma réplica atrasada
+# deslogaria o usuário.
+APPS_PRIMARIO = frozenset({'sessions'})
+
+
+class EstadoRoteamento:
+    __slots__ = ('fixado', 'escreveu')
+
+    def __init__(self, fixado: bool = False):
+        self.fixado = fixado
+        self.escreveu = False
+
+
+_estado: ContextVar[Optional[EstadoRoteamento]] = ContextVar('estado_roteamento', default=None)
+
+
+class RoteadorReplicas:
+    # Leituras feitas durante uma requisição vão para uma das réplicas (BANCO_REPLICAS). Vão para o
+    # primário: escritas e tudo que vier depois delas na mesma requisição, leituras dentro de
+    # transaction.atomic() (o que inclui select_for_update), requisições de usuários que escreveram
+    # há menos de BANCO_FIXAR_PRIMARIO_SEGUNDOS e qualquer consulta fora de uma requisição
+    # (comandos, exportações em streaming).
+
+    def db_for_read(self, model, **hints):
+        estado = _estado.get()
+        if (
+            estado is None
+            or estado.fixado
+            or not settings.BANCO_REPLICAS
+            or model._meta.app_label in APPS_PRIMARIO
+            or connections[PRIMARIO].in_atomic_block
+        ):
+            return PRIMARIO
+        return self.escolher_replica(model)
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado is not None:
+            estado.fixado = estado.escreveu = True
+        return PRIMARIO
+
+    def escolher_replica(self, model) -> str:
+        return random.choice(settings.BANCO_REPLICAS)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplicas têm os mesmos dados do primário.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.BANCO_REPLICAS
+
+
+class FixacaoPrimarioMiddleware:
+    # Mantém o usuário no primário por BANCO_FIXAR_PRIMARIO_SEGUNDOS depois de uma escrita, para que
+    # ele leia o que acabou de gravar mesmo com a réplica atrasada. O usuário vem do JWT (sem
+    # consulta) ou da sessão.
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.BANCO_REPLICAS:
+            return self.get_response(request)
+        usuario_id = _usuario_id(request)
+        estado = EstadoRoteamento(fixado=bool(usuario_id and cache.get(_chave_fixacao(usuario_id))))
+        token = _estado.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _estado.reset(token)
+        if estado.escreveu:
+            usuario = getattr(request, 'user', None)
+            if usuario is not None and usuario.is_authenticated:
+                usuario_id = usuario.pk
+            if usuario_id:
+                cache.set(_chave_fixacao(usuario_id), True, settings.BANCO_FIXAR_PRIMARIO_SEGUNDOS)
+        return response
+
+
+def replicas_separadas() -> list:
+    # Réplicas que apontam para o próprio primário (como os espelhos dos testes) não atrasam.
+    primario = connections[PRIMARIO].settings_dict
+    return [alias for alias in settings.BANCO_REPLICAS if not mesmo_banco(connections[alias].settings_dict, primario)]
+
+
+def mesmo_banco(configuracao: dict, outra: dict) -> bool:
+    return all(configuracao.get(chave) == outra.get(chave) for chave in ('ENGINE', 'NAME', 'HOST', 'PORT'))
+
+
+def verificar_cache_fixacao(app_configs=None, **kwargs):
+    # A fixação fica no cache: num cache do processo, a requisição seguinte do usuário cai em outro
+    # worker, que não sabe da escrita e lê da réplica atrasada.
+    if replicas_separadas() and not cache_compartilhado():
+        return [
+            checks.Error(
+                'BANCO_REPLICAS exige um cache compartilhado entre os workers.',
+                hint='Defina REDIS_URL para que a fixação no primário valha em todos os processos.',
+                id='biblioshare.E001',
+            )
+        ]
+    return []
+
+
+def _chave_fixacao(usuario_id) -> str:
+    return f'roteamento:primario:{usuario_id}'
+
+
+def _usuario_id(request) -> Optional[str]:
+    autenticacao = JWTAuthentication()
+    cabecalho = autenticacao.get_header(request)
+    if cabecalho is not None:
+        try:
+            bruto = autenticacao.get_raw_token(cabecalho)
+            if bruto is None:
+                return None
+            return str(autenticacao.get_validated_token(bruto)[jwt_settings.USER_ID_CLAIM])
+        except (AuthenticationFailed, InvalidToken, TokenError, KeyError):
+            return None
+    return request.session.get(SESSION_KEY)
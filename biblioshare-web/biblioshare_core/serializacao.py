@@ -0,0 +1,261 @@
+from dataclasses import dataclass
+from functools import partial
+from operator import itemgetter
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import QuerySet
+from django.db.models.manager import BaseManager
+from django.db.models.query import ValuesIterable
+from rest_framework import ISO_8601, serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import PrimaryKeyRelatedField, RelatedField
+from rest_framework.settings import api_settings
+
+# Estes já saem de values() no formato final; os demais (datas, decimais...) passam pelo
+# to_representation do próprio campo, o que mantém fuso e casas decimais idênticos ao DRF.
+SEM_CONVERSAO = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.ChoiceField,
+    PrimaryKeyRelatedField,
+)
+NAO_COMPILAVEIS = (
+    serializers.SerializerMethodField,
+    serializers.BaseSerializer,
+    serializers.ListField,
+    serializers.DictField,
+    serializers.HiddenField,
+    serializers.ManyRelatedField,
+)
+
+
+@dataclass(frozen=True)
+class CampoRapido:
+    # Campo calculado a partir de colunas de values(); funcao(linha, contexto) devolve o valor final.
+    colunas: Tuple[str, ...]
+    funcao: Callable[..., Any]
+
+
+def nome_exibicao(relacao: str) -> CampoRapido:
+    # Mesmo resultado de usuario.get_full_name() or usuario.username.
+    primeiro, ultimo, username = (f'{relacao}__first_name', f'{relacao}__last_name', f'{relacao}__username')
+    return CampoRapido(
+        (primeiro, ultimo, username),
+        lambda linha, contexto: f'{linha[primeiro]} {linha[ultimo]}'.strip() or linha[username],
+    )
+
+
+class PlanoSerializacao:
+    # mapeadores: pares (nome, ligar), em que ligar(contexto) devolve a função aplicada a cada linha.
+    def __init__(self, mapeadores, colunas: Tuple[str, ...]):
+        self.mapeadores = mapeadores
+        self.colunas = colunas
+
+    def serializar(self, linhas, contexto: dict) -> list:
+        mapeadores = tuple((nome, ligar(contexto)) for nome, ligar in self.mapeadores)
+        return [{nome: mapeador(linha) for nome, mapeador in mapeadores} for linha in linhas]
+
+
+_planos: Dict[tuple, Optional[PlanoSerializacao]] = {}
+# Com ?campos= o número de combinações é aberto; acima disso o plano é compilado sem guardar.
+LIMITE_PLANOS = 256
+
+
+def plano_de(serializer) -> Optional[PlanoSerializacao]:
+    # Compilado uma vez por classe e conjunto de campos; None quando algum campo não tem
+    # equivalente em values() e a serialização precisa seguir pelo caminho normal.
+    chave = (type(serializer), tuple(serializer.fields))
+    if chave in _planos:
+        return _planos[chave]
+    plano = _compilar(serializer)
+    if len(_planos) < LIMITE_PLANOS:
+        _planos[chave] = plano
+    return plano
+
+
+def linhas_rapidas(queryset, serializer):
+    plano = plano_de(serializer)
+    if plano is None:
+        return queryset
+    return queryset.values(*plano.colunas)
+
+
+def selecionar_colunas(queryset, serializer):
+    # Restringe o SELECT às colunas que os campos do serializer leem, com only() e apenas as
+    # relações necessárias no select_related.
+    plano = plano_de(serializer)
+    if plano is None:
+        return queryset
+    relacoes = sorted({coluna.rsplit('__', 1)[0] for coluna in plano.colunas if '__' in coluna})
+    queryset = queryset.select_related(None)
+    if relacoes:
+        queryset = queryset.select_related(*relacoes)
+    return queryset.only(*plano.colunas)
+
+
+def _compilar(serializer) -> Optional[PlanoSerializacao]:
+    especiais = getattr(serializer, 'campos_rapidos', {})
+    modelo = serializer.Meta.model
+    mapeadores = []
+    colunas = []
+    for campo in serializer._readable_fields:
+        especial = especiais.get(campo.field_name)
+        if especial is not None:
+            colunas.extend(especial.colunas)
+            mapeadores.append((campo.field_name, partial(_ligar_especial, especial.funcao)))
+            continue
+        coluna = _coluna(modelo, campo)
+        if coluna is None:
+            return None
+        colunas.append(coluna)
+        mapeadores.append((campo.field_name, _ligador(coluna, campo)))
+    return PlanoSerializacao(tuple(mapeadores), tuple(dict.fromkeys(colunas)))
+
+
+def _coluna(modelo, campo) -> Optional[str]:
+    if isinstance(campo, NAO_COMPILAVEIS) or campo.source == '*':
+        return None
+    for parte in campo.source_attrs[:-1]:
+        try:
+            relacao = modelo._meta.get_field(parte)
+        except FieldDoesNotExist:
+            return None
+        if not (relacao.many_to_one or relacao.one_to_one):
+            return None
+        modelo = relacao.related_model
+    try:
+        final = modelo._meta.get_field(campo.source_attrs[-1])
+    except FieldDoesNotExist:
+        return None
+    if final.many_to_many or final.one_to_many:
+        return None
+    if isinstance(campo, RelatedField):
+        if not isinstance(campo, PrimaryKeyRelatedField) or campo.pk_field is not None or not final.is_relation:
+            return None
+    elif final.is_relation and final.attname != campo.source_attrs[-1]:
+        return None
+    return '__'.join(campo.source_attrs)
+
+
+def _ligar_especial(funcao, contexto):
+    return partial(funcao, contexto=contexto)
+
+
+def _ligador(coluna: str, campo):
+    if isinstance(campo, SEM_CONVERSAO) and not isinstance(campo, serializers.BigIntegerField):
+        mapeador = itemgetter(coluna)
+        return lambda contexto: mapeador
+    formato = getattr(campo, 'format', api_settings.DATETIME_FORMAT)
+    if isinstance(campo, serializers.DateTimeField) and formato and formato.lower() == ISO_8601:
+        return partial(_ligar_data_hora, coluna, campo)
+    return lambda contexto: _mapeador(coluna, campo.to_representation)
+
+
+def _mapeador(coluna: str, converter):
+    def mapear(linha):
+        valor = linha[coluna]
+        return None if valor is None else converter(valor)
+
+    return mapear
+
+
+def _ligar_data_hora(coluna: str, campo, contexto):
+    # O DateTimeField do DRF resolve o fuso ativo a cada valor; aqui ele é resolvido uma vez por
+    # resposta. Datas sem fuso (ou fuso desativado) seguem pelo to_representation do campo.
+    fuso = campo.timezone if hasattr(campo, 'timezone') else campo.default_timezone()
+    converter = campo.to_representation
+    if fuso is None:
+        return _mapeador(coluna, converter)
+
+    def mapear(linha):
+        valor = linha[coluna]
+        if not valor:
+            return None
+        if valor.tzinfo is None:
+            return converter(valor)
+        texto = valor.astimezone(fuso).isoformat()
+        return texto[:-6] + 'Z' if texto.endswith('+00:00') else texto
+
+    return mapear
+
+
+class ListaRapidaSerializer(serializers.ListSerializer):
+    # Em listagens GET, monta a resposta direto de linhas values(), sem instanciar modelos nem
+    # percorrer get_attribute/to_representation campo a campo. Aceita também linhas já prontas
+    # (por exemplo, vindas da paginação); listas de instâncias seguem pelo caminho normal.
+
+    def to_representation(self, data):
+        plano = self._plano()
+        if plano is None:
+            return super().to_representation(data)
+        if isinstance(data, BaseManager):
+            data = data.all()
+        if isinstance(data, QuerySet):
+            if not issubclass(data._iterable_class, ValuesIterable):
+                data = data.values(*plano.colunas)
+        else:
+            data = list(data)
+            if not all(isinstance(linha, dict) for linha in data):
+                return super().to_representation(data)
+        return plano.serializar(data, self.context)
+
+    def _plano(self) -> Optional[PlanoSerializacao]:
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return None
+        return plano_de(self.child)
+
+
+class CamposSelecionaveisMixin:
+    # Recorta os campos pelo conjunto que a view resolveu em context['campos'] (ver
+    # CamposEsparsosMixin); perfis_campos dá nome a recortes usados pelos clientes.
+    perfis_campos: Dict[str, Tuple[str, ...]] = {}
+
+    def get_fields(self):
+        campos = super().get_fields()
+        selecionados = self.context.get('campos')
+        if not selecionados:
+            return campos
+        return {nome: campo for nome, campo in campos.items() if nome in selecionados}
+
+
+class CamposEsparsosMixin:
+    # ?campos=titulo,autor ou um perfil (?campos=cartao), combináveis: nas listagens GET, recorta a
+    # resposta e o SELECT, para que colunas grandes não solicitadas nem sejam lidas.
+    parametro_campos = 'campos'
+
+    def campos_solicitados(self) -> Optional[frozenset]:
+        if not hasattr(self, '_campos_solicitados'):
+            self._campos_solicitados = self._resolver_campos()
+        return self._campos_solicitados
+
+    def get_serializer_context(self):
+        contexto = super().get_serializer_context()
+        contexto['campos'] = self.campos_solicitados()
+        return contexto
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.campos_solicitados() is None:
+            return queryset
+        return selecionar_colunas(queryset, self.get_serializer())
+
+    def _resolver_campos(self) -> Optional[frozenset]:
+        if self.request.method != 'GET':
+            return None
+        valor = self.request.query_params.get(self.parametro_campos, '')
+        nomes = [nome.strip() for nome in valor.split(',') if nome.strip()]
+        if not nomes:
+            return None
+        serializer_class = self.get_serializer_class()
+        perfis = getattr(serializer_class, 'perfis_campos', {})
+        selecionados = set()
+        for nome in nomes:
+            selecionados.update(perfis.get(nome, (nome,)))
+        disponiveis = {campo.field_name for campo in serializer_class()._readable_fields}
+        desconhecidos = sorted(selecionados - disponiveis)
+        if desconhecidos:
+            raise ValidationError({self.parametro_campos: f'Campos desconhecidos: {", ".join(desconhecidos)}.'})
+        return frozenset(selecionados)
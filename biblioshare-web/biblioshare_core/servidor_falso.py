@@ -0,0 +1,81 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+Resposta = Tuple[int, object]
+
+
+class ServidorFalso:
+    def __init__(self, latencia: float = 0.0):
+        self.latencia = latencia
+        self.rotas: Dict[str, Callable[[dict], Resposta]] = {}
+        self.requisicoes = []
+        self.conexoes = 0
+        self.em_andamento = 0
+        self.pico_concorrencia = 0
+        self._trava = threading.Lock()
+        self._servidor: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, porta = self._servidor.server_address[:2]
+        return f'http://{host}:{porta}'
+
+    def responder(self, caminho: str, status: int = 200, corpo: object = None, funcao=None) -> None:
+        self.rotas[caminho] = funcao or (lambda parametros: (status, corpo))
+
+    def iniciar(self) -> 'ServidorFalso':
+        servidor_falso = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with servidor_falso._trava:
+                    servidor_falso.conexoes += 1
+
+            def do_GET(self):
+                partes = urlsplit(self.path)
+                parametros = {chave: valores[-1] for chave, valores in parse_qs(partes.query).items()}
+                with servidor_falso._trava:
+                    servidor_falso.requisicoes.append((partes.path, parametros))
+                    servidor_falso.em_andamento += 1
+                    servidor_falso.pico_concorrencia = max(
+                        servidor_falso.pico_concorrencia, servidor_falso.em_andamento
+                    )
+                try:
+                    if servidor_falso.latencia:
+                        time.sleep(servidor_falso.latencia)
+                    rota = servidor_falso.rotas.get(partes.path)
+                    status, corpo = rota(parametros) if rota else (404, {'erro': 'rota não configurada'})
+                finally:
+                    with servidor_falso._trava:
+                        servidor_falso.em_andamento -= 1
+                conteudo = corpo if isinstance(corpo, bytes) else json.dumps(corpo).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(conteudo)))
+                    self.end_headers()
+                    self.wfile.write(conteudo)
+                except ConnectionError:
+                    # O cliente desistiu (prazo esgotado); não há a quem responder.
+                    self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manipulador)
+        self._servidor.daemon_threads = True
+        threading.Thread(target=self._servidor.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        return self
+
+    def parar(self) -> None:
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
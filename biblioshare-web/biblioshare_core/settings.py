@@ -1,8 +1,11 @@
 import os
+import sys
 from pathlib import Path
 
 from dotenv import load_dotenv
 
+from biblioshare_core.banco import configurar_banco
+
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -28,15 +31,23 @@ INSTALLED_APPS = [
     'usuarios',
     'livros',
     'transacoes',
+    'desempenho',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Estáticos saem daqui, antes da instrumentação e de qualquer view.
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'desempenho.middleware.InstrumentacaoMiddleware',
+    'biblioshare_core.banco.TempoLimiteConsultasMiddleware',
+    'biblioshare_core.compressao.CompressaoMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'biblioshare_core.roteamento.FixacaoPrimarioMiddleware',
+    'desempenho.middleware.PerfilamentoMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -62,18 +73,61 @@ TEMPLATES = [
 WSGI_APPLICATION = 'biblioshare_core.wsgi.application'
 
 DATABASE_URL = os.getenv('DATABASE_URL')
+BANCO_POOL = os.getenv('BANCO_POOL', 'False').lower() in ('true', '1', 'yes')
+# Limites por processo: com gthread, o máximo útil é o número de threads do worker.
+BANCO_POOL_MINIMO = int(os.getenv('BANCO_POOL_MINIMO', '1'))
+BANCO_POOL_MAXIMO = int(os.getenv('BANCO_POOL_MAXIMO', '4'))
+BANCO_POOL_ESPERA_SEGUNDOS = float(os.getenv('BANCO_POOL_ESPERA_SEGUNDOS', '10'))
+BANCO_TEMPO_LIMITE_API_MS = int(os.getenv('BANCO_TEMPO_LIMITE_API_MS', '5000'))
+
+_OPCOES_BANCO = dict(
+    idade_maxima=int(os.getenv('BANCO_CONEXAO_IDADE_MAXIMA', '600')),
+    verificar_conexao=os.getenv('BANCO_VERIFICAR_CONEXAO', 'True').lower() in ('true', '1', 'yes'),
+    pool=(
+        {
+            'min_size': BANCO_POOL_MINIMO,
+            'max_size': BANCO_POOL_MAXIMO,
+            'timeout': BANCO_POOL_ESPERA_SEGUNDOS,
+        }
+        if BANCO_POOL
+        else None
+    ),
+    sqlite_mmap_bytes=int(os.getenv('SQLITE_MMAP_BYTES', str(256 * 1024 * 1024))),
+    sqlite_espera_segundos=float(os.getenv('SQLITE_ESPERA_SEGUNDOS', '20')),
+)
+DATABASES = {
+    'default': configurar_banco(DATABASE_URL or f'sqlite:///{BASE_DIR / "db.sqlite3"}', **_OPCOES_BANCO),
+}
+# Réplicas de leitura, separadas por vírgula (replica_1, replica_2...). Nos testes elas espelham o
+# default, que é onde os dados de teste estão.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+for _indice, _url in enumerate(DATABASE_REPLICA_URLS, 1):
+    DATABASES[f'replica_{_indice}'] = {**configurar_banco(_url, **_OPCOES_BANCO), 'TEST': {'MIRROR': 'default'}}
+BANCO_REPLICAS = tuple(alias for alias in DATABASES if alias != 'default')
+# Nos testes existe ainda uma réplica separada do primário, sem espelho e fora de BANCO_REPLICAS: só
+# os testes de roteamento a usam, ligando-a com override_settings. As tabelas saem direto dos modelos,
+# como numa réplica que recebe o esquema por replicação.
+if sys.argv[1:2] == ['test']:
+    DATABASES['replica_testes'] = {
+        **configurar_banco(f'sqlite:///{BASE_DIR / "replica_testes.sqlite3"}'),
+        'TEST': {'MIGRATE': False},
+    }
+BANCO_FIXAR_PRIMARIO_SEGUNDOS = int(os.getenv('BANCO_FIXAR_PRIMARIO_SEGUNDOS', '5'))
+DATABASE_ROUTERS = ['biblioshare_core.roteamento.RoteadorReplicas']
 
-if DATABASE_URL:
-    import dj_database_url
+REDIS_URL = os.getenv('REDIS_URL')
 
-    DATABASES = {
-        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600, ssl_require=False),
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
     }
 else:
-    DATABASES = {
+    CACHES = {
         'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         },
     }
 
@@ -100,6 +154,20 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'static']
+# Com o manifesto, o collectstatic grava os arquivos com hash do conteúdo no nome e as variantes
+# .gz/.br já comprimidas, e o WhiteNoise os serve com cache de um ano (immutable). Sem ele
+# (desenvolvimento e testes) os estáticos seguem sem hash, direto dos finders.
+ESTATICOS_MANIFESTO = os.getenv('ESTATICOS_MANIFESTO', str(not DEBUG)).lower() in ('true', '1', 'yes')
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': (
+            'whitenoise.storage.CompressedManifestStaticFilesStorage'
+            if ESTATICOS_MANIFESTO
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
@@ -117,6 +185,10 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'biblioshare_core.renderizacao.JSONRapidoRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 CORS_ALLOWED_ORIGINS = [
@@ -139,6 +211,44 @@ CSRF_TRUSTED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+INSTRUMENTACAO_ORCAMENTO_CONSULTAS = int(os.getenv('INSTRUMENTACAO_ORCAMENTO_CONSULTAS', '50'))
+INSTRUMENTACAO_ORCAMENTO_LATENCIA_MS = int(os.getenv('INSTRUMENTACAO_ORCAMENTO_LATENCIA_MS', '1000'))
+INSTRUMENTACAO_MAX_SQL = int(os.getenv('INSTRUMENTACAO_MAX_SQL', '50'))
+METRICAS_TOKEN = os.getenv('METRICAS_TOKEN', '')
+CLIENTE_HTTP_TIMEOUT_SEGUNDOS = float(os.getenv('CLIENTE_HTTP_TIMEOUT_SEGUNDOS', '5'))
+CLIENTE_HTTP_MAX_CONEXOES = int(os.getenv('CLIENTE_HTTP_MAX_CONEXOES', '100'))
+CLIENTE_HTTP_LIMITE_POR_HOST = int(os.getenv('CLIENTE_HTTP_LIMITE_POR_HOST', '10'))
+ISBN_PRAZO_SEGUNDOS = float(os.getenv('ISBN_PRAZO_SEGUNDOS', '5'))
+ISBN_PROVEDORES = os.getenv('ISBN_PROVEDORES', 'catalogo,google_books,open_library').split(',')
+ISBN_HEDGE_SEGUNDOS = float(os.getenv('ISBN_HEDGE_SEGUNDOS', '0.4'))
+ISBN_CACHE_SEGUNDOS = int(os.getenv('ISBN_CACHE_SEGUNDOS', str(60 * 60 * 24)))
+ISBN_CACHE_NEGATIVO_SEGUNDOS = int(os.getenv('ISBN_CACHE_NEGATIVO_SEGUNDOS', '600'))
+ISBN_CIRCUITO_FALHAS = int(os.getenv('ISBN_CIRCUITO_FALHAS', '5'))
+ISBN_CIRCUITO_ESPERA_SEGUNDOS = float(os.getenv('ISBN_CIRCUITO_ESPERA_SEGUNDOS', '30'))
+ISBN_COTA_CAPACIDADE = float(os.getenv('ISBN_COTA_CAPACIDADE', '20'))
+ISBN_COTA_POR_SEGUNDO = float(os.getenv('ISBN_COTA_POR_SEGUNDO', '1'))
+
+PRONTIDAO_CACHE_SEGUNDOS = float(os.getenv('PRONTIDAO_CACHE_SEGUNDOS', '5'))
+PRONTIDAO_TEMPO_LIMITE_SEGUNDOS = float(os.getenv('PRONTIDAO_TEMPO_LIMITE_SEGUNDOS', '2'))
+PERFILAMENTO_AMOSTRAGEM = float(os.getenv('PERFILAMENTO_AMOSTRAGEM', '0'))
+PERFILAMENTO_DIR = Path(os.getenv('PERFILAMENTO_DIR', BASE_DIR / 'perfis'))
+PERFILAMENTO_MAX_ARQUIVOS = int(os.getenv('PERFILAMENTO_MAX_ARQUIVOS', '50'))
+
+EXPORTACAO_TAMANHO_LOTE = int(os.getenv('EXPORTACAO_TAMANHO_LOTE', '2000'))
+
+COMPRESSAO_TAMANHO_MINIMO = int(os.getenv('COMPRESSAO_TAMANHO_MINIMO', '1024'))
+COMPRESSAO_NIVEL_GZIP = int(os.getenv('COMPRESSAO_NIVEL_GZIP', '6'))
+COMPRESSAO_QUALIDADE_BROTLI = int(os.getenv('COMPRESSAO_QUALIDADE_BROTLI', '4'))
+COMPRESSAO_TIPOS = ('application/json', 'application/x-ndjson', 'text/csv')
+
+MENSAGENS_ARQUIVAR_APOS_DIAS = int(os.getenv('MENSAGENS_ARQUIVAR_APOS_DIAS', '90'))
+MENSAGENS_ARQUIVAMENTO_LOTE = int(os.getenv('MENSAGENS_ARQUIVAMENTO_LOTE', '1000'))
+CHAT_VERSAO_CACHE_SEGUNDOS = int(os.getenv('CHAT_VERSAO_CACHE_SEGUNDOS', '86400'))
+# Validade usada quando o cache não é compartilhado entre os workers (sem REDIS_URL).
+CHAT_VERSAO_CACHE_LOCAL_SEGUNDOS = int(os.getenv('CHAT_VERSAO_CACHE_LOCAL_SEGUNDOS', '3'))
+CHAT_LEITURAS_LOTE = int(os.getenv('CHAT_LEITURAS_LOTE', '200'))
+CHAT_LEITURAS_INTERVALO_SEGUNDOS = float(os.getenv('CHAT_LEITURAS_INTERVALO_SEGUNDOS', '5'))
+
 EMAIL_BACKEND = os.getenv(
     'EMAIL_BACKEND',
     'django.core.mail.backends.console.EmailBackend',
@@ -4,6 +4,8 @@ from django.contrib import admin
 from django.http import JsonResponse
 from django.urls import include, path
 
+from desempenho.views import metricas, prontidao
+
 from .views import HomeView
 
 
@@ -14,6 +16,8 @@ def saude(_):
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('saude/', saude, name='saude'),
+    path('prontidao/', prontidao, name='prontidao'),
+    path('metricas/', metricas, name='metricas'),
     path('', HomeView.as_view(), name='home'),
     path('api/', include('usuarios.urls')),
     path('api/', include('livros.urls')),
@@ -1,5 +1,9 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import redirect
 from django.views.generic import TemplateView
+from rest_framework.views import APIView
 
 
 class HomeView(TemplateView):
@@ -11,3 +15,25 @@ class HomeView(TemplateView):
         return super().dispatch(request, *args, **kwargs)
 
 
+class APIViewAssincrona(APIView):
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
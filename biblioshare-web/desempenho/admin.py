@@ -0,0 +1,62 @@
+from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import PerfilRequisicao
+from .perfis import caminho_do_perfil, resumo_do_perfil
+
+
+@admin.register(PerfilRequisicao)
+class PerfilRequisicaoAdmin(admin.ModelAdmin):
+    list_display = ('criado_em', 'metodo', 'caminho', 'rota', 'status', 'duracao_ms', 'usuario', 'baixar')
+    list_filter = ('metodo', 'status')
+    list_select_related = ('usuario',)
+    search_fields = ('caminho', 'rota')
+    date_hierarchy = 'criado_em'
+    readonly_fields = (
+        'metodo',
+        'caminho',
+        'rota',
+        'status',
+        'usuario',
+        'duracao_ms',
+        'arquivo',
+        'tamanho_bytes',
+        'criado_em',
+        'baixar',
+        'resumo',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        urls = [
+            path(
+                '<int:pk>/baixar/',
+                self.admin_site.admin_view(self.baixar_perfil),
+                name='desempenho_perfilrequisicao_baixar',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def baixar_perfil(self, request, pk):
+        perfil = get_object_or_404(PerfilRequisicao, pk=pk)
+        caminho = caminho_do_perfil(perfil)
+        if not caminho.exists():
+            raise Http404('Arquivo do perfil não encontrado.')
+        return FileResponse(caminho.open('rb'), as_attachment=True, filename=perfil.arquivo)
+
+    @admin.display(description='Arquivo .pstats')
+    def baixar(self, obj: PerfilRequisicao) -> str:
+        url = reverse('admin:desempenho_perfilrequisicao_baixar', args=[obj.pk])
+        return format_html('<a href="{}">baixar</a>', url)
+
+    @admin.display(description='Funções mais custosas')
+    def resumo(self, obj: PerfilRequisicao) -> str:
+        return format_html('<pre style="white-space: pre; overflow-x: auto;">{}</pre>', resumo_do_perfil(obj))
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.core import checks
+
+
+class DesempenhoConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'desempenho'
+
+    def ready(self):
+        from biblioshare_core.roteamento import verificar_cache_fixacao
+
+        checks.register(verificar_cache_fixacao, checks.Tags.caches)
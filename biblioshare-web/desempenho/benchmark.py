@@ -0,0 +1,179 @@
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from transacoes.models import Transacao
+
+Usuario = get_user_model()
+
+PERCENTIS = (50, 90, 95, 99)
+
+
+@dataclass
+class Cenario:
+    nome: str
+    url: Callable[['ContextoBenchmark'], str]
+    parametros: Dict[str, str] = field(default_factory=dict)
+    cabecalhos: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class ContextoBenchmark:
+    usuario: object
+    transacao: Transacao
+
+
+class ContadorConsultas:
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        return execute(sql, params, many, context)
+
+
+CENARIOS = (
+    Cenario('livros_busca', lambda contexto: reverse('livros_api:livros-busca')),
+    Cenario(
+        'livros_busca_filtrada',
+        lambda contexto: reverse('livros_api:livros-busca'),
+        parametros={'q': 'dados', 'modalidade': 'TROCA'},
+    ),
+    Cenario('transacoes_lista', lambda contexto: reverse('transacoes_api:transacoes-lista')),
+    Cenario(
+        'transacoes_mensagens',
+        lambda contexto: reverse('transacoes_api:transacoes-mensagens', args=[contexto.transacao.pk]),
+    ),
+    Cenario('vitrine', lambda contexto: reverse('livros_web:vitrine')),
+)
+
+
+def escolher_usuario():
+    usuario = (
+        Usuario.objects.annotate(total=Count('participacoes_transacoes'))
+        .filter(total__gt=0)
+        .order_by('-total', 'id')
+        .first()
+    )
+    if usuario is None:
+        raise ValueError('Nenhum usuário com transações encontrado. Rode popular_dados antes.')
+    return usuario
+
+
+def preparar_contexto(usuario=None) -> ContextoBenchmark:
+    usuario = usuario or escolher_usuario()
+    transacao = (
+        Transacao.objects.do_participante(usuario).annotate(total=Count('mensagens')).order_by('-total').first()
+    )
+    return ContextoBenchmark(usuario=usuario, transacao=transacao)
+
+
+def executar(
+    usuario=None,
+    repeticoes: int = 50,
+    aquecimento: int = 5,
+    cenarios=CENARIOS,
+    apenas: Optional[List[str]] = None,
+) -> dict:
+    contexto = preparar_contexto(usuario)
+    usuario = contexto.usuario
+    resultados = {}
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        cliente = Client()
+        cliente.force_login(usuario)
+        for cenario in cenarios:
+            if apenas and cenario.nome not in apenas:
+                continue
+            resultados[cenario.nome] = _medir(cliente, cenario, contexto, repeticoes, aquecimento)
+    return {
+        'gerado_em': timezone.now().isoformat(timespec='seconds'),
+        'commit': _commit_atual(),
+        'banco': connection.vendor,
+        'usuario_id': usuario.pk,
+        'repeticoes': repeticoes,
+        'cenarios': resultados,
+    }
+
+
+def comparar(anterior: dict, atual: dict) -> List[str]:
+    linhas = []
+    for nome, metricas in atual.get('cenarios', {}).items():
+        base = anterior.get('cenarios', {}).get(nome)
+        if not base:
+            linhas.append(f'{nome}: novo cenário')
+            continue
+        p95_antes = base['latencia_ms']['p95']
+        p95_agora = metricas['latencia_ms']['p95']
+        variacao = ((p95_agora - p95_antes) / p95_antes * 100) if p95_antes else 0.0
+        linhas.append(
+            f'{nome}: p95 {p95_antes:.2f} → {p95_agora:.2f} ms ({variacao:+.1f}%), '
+            f'consultas {base["consultas"]["max"]} → {metricas["consultas"]["max"]}, '
+            f'bytes {base["bytes"]} → {metricas["bytes"]}, '
+            f'comprimidos {base.get("bytes_comprimidos", "-")} → {metricas.get("bytes_comprimidos", "-")}'
+        )
+    return linhas
+
+
+def _medir(cliente: Client, cenario: Cenario, contexto: ContextoBenchmark, repeticoes: int, aquecimento: int):
+    url = cenario.url(contexto)
+    for _ in range(aquecimento):
+        cliente.get(url, cenario.parametros, headers=cenario.cabecalhos)
+    tempos = []
+    consultas = []
+    tamanho = 0
+    status = None
+    for _ in range(repeticoes):
+        contador = ContadorConsultas()
+        with connection.execute_wrapper(contador):
+            inicio = time.perf_counter()
+            resposta = cliente.get(url, cenario.parametros, headers=cenario.cabecalhos)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(contador.total)
+        tamanho = len(resposta.content)
+        status = resposta.status_code
+    comprimida = cliente.get(url, cenario.parametros, headers={**cenario.cabecalhos, 'Accept-Encoding': 'br, gzip'})
+    return {
+        'url': url,
+        'status': status,
+        'latencia_ms': _percentis(tempos),
+        'consultas': {'media': round(statistics.mean(consultas), 2), 'max': max(consultas)},
+        'bytes': tamanho,
+        'bytes_comprimidos': len(comprimida.content),
+        'codificacao': comprimida.get('Content-Encoding', ''),
+    }
+
+
+def _percentis(tempos: List[float]) -> dict:
+    ordenados = sorted(tempos)
+    resultado = {}
+    for percentil in PERCENTIS:
+        indice = min(len(ordenados) - 1, round(percentil / 100 * (len(ordenados) - 1)))
+        resultado[f'p{percentil}'] = round(ordenados[indice], 3)
+    resultado['media'] = round(statistics.mean(ordenados), 3)
+    resultado['max'] = round(ordenados[-1], 3)
+    return resultado
+
+
+def _commit_atual() -> str:
+    try:
+        resultado = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True,
+            text=True,
+            timeout=2,
+            cwd=settings.BASE_DIR,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return ''
+    return resultado.stdout.strip()
@@ -0,0 +1,191 @@
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+
+import requests
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from .benchmark import CENARIOS, _commit_atual, _percentis, preparar_contexto
+
+MODOS = ('sync', 'gthread', 'asgi')
+# Configurações de conexão comparadas com --banco; cada uma vira variáveis de ambiente do gunicorn.
+BANCOS = {
+    'sem_persistencia': {'BANCO_CONEXAO_IDADE_MAXIMA': '0', 'BANCO_POOL': 'False'},
+    'persistente': {'BANCO_CONEXAO_IDADE_MAXIMA': '600', 'BANCO_POOL': 'False'},
+    'pool': {'BANCO_POOL': 'True'},
+}
+
+
+class ServidorIndisponivel(Exception):
+    pass
+
+
+def porta_livre() -> int:
+    with socket.socket() as soquete:
+        soquete.bind(('127.0.0.1', 0))
+        return soquete.getsockname()[1]
+
+
+@contextmanager
+def servidor_gunicorn(
+    modo: str,
+    porta: int,
+    workers: Optional[int] = None,
+    espera: float = 30.0,
+    ambiente_extra: Optional[Dict[str, str]] = None,
+):
+    ambiente = {
+        **os.environ,
+        **(ambiente_extra or {}),
+        'GUNICORN_MODO': modo,
+        'GUNICORN_BIND': f'127.0.0.1:{porta}',
+        'GUNICORN_ACCESSLOG': 'false',
+    }
+    if workers:
+        ambiente['GUNICORN_WORKERS'] = str(workers)
+    with tempfile.TemporaryFile() as log:
+        processo = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', str(settings.BASE_DIR / 'gunicorn.conf.py')],
+            cwd=settings.BASE_DIR,
+            env=ambiente,
+            stdout=subprocess.DEVNULL,
+            stderr=log,
+        )
+        base = f'http://127.0.0.1:{porta}'
+        try:
+            _aguardar(processo, base + reverse('saude'), espera, log)
+            yield base
+        finally:
+            processo.terminate()
+            try:
+                processo.wait(timeout=40)
+            except subprocess.TimeoutExpired:
+                processo.kill()
+                processo.wait()
+
+
+def medir_carga(
+    url: str,
+    cabecalhos: Dict[str, str],
+    requisicoes: int = 400,
+    concorrencia: int = 16,
+    aquecimento: int = 20,
+) -> dict:
+    local = threading.local()
+    sessoes = []
+
+    def sessao():
+        if not hasattr(local, 'sessao'):
+            local.sessao = requests.Session()
+            local.sessao.headers.update(cabecalhos)
+            sessoes.append(local.sessao)
+        return local.sessao
+
+    def requisitar(_):
+        inicio = time.perf_counter()
+        try:
+            resposta = sessao().get(url, timeout=30)
+            ok, tamanho = resposta.status_code < 400, len(resposta.content)
+        except requests.RequestException:
+            ok, tamanho = False, 0
+        return (time.perf_counter() - inicio) * 1000, ok, tamanho
+
+    try:
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            list(executor.map(requisitar, range(aquecimento)))
+            inicio = time.perf_counter()
+            resultados = list(executor.map(requisitar, range(requisicoes)))
+            duracao = time.perf_counter() - inicio
+    finally:
+        for item in sessoes:
+            item.close()
+
+    tempos = [tempo for tempo, ok, _ in resultados if ok]
+    return {
+        'url': url,
+        'requisicoes': requisicoes,
+        'erros': requisicoes - len(tempos),
+        'vazao_rps': round(requisicoes / duracao, 1) if duracao else 0.0,
+        'latencia_ms': _percentis(tempos) if tempos else {},
+        'bytes': max((tamanho for _, ok, tamanho in resultados if ok), default=0),
+    }
+
+
+def executar_modos(
+    modos=MODOS,
+    usuario=None,
+    requisicoes: int = 400,
+    concorrencia: int = 16,
+    aquecimento: int = 20,
+    workers: Optional[int] = None,
+    apenas: Optional[List[str]] = None,
+    bancos: Optional[List[str]] = None,
+) -> dict:
+    # Sem bancos, cada modo roda com a configuração de conexão do ambiente e o relatório é indexado
+    # pelo modo; com bancos, por "modo/banco".
+    contexto = preparar_contexto(usuario)
+    alvos = [
+        (cenario.nome, cenario.url(contexto) + (f'?{urlencode(cenario.parametros)}' if cenario.parametros else ''))
+        for cenario in CENARIOS
+        if not apenas or cenario.nome in apenas
+    ]
+    cliente = Client()
+    cliente.force_login(contexto.usuario)
+    cabecalhos = {'Cookie': f'{settings.SESSION_COOKIE_NAME}={cliente.cookies[settings.SESSION_COOKIE_NAME].value}'}
+    resultados = {}
+    try:
+        for modo in modos:
+            for banco in bancos or (None,):
+                chave = f'{modo}/{banco}' if banco else modo
+                if banco == 'pool' and connection.vendor != 'postgresql':
+                    resultados[chave] = {'ignorado': 'o pool de conexões só existe no PostgreSQL'}
+                    continue
+                try:
+                    with servidor_gunicorn(modo, porta_livre(), workers, ambiente_extra=BANCOS.get(banco)) as base:
+                        resultados[chave] = {
+                            'cenarios': {
+                                nome: medir_carga(base + caminho, cabecalhos, requisicoes, concorrencia, aquecimento)
+                                for nome, caminho in alvos
+                            }
+                        }
+                except ServidorIndisponivel as erro:
+                    resultados[chave] = {'erro': str(erro)}
+    finally:
+        cliente.logout()
+    return {
+        'gerado_em': timezone.now().isoformat(timespec='seconds'),
+        'commit': _commit_atual(),
+        'banco': connection.vendor,
+        'usuario_id': contexto.usuario.pk,
+        'requisicoes': requisicoes,
+        'concorrencia': concorrencia,
+        'modos': resultados,
+    }
+
+
+def _aguardar(processo: subprocess.Popen, url: str, espera: float, log) -> None:
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            log.seek(0)
+            saida = log.read().decode('utf-8', 'replace').strip().splitlines()
+            raise ServidorIndisponivel('\n'.join(saida[-10:]) or f'gunicorn encerrou com código {processo.returncode}')
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise ServidorIndisponivel(f'O servidor não respondeu em {url} após {espera:g}s.')
@@ -0,0 +1,210 @@
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from livros.models import Livro
+from transacoes.models import HistoricoTransacao, Mensagem, Transacao, TransacaoParticipante
+
+Usuario = get_user_model()
+
+CIDADES = (
+    ('São Paulo', 'SP'),
+    ('Campinas', 'SP'),
+    ('Rio de Janeiro', 'RJ'),
+    ('Belo Horizonte', 'MG'),
+    ('Curitiba', 'PR'),
+    ('Porto Alegre', 'RS'),
+    ('Recife', 'PE'),
+    ('Salvador', 'BA'),
+    ('Fortaleza', 'CE'),
+    ('Brasília', 'DF'),
+    ('Goiânia', 'GO'),
+    ('Florianópolis', 'SC'),
+)
+PALAVRAS = (
+    'dados', 'sistemas', 'redes', 'algoritmos', 'história', 'romance', 'código', 'cidade',
+    'memória', 'aprendizado', 'arquitetura', 'engenharia', 'viagem', 'poesia', 'ciência', 'mar',
+)
+AUTORES = (
+    'Ana Souza', 'Bruno Lima', 'Carla Dias', 'Diego Alves', 'Elisa Rocha', 'Fábio Nunes',
+    'Gabriela Melo', 'Heitor Costa', 'Isabela Ramos', 'João Pires',
+)
+SENHA_PADRAO = 'SenhaCarga123'
+
+
+@dataclass
+class ResumoCarga:
+    usuarios: int
+    livros: int
+    transacoes: int
+    mensagens: int
+    historicos: int
+
+
+def popular(
+    usuarios: int = 200,
+    livros: int = 2_000,
+    transacoes: int = 1_000,
+    mensagens_por_transacao: int = 20,
+    prefixo: str = 'carga',
+    semente: int = 42,
+    lote: int = 1_000,
+) -> ResumoCarga:
+    aleatorio = random.Random(semente)
+    agora = timezone.now()
+    senha = make_password(SENHA_PADRAO)
+    with transaction.atomic():
+        criados = Usuario.objects.bulk_create(
+            [_novo_usuario(indice, prefixo, senha, aleatorio) for indice in range(usuarios)],
+            batch_size=lote,
+        )
+        livros_criados = Livro.objects.bulk_create(
+            [_novo_livro(indice, aleatorio.choice(criados), aleatorio) for indice in range(livros)],
+            batch_size=lote,
+        )
+        for livro in livros_criados:
+            livro.criado_em = agora - timedelta(minutes=aleatorio.randint(0, 525_600))
+            livro.atualizado_em = livro.criado_em
+        Livro.objects.bulk_update(livros_criados, ['criado_em', 'atualizado_em'], batch_size=lote)
+
+        transacoes_criadas = Transacao.objects.bulk_create(
+            [
+                _nova_transacao(aleatorio.choice(livros_criados), criados, aleatorio)
+                for _ in range(transacoes)
+            ],
+            batch_size=lote,
+        )
+        for transacao in transacoes_criadas:
+            transacao.criado_em = agora - timedelta(minutes=aleatorio.randint(60, 262_800))
+            transacao.atualizado_em = transacao.criado_em + timedelta(minutes=aleatorio.randint(0, 59))
+        Transacao.objects.bulk_update(transacoes_criadas, ['criado_em', 'atualizado_em'], batch_size=lote)
+
+        ocupados = {
+            transacao.livro_principal_id
+            for transacao in transacoes_criadas
+            if transacao.status in (Transacao.Status.PENDENTE, Transacao.Status.ACEITA, Transacao.Status.EM_POSSE)
+        }
+        Livro.objects.filter(id__in=ocupados).update(disponivel=False)
+
+        historicos = HistoricoTransacao.objects.bulk_create(
+            [
+                HistoricoTransacao(
+                    transacao=transacao,
+                    status_anterior=Transacao.Status.PENDENTE,
+                    status_novo=transacao.status,
+                    usuario_id=transacao.dono_id,
+                )
+                for transacao in transacoes_criadas
+                if transacao.status != Transacao.Status.PENDENTE
+            ],
+            batch_size=lote,
+        )
+
+        total_mensagens = 0
+        pendentes = []
+        ultimas = {}
+        for transacao in transacoes_criadas:
+            participantes = (transacao.solicitante_id, transacao.dono_id)
+            for indice in range(aleatorio.randint(0, mensagens_por_transacao * 2)):
+                pendentes.append(
+                    Mensagem(
+                        transacao=transacao,
+                        remetente_id=participantes[indice % 2],
+                        conteudo=_frase(aleatorio, 4, 24),
+                    )
+                )
+                ultimas[transacao.pk] = pendentes[-1]
+            if len(pendentes) >= lote:
+                Mensagem.objects.bulk_create(pendentes, batch_size=lote)
+                total_mensagens += len(pendentes)
+                pendentes = []
+        Mensagem.objects.bulk_create(pendentes, batch_size=lote)
+        total_mensagens += len(pendentes)
+
+        participantes = [
+            participante
+            for transacao in transacoes_criadas
+            for participante in transacao.novos_participantes()
+        ]
+        for participante in participantes:
+            ultima = ultimas.get(participante.transacao_id)
+            if ultima is None:
+                continue
+            participante.ultima_mensagem = ultima.conteudo[:140]
+            participante.ultima_mensagem_id = ultima.pk
+            participante.ultima_mensagem_em = participante.atualizado_em
+            if aleatorio.random() < 0.8:
+                participante.ultima_lida_id = ultima.pk
+            elif ultima.remetente_id != participante.usuario_id:
+                participante.nao_lidas = 1
+        TransacaoParticipante.objects.bulk_create(participantes, batch_size=lote, ignore_conflicts=True)
+
+    return ResumoCarga(
+        usuarios=len(criados),
+        livros=len(livros_criados),
+        transacoes=len(transacoes_criadas),
+        mensagens=total_mensagens,
+        historicos=len(historicos),
+    )
+
+
+def _novo_usuario(indice: int, prefixo: str, senha: str, aleatorio: random.Random):
+    cidade, estado = aleatorio.choice(CIDADES)
+    nome = aleatorio.choice(AUTORES).split()
+    return Usuario(
+        username=f'{prefixo}-{indice}',
+        email=f'{prefixo}-{indice}@example.com',
+        password=senha,
+        first_name=nome[0],
+        last_name=nome[-1],
+        cidade=cidade,
+        estado=estado,
+    )
+
+
+def _novo_livro(indice: int, dono, aleatorio: random.Random) -> Livro:
+    modalidades = aleatorio.sample(list(Livro.Modalidades.values), aleatorio.randint(1, 3))
+    return Livro(
+        dono=dono,
+        isbn=f'978{aleatorio.randint(0, 9_999_999_999):010d}',
+        titulo=_frase(aleatorio, 2, 6).capitalize(),
+        autor=aleatorio.choice(AUTORES),
+        editora=f'Editora {aleatorio.choice(PALAVRAS).capitalize()}',
+        ano_publicacao=str(aleatorio.randint(1950, 2025)),
+        sinopse=_frase(aleatorio, 40, 160),
+        modalidades=modalidades,
+        valor_aluguel_semanal=(
+            Decimal(aleatorio.randint(5, 40)) if Livro.Modalidades.ALUGUEL in modalidades else None
+        ),
+        prazo_emprestimo_dias=(
+            aleatorio.choice((7, 14, 21, 30)) if Livro.Modalidades.EMPRESTIMO in modalidades else None
+        ),
+    )
+
+
+def _nova_transacao(livro: Livro, usuarios, aleatorio: random.Random) -> Transacao:
+    solicitante = aleatorio.choice(usuarios)
+    while solicitante.id == livro.dono_id:
+        solicitante = aleatorio.choice(usuarios)
+    tipo = aleatorio.choice(livro.modalidades)
+    data_limite = None
+    if tipo in (Transacao.Tipo.EMPRESTIMO, Transacao.Tipo.ALUGUEL):
+        data_limite = timezone.now().date() + timedelta(days=livro.prazo_emprestimo_dias or 14)
+    return Transacao(
+        tipo=tipo,
+        status=aleatorio.choice(Transacao.Status.values),
+        solicitante=solicitante,
+        dono=livro.dono,
+        livro_principal=livro,
+        data_limite_devolucao=data_limite,
+    )
+
+
+def _frase(aleatorio: random.Random, minimo: int, maximo: int) -> str:
+    return ' '.join(aleatorio.choice(PALAVRAS) for _ in range(aleatorio.randint(minimo, maximo)))
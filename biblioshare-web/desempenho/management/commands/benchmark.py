@@ -0,0 +1,55 @@
+import json
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from desempenho import benchmark
+
+Usuario = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Exercita os endpoints principais com o cliente de testes do Django e grava um relatório JSON '
+        'com percentis de latência, número de consultas e tamanho das respostas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticoes', type=int, default=50)
+        parser.add_argument('--aquecimento', type=int, default=5)
+        parser.add_argument('--usuario', help='Nome de usuário usado nas requisições.')
+        parser.add_argument('--cenario', action='append', dest='cenarios', help='Restringe aos cenários informados.')
+        parser.add_argument('--saida', default='benchmark.json')
+        parser.add_argument('--comparar', help='Relatório anterior para exibir as variações.')
+
+    def handle(self, *args, **opcoes):
+        usuario = None
+        if opcoes['usuario']:
+            usuario = Usuario.objects.filter(username=opcoes['usuario']).first()
+            if usuario is None:
+                raise CommandError(f'Usuário "{opcoes["usuario"]}" não encontrado.')
+        try:
+            relatorio = benchmark.executar(
+                usuario=usuario,
+                repeticoes=opcoes['repeticoes'],
+                aquecimento=opcoes['aquecimento'],
+                apenas=opcoes['cenarios'],
+            )
+        except ValueError as erro:
+            raise CommandError(str(erro)) from erro
+
+        saida = Path(opcoes['saida'])
+        saida.write_text(json.dumps(relatorio, indent=2, sort_keys=True, ensure_ascii=False) + '\n', encoding='utf-8')
+        for nome, metricas in relatorio['cenarios'].items():
+            latencia = metricas['latencia_ms']
+            self.stdout.write(
+                f'{nome:<24} p50 {latencia["p50"]:>8.2f} ms  p95 {latencia["p95"]:>8.2f} ms  '
+                f'consultas {metricas["consultas"]["max"]:>3}  bytes {metricas["bytes"]}'
+                f' ({metricas["bytes_comprimidos"]} {metricas["codificacao"] or "sem compressão"})'
+            )
+        if opcoes['comparar']:
+            anterior = json.loads(Path(opcoes['comparar']).read_text(encoding='utf-8'))
+            for linha in benchmark.comparar(anterior, relatorio):
+                self.stdout.write(linha)
+        self.stdout.write(self.style.SUCCESS(f'Relatório gravado em {saida}.'))
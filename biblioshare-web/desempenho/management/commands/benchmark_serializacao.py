@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from desempenho import serializacao
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a serialização das listagens pelo caminho normal do DRF e pelo caminho rápido sobre '
+        'values(), e a renderização com e sem orjson, com massa de dados temporária, conferindo se o '
+        'JSON gerado é idêntico.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quantidade', type=int, action='append', dest='quantidades')
+        parser.add_argument('--repeticoes', type=int, default=3)
+
+    def handle(self, *args, **opcoes):
+        quantidades = opcoes['quantidades'] or serializacao.QUANTIDADES
+        if min(quantidades) < 1:
+            raise CommandError('As quantidades precisam ser positivas.')
+        resultados = serializacao.medir(quantidades, repeticoes=opcoes['repeticoes'])
+        for resultado in resultados:
+            renderizacao = resultado['renderizacao_ms']
+            self.stdout.write(
+                f'{resultado["serializador"]:<18} {resultado["linhas"]:>7} linhas  '
+                f'normal {resultado["normal_ms"]:>9.2f} ms  rápido {resultado["rapido_ms"]:>9.2f} ms  '
+                f'ganho {resultado["ganho"]:>5.2f}x  {"idêntico" if resultado["identico"] else "DIVERGENTE"}  '
+                f'render {renderizacao["json"]:.2f} → {renderizacao["rapido"]:.2f} ms  '
+                f'bytes {resultado["bytes"]} (gzip {resultado["bytes_gzip"]})'
+            )
+        if not all(resultado['identico'] for resultado in resultados):
+            raise CommandError('O caminho rápido gerou JSON diferente do serializador normal.')
@@ -0,0 +1,66 @@
+import json
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from desempenho import carga
+
+Usuario = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Sobe o gunicorn com gunicorn.conf.py em cada modo (sync, gthread, asgi) e mede vazão e '
+        'latência dos cenários do benchmark sob requisições concorrentes. Com --banco, repete cada modo '
+        'sem conexões persistentes, com persistência e com pool (PostgreSQL). Rode após popular_dados.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modo', action='append', dest='modos', choices=carga.MODOS)
+        parser.add_argument('--requisicoes', type=int, default=400)
+        parser.add_argument('--concorrencia', type=int, default=16)
+        parser.add_argument('--aquecimento', type=int, default=20)
+        parser.add_argument('--workers', type=int, help='Fixa o número de workers em todos os modos.')
+        parser.add_argument('--banco', action='append', dest='bancos', choices=carga.BANCOS)
+        parser.add_argument('--usuario', help='Nome de usuário usado nas requisições.')
+        parser.add_argument('--cenario', action='append', dest='cenarios', help='Restringe aos cenários informados.')
+        parser.add_argument('--saida', default='benchmark_servidor.json')
+
+    def handle(self, *args, **opcoes):
+        usuario = None
+        if opcoes['usuario']:
+            usuario = Usuario.objects.filter(username=opcoes['usuario']).first()
+            if usuario is None:
+                raise CommandError(f'Usuário "{opcoes["usuario"]}" não encontrado.')
+        try:
+            relatorio = carga.executar_modos(
+                modos=opcoes['modos'] or carga.MODOS,
+                usuario=usuario,
+                requisicoes=opcoes['requisicoes'],
+                concorrencia=opcoes['concorrencia'],
+                aquecimento=opcoes['aquecimento'],
+                workers=opcoes['workers'],
+                apenas=opcoes['cenarios'],
+                bancos=opcoes['bancos'],
+            )
+        except ValueError as erro:
+            raise CommandError(str(erro)) from erro
+
+        saida = Path(opcoes['saida'])
+        saida.write_text(json.dumps(relatorio, indent=2, sort_keys=True, ensure_ascii=False) + '\n', encoding='utf-8')
+        for modo, resultado in relatorio['modos'].items():
+            self.stdout.write(self.style.MIGRATE_HEADING(modo))
+            if 'ignorado' in resultado:
+                self.stdout.write(self.style.WARNING(f'  ignorado: {resultado["ignorado"]}'))
+                continue
+            if 'erro' in resultado:
+                self.stdout.write(self.style.ERROR(f'  não foi possível subir o servidor: {resultado["erro"]}'))
+                continue
+            for nome, metricas in resultado['cenarios'].items():
+                latencia = metricas['latencia_ms']
+                self.stdout.write(
+                    f'  {nome:<24} {metricas["vazao_rps"]:>8.1f} req/s  p50 {latencia.get("p50", 0):>8.2f} ms  '
+                    f'p95 {latencia.get("p95", 0):>8.2f} ms  erros {metricas["erros"]}'
+                )
+        self.stdout.write(self.style.SUCCESS(f'Relatório gravado em {saida}.'))
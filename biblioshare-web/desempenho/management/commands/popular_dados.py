@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from desempenho.dados import SENHA_PADRAO, popular
+
+Usuario = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Popula o banco com usuários, livros, transações e mensagens sintéticos usando inserções em lote.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=200)
+        parser.add_argument('--livros', type=int, default=2_000)
+        parser.add_argument('--transacoes', type=int, default=1_000)
+        parser.add_argument('--mensagens', type=int, default=20, help='Média de mensagens por transação.')
+        parser.add_argument('--prefixo', default='carga', help='Prefixo dos nomes de usuário gerados.')
+        parser.add_argument('--semente', type=int, default=42)
+
+    def handle(self, *args, **opcoes):
+        prefixo = opcoes['prefixo']
+        if Usuario.objects.filter(username__startswith=f'{prefixo}-').exists():
+            raise CommandError(f'Já existem usuários com o prefixo "{prefixo}". Use --prefixo para outro lote.')
+        if opcoes['usuarios'] < 2:
+            raise CommandError('São necessários ao menos dois usuários para gerar transações.')
+        resumo = popular(
+            usuarios=opcoes['usuarios'],
+            livros=opcoes['livros'],
+            transacoes=opcoes['transacoes'],
+            mensagens_por_transacao=opcoes['mensagens'],
+            prefixo=prefixo,
+            semente=opcoes['semente'],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{resumo.usuarios} usuários, {resumo.livros} livros, {resumo.transacoes} transações, '
+                f'{resumo.historicos} históricos e {resumo.mensagens} mensagens criados.'
+            )
+        )
+        self.stdout.write(f'Senha dos usuários gerados: {SENHA_PADRAO}')
@@ -0,0 +1,100 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, Sequence, Tuple
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIMITES_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+HISTOGRAMAS = {
+    'biblioshare_requisicao_segundos': ('Duração total da requisição por rota.', LIMITES_SEGUNDOS),
+    'biblioshare_visao_segundos': ('Tempo da requisição fora da serialização da resposta.', LIMITES_SEGUNDOS),
+    'biblioshare_serializacao_segundos': ('Tempo de renderização da resposta.', LIMITES_SEGUNDOS),
+    'biblioshare_banco_segundos': ('Tempo gasto em consultas ao banco por requisição.', LIMITES_SEGUNDOS),
+    'biblioshare_consultas': ('Número de consultas ao banco por requisição.', LIMITES_CONSULTAS),
+}
+CONTADORES = {
+    'biblioshare_requisicoes_total': 'Requisições atendidas por rota e status.',
+}
+
+Rotulos = Tuple[Tuple[str, str], ...]
+
+
+class Histograma:
+    __slots__ = ('limites', 'contagens', 'soma', 'total')
+
+    def __init__(self, limites: Sequence[float]):
+        self.limites = tuple(limites)
+        self.contagens = [0] * (len(self.limites) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float) -> None:
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._histogramas: Dict[Tuple[str, Rotulos], Histograma] = {}
+        self._contadores: Dict[Tuple[str, Rotulos], float] = {}
+
+    def observar(self, nome: str, rotulos: Rotulos, valor: float) -> None:
+        chave = (nome, rotulos)
+        with self._trava:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = Histograma(HISTOGRAMAS[nome][1])
+            histograma.observar(valor)
+
+    def incrementar(self, nome: str, rotulos: Rotulos, valor: float = 1) -> None:
+        chave = (nome, rotulos)
+        with self._trava:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def limpar(self) -> None:
+        with self._trava:
+            self._histogramas.clear()
+            self._contadores.clear()
+
+    def exportar(self) -> str:
+        with self._trava:
+            histogramas = sorted(
+                (chave, list(h.contagens), h.soma, h.total, h.limites) for chave, h in self._histogramas.items()
+            )
+            contadores = sorted(self._contadores.items())
+        linhas = []
+        for nome, (ajuda, _) in HISTOGRAMAS.items():
+            linhas.append(f'# HELP {nome} {ajuda}')
+            linhas.append(f'# TYPE {nome} histogram')
+            for (nome_serie, rotulos), contagens, soma, total, limites in histogramas:
+                if nome_serie != nome:
+                    continue
+                acumulado = 0
+                for limite, contagem in zip((*limites, '+Inf'), contagens):
+                    acumulado += contagem
+                    linhas.append(f'{nome}_bucket{_formatar(rotulos + (("le", str(limite)),))} {acumulado}')
+                linhas.append(f'{nome}_sum{_formatar(rotulos)} {soma:.6f}')
+                linhas.append(f'{nome}_count{_formatar(rotulos)} {total}')
+        for nome, ajuda in CONTADORES.items():
+            linhas.append(f'# HELP {nome} {ajuda}')
+            linhas.append(f'# TYPE {nome} counter')
+            for (nome_serie, rotulos), valor in contadores:
+                if nome_serie == nome:
+                    linhas.append(f'{nome}{_formatar(rotulos)} {valor:g}')
+        return '\n'.join(linhas) + '\n'
+
+
+def _formatar(rotulos: Rotulos) -> str:
+    if not rotulos:
+        return ''
+    pares = ','.join(f'{chave}="{_escapar(valor)}"' for chave, valor in rotulos)
+    return '{' + pares + '}'
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registro = RegistroMetricas()
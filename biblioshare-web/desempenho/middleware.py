@@ -0,0 +1,155 @@
+import cProfile
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .metricas import registro
+from .perfis import salvar_perfil
+
+logger = logging.getLogger(__name__)
+
+
+class ColetorConsultas:
+    __slots__ = ('total', 'tempo', 'sql', 'limite_sql', 'inicio_renderizacao', 'renderizacao')
+
+    def __init__(self, limite_sql: int):
+        self.total = 0
+        self.tempo = 0.0
+        self.sql = []
+        self.limite_sql = limite_sql
+        self.inicio_renderizacao = None
+        self.renderizacao = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tempo += time.perf_counter() - inicio
+            self.total += 1
+            if len(self.sql) < self.limite_sql:
+                self.sql.append(sql)
+
+
+class InstrumentacaoMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        coletor = ColetorConsultas(getattr(settings, 'INSTRUMENTACAO_MAX_SQL', 50))
+        request._coletor_instrumentacao = coletor
+        inicio = time.perf_counter()
+        with ExitStack() as pilha:
+            for conexao in connections.all():
+                pilha.enter_context(conexao.execute_wrapper(coletor))
+            response = self.get_response(request)
+        duracao = time.perf_counter() - inicio
+        self._registrar(request, response, coletor, duracao)
+        return response
+
+    def process_template_response(self, request, response):
+        coletor = getattr(request, '_coletor_instrumentacao', None)
+        if coletor is not None:
+            coletor.inicio_renderizacao = time.perf_counter()
+            response.add_post_render_callback(lambda _: self._fim_renderizacao(coletor))
+        return response
+
+    @staticmethod
+    def _fim_renderizacao(coletor: ColetorConsultas) -> None:
+        coletor.renderizacao = time.perf_counter() - coletor.inicio_renderizacao
+
+    def _registrar(self, request, response, coletor: ColetorConsultas, duracao: float) -> None:
+        rota = _rota(request)
+        rotulos = (('rota', rota),)
+        registro.observar('biblioshare_requisicao_segundos', rotulos, duracao)
+        registro.observar('biblioshare_visao_segundos', rotulos, duracao - coletor.renderizacao)
+        registro.observar('biblioshare_serializacao_segundos', rotulos, coletor.renderizacao)
+        registro.observar('biblioshare_banco_segundos', rotulos, coletor.tempo)
+        registro.observar('biblioshare_consultas', rotulos, coletor.total)
+        registro.incrementar('biblioshare_requisicoes_total', rotulos + (('status', str(response.status_code)),))
+
+        orcamento_consultas = getattr(settings, 'INSTRUMENTACAO_ORCAMENTO_CONSULTAS', None)
+        orcamento_ms = getattr(settings, 'INSTRUMENTACAO_ORCAMENTO_LATENCIA_MS', None)
+        excedeu_consultas = orcamento_consultas is not None and coletor.total > orcamento_consultas
+        excedeu_latencia = orcamento_ms is not None and duracao * 1000 > orcamento_ms
+        if excedeu_consultas or excedeu_latencia:
+            repetidas = Counter(coletor.sql).most_common(5)
+            logger.warning(
+                'Requisição acima do orçamento: %s %s (rota %s) levou %.1f ms com %d consultas '
+                '(%.1f ms no banco, %.1f ms serializando).\nConsultas mais repetidas:\n%s\nSQL capturado:\n%s',
+                request.method,
+                request.path,
+                rota,
+                duracao * 1000,
+                coletor.total,
+                coletor.tempo * 1000,
+                coletor.renderizacao * 1000,
+                '\n'.join(f'{vezes}x {sql}' for sql, vezes in repetidas),
+                '\n'.join(coletor.sql),
+            )
+
+
+class PerfilamentoMiddleware:
+    CABECALHO = 'HTTP_X_PERFILAR'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self._solicitado(request):
+            return self.get_response(request)
+        usuario = _usuario_autenticado(request)
+        if not (usuario and usuario.is_staff):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            logger.warning('Perfilamento ignorado em %s: outro profiler já está ativo.', request.path)
+            return self.get_response(request)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+
+        perfil = salvar_perfil(profiler, request, response, duracao_ms, _rota(request))
+        if perfil is not None:
+            response['X-Perfil-Id'] = str(perfil.pk)
+        return response
+
+    def _solicitado(self, request) -> bool:
+        if request.META.get(self.CABECALHO) in ('1', 'true', 'sim'):
+            return True
+        amostragem = getattr(settings, 'PERFILAMENTO_AMOSTRAGEM', 0)
+        return amostragem > 0 and random.random() * 100 < amostragem
+
+
+def _usuario_autenticado(request):
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and usuario.is_authenticated:
+        return usuario
+    if 'HTTP_AUTHORIZATION' not in request.META:
+        return None
+    try:
+        autenticado = JWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return autenticado[0] if autenticado else None
+
+
+def _rota(request) -> str:
+    resolver_match = getattr(request, 'resolver_match', None)
+    if resolver_match is None:
+        return 'nao_resolvida'
+    return resolver_match.view_name or 'sem_nome'
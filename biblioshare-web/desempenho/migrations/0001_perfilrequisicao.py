@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerfilRequisicao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metodo', models.CharField(max_length=10, verbose_name='método')),
+                ('caminho', models.CharField(max_length=500, verbose_name='caminho')),
+                ('rota', models.CharField(blank=True, max_length=200, verbose_name='rota')),
+                ('status', models.PositiveSmallIntegerField(verbose_name='status')),
+                ('duracao_ms', models.FloatField(verbose_name='duração (ms)')),
+                ('arquivo', models.CharField(max_length=255, verbose_name='arquivo')),
+                ('tamanho_bytes', models.PositiveIntegerField(default=0, verbose_name='tamanho (bytes)')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='criado em')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='perfis_requisicao', to=settings.AUTH_USER_MODEL, verbose_name='usuário')),
+            ],
+            options={
+                'verbose_name': 'Perfil de requisição',
+                'verbose_name_plural': 'Perfis de requisição',
+                'ordering': ('-criado_em',),
+            },
+        ),
+    ]
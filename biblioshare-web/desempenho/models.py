@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.db import models
+
+
+class PerfilRequisicao(models.Model):
+    metodo = models.CharField('método', max_length=10)
+    caminho = models.CharField('caminho', max_length=500)
+    rota = models.CharField('rota', max_length=200, blank=True)
+    status = models.PositiveSmallIntegerField('status')
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='perfis_requisicao',
+        verbose_name='usuário',
+    )
+    duracao_ms = models.FloatField('duração (ms)')
+    arquivo = models.CharField('arquivo', max_length=255)
+    tamanho_bytes = models.PositiveIntegerField('tamanho (bytes)', default=0)
+    criado_em = models.DateTimeField('criado em', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-criado_em',)
+        verbose_name = 'Perfil de requisição'
+        verbose_name_plural = 'Perfis de requisição'
+
+    def __str__(self):
+        return f'{self.metodo} {self.caminho} · {self.duracao_ms:.0f} ms'
@@ -0,0 +1,65 @@
+import io
+import logging
+import pstats
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import PerfilRequisicao
+
+logger = logging.getLogger(__name__)
+
+
+def diretorio_perfis() -> Path:
+    return Path(getattr(settings, 'PERFILAMENTO_DIR', settings.BASE_DIR / 'perfis'))
+
+
+def caminho_do_perfil(perfil: PerfilRequisicao) -> Path:
+    return diretorio_perfis() / perfil.arquivo
+
+
+def salvar_perfil(profiler, request, response, duracao_ms: float, rota: str) -> Optional[PerfilRequisicao]:
+    diretorio = diretorio_perfis()
+    nome = f'{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}.pstats'
+    try:
+        diretorio.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(diretorio / nome)
+        tamanho = (diretorio / nome).stat().st_size
+    except OSError as erro:
+        logger.warning('Não foi possível gravar o perfil em %s: %s', diretorio, erro)
+        return None
+    usuario = request.user if request.user.is_authenticated else None
+    perfil = PerfilRequisicao.objects.create(
+        metodo=request.method,
+        caminho=request.get_full_path()[:500],
+        rota=rota[:200],
+        status=response.status_code,
+        usuario=usuario,
+        duracao_ms=duracao_ms,
+        arquivo=nome,
+        tamanho_bytes=tamanho,
+    )
+    descartar_excedentes()
+    return perfil
+
+
+def descartar_excedentes() -> None:
+    limite = getattr(settings, 'PERFILAMENTO_MAX_ARQUIVOS', 50)
+    excedentes = list(PerfilRequisicao.objects.order_by('-criado_em', '-id')[limite:])
+    for perfil in excedentes:
+        caminho_do_perfil(perfil).unlink(missing_ok=True)
+    if excedentes:
+        PerfilRequisicao.objects.filter(id__in=[perfil.id for perfil in excedentes]).delete()
+
+
+def resumo_do_perfil(perfil: PerfilRequisicao, limite: int = 40, ordenacao: str = 'cumulative') -> str:
+    caminho = caminho_do_perfil(perfil)
+    if not caminho.exists():
+        return 'Arquivo do perfil não encontrado.'
+    saida = io.StringIO()
+    estatisticas = pstats.Stats(str(caminho), stream=saida)
+    estatisticas.strip_dirs().sort_stats(ordenacao).print_stats(limite)
+    return saida.getvalue()
@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as TempoEsgotado
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+
+from biblioshare_core.roteamento import PRIMARIO, mesmo_banco
+from livros.provedores import circuitos_abertos
+from livros.services import provedores_isbn
+
+logger = logging.getLogger(__name__)
+
+OK = 'ok'
+FALHA = 'falha'
+DEGRADADO = 'degradado'
+
+
+@dataclass(frozen=True)
+class Verificacao:
+    nome: str
+    funcao: Callable[[], Optional[str]]
+    critica: bool = True
+    tempo_limite: Optional[float] = None
+
+
+VERIFICACOES: Dict[str, Verificacao] = {}
+
+_trava = threading.Lock()
+# Execução mais recente de cada verificação. Uma que ainda não terminou não é disparada de novo: as
+# sondagens seguintes a dão como falha em vez de acumular threads presas no mesmo recurso.
+_em_andamento: Dict[str, Future] = {}
+_ultimo_resultado: Optional[dict] = None
+_ultima_execucao = 0.0
+
+
+def registrar_verificacao(nome: str, critica: bool = True, tempo_limite: Optional[float] = None):
+    def decorador(funcao):
+        VERIFICACOES[nome] = Verificacao(nome, funcao, critica, tempo_limite)
+        return funcao
+
+    return decorador
+
+
+def verificar(usar_cache: bool = True) -> dict:
+    global _ultimo_resultado, _ultima_execucao
+    validade = getattr(settings, 'PRONTIDAO_CACHE_SEGUNDOS', 5)
+    with _trava:
+        if usar_cache and _ultimo_resultado is not None and time.monotonic() - _ultima_execucao < validade:
+            return _ultimo_resultado
+        _ultimo_resultado = _executar_verificacoes()
+        _ultima_execucao = time.monotonic()
+        return _ultimo_resultado
+
+
+def limpar_cache() -> None:
+    global _ultimo_resultado
+    with _trava:
+        _ultimo_resultado = None
+
+
+def _executar_verificacoes() -> dict:
+    padrao = getattr(settings, 'PRONTIDAO_TEMPO_LIMITE_SEGUNDOS', 2.0)
+    inicio = time.monotonic()
+    futuros = {}
+    for verificacao in VERIFICACOES.values():
+        futuro = _em_andamento.get(verificacao.nome)
+        presa = futuro is not None and not futuro.done()
+        if not presa:
+            futuro = _em_andamento[verificacao.nome] = _disparar(verificacao)
+        futuros[verificacao.nome] = (verificacao, futuro, presa)
+    resultados = {}
+    status = OK
+    for nome, (verificacao, futuro, presa) in futuros.items():
+        limite = verificacao.tempo_limite or padrao
+        if presa:
+            resultado = {'status': FALHA, 'erro': 'execução anterior ainda em andamento'}
+        else:
+            resultado = _aguardar(nome, futuro, limite, max(0.0, inicio + limite - time.monotonic()))
+        if resultado['status'] != OK:
+            resultado['critica'] = verificacao.critica
+            if verificacao.critica:
+                status = FALHA
+            elif status == OK:
+                status = DEGRADADO
+        resultados[nome] = resultado
+    return {'status': status, 'verificacoes': resultados}
+
+
+def _aguardar(nome: str, futuro: Future, limite: float, espera: float) -> dict:
+    try:
+        detalhe, duracao = futuro.result(timeout=espera)
+    except TempoEsgotado:
+        return {'status': FALHA, 'erro': f'tempo limite de {limite:g}s excedido'}
+    except Exception as erro:
+        logger.warning('Verificação de prontidão "%s" falhou: %s', nome, erro, exc_info=True)
+        return {'status': FALHA, 'erro': type(erro).__name__}
+    resultado = {'status': OK, 'ms': round(duracao * 1000, 2)}
+    if detalhe:
+        resultado['detalhe'] = detalhe
+    return resultado
+
+
+def _disparar(verificacao: Verificacao) -> Future:
+    # Uma thread daemon por verificação: uma que trave não ocupa um pool compartilhado nem segura o
+    # encerramento do processo.
+    futuro = Future()
+    futuro.set_running_or_notify_cancel()
+
+    def executar():
+        try:
+            futuro.set_result(_cronometrar(verificacao.funcao))
+        except BaseException as erro:
+            futuro.set_exception(erro)
+
+    threading.Thread(target=executar, name=f'prontidao-{verificacao.nome}', daemon=True).start()
+    return futuro
+
+
+def _cronometrar(funcao):
+    inicio = time.perf_counter()
+    detalhe = funcao()
+    return detalhe, time.perf_counter() - inicio
+
+
+@registrar_verificacao('banco')
+def verificar_banco() -> None:
+    # Um SELECT no primário e em cada réplica em uso; aliases que apontam para o mesmo banco (como as
+    # réplicas espelhadas nos testes) são verificados uma vez só.
+    verificados = []
+    for alias in (PRIMARIO, *settings.BANCO_REPLICAS):
+        conexao = connections[alias]
+        if any(mesmo_banco(conexao.settings_dict, outro) for outro in verificados):
+            continue
+        verificados.append(conexao.settings_dict)
+        try:
+            with conexao.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        finally:
+            conexao.close()
+
+
+@registrar_verificacao('cache')
+def verificar_cache() -> None:
+    chave = f'prontidao:{uuid.uuid4().hex}'
+    cache.set(chave, '1', timeout=10)
+    try:
+        if cache.get(chave) != '1':
+            raise RuntimeError('O cache não devolveu o valor gravado.')
+    finally:
+        cache.delete(chave)
+
+
+@registrar_verificacao('midia')
+def verificar_midia() -> None:
+    nome = default_storage.save(f'.prontidao/{uuid.uuid4().hex}', ContentFile(b'ok'))
+    default_storage.delete(nome)
+
+
+@registrar_verificacao('isbn_circuito', critica=False)
+def verificar_circuito_isbn() -> str:
+    provedores = provedores_isbn()
+    abertos = circuitos_abertos(provedores)
+    remotos = [provedor for provedor in provedores if provedor.circuito]
+    if remotos and len(abertos) == len(remotos):
+        raise RuntimeError(f'Circuitos abertos para todos os provedores de ISBN: {", ".join(abertos)}.')
+    return f'abertos: {", ".join(abertos)}' if abertos else 'fechado'
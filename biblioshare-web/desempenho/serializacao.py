@@ -0,0 +1,76 @@
+import gzip
+import statistics
+import time
+from typing import Iterable, List
+
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from biblioshare_core.renderizacao import JSONRapidoRenderer
+from livros.models import Livro
+from livros.serializers import LivroSerializer
+from transacoes.models import Mensagem, TransacaoParticipante
+from transacoes.serializers import MensagemSerializer, TransacaoResumoSerializer
+
+from .dados import popular
+
+QUANTIDADES = (100, 1_000, 10_000)
+ALVOS = (
+    ('livros', LivroSerializer, lambda: Livro.objects.select_related('dono').order_by('id')),
+    ('mensagens', MensagemSerializer, lambda: Mensagem.objects.select_related('remetente').order_by('id')),
+    ('caixa_de_entrada', TransacaoResumoSerializer, lambda: TransacaoParticipante.objects.order_by('id')),
+)
+
+
+def medir(quantidades: Iterable[int] = QUANTIDADES, repeticoes: int = 3) -> List[dict]:
+    # Compara a serialização normal do DRF com o caminho rápido sobre as mesmas linhas, e a
+    # renderização do JSONRenderer com a do JSONRapidoRenderer. A massa de dados é criada numa
+    # transação desfeita ao final, então o banco não muda.
+    quantidades = sorted(quantidades)
+    contexto = {'request': Request(APIRequestFactory().get('/'))}
+    resultados = []
+    with transaction.atomic():
+        popular(
+            usuarios=50,
+            livros=quantidades[-1],
+            transacoes=quantidades[-1] // 2,
+            mensagens_por_transacao=2,
+            prefixo='microbenchmark',
+        )
+        for nome, classe, consulta in ALVOS:
+            for quantidade in quantidades:
+                queryset = consulta()[:quantidade]
+                normal = lambda: serializers.ListSerializer(queryset, child=classe(), context=contexto).data
+                rapido = lambda: classe(queryset, many=True, context=contexto).data
+                tempos_normal, dados_normal = _cronometrar(normal, repeticoes)
+                tempos_rapido, dados_rapido = _cronometrar(rapido, repeticoes)
+                renderizador = JSONRenderer()
+                render_json, conteudo = _cronometrar(lambda: renderizador.render(dados_rapido), repeticoes)
+                render_rapido, _ = _cronometrar(lambda: JSONRapidoRenderer().render(dados_rapido), repeticoes)
+                resultados.append(
+                    {
+                        'serializador': nome,
+                        'linhas': len(dados_normal),
+                        'normal_ms': tempos_normal,
+                        'rapido_ms': tempos_rapido,
+                        'ganho': round(tempos_normal / tempos_rapido, 2) if tempos_rapido else None,
+                        'identico': renderizador.render(dados_normal) == conteudo,
+                        'renderizacao_ms': {'json': render_json, 'rapido': render_rapido},
+                        'bytes': len(conteudo),
+                        'bytes_gzip': len(gzip.compress(conteudo, compresslevel=6)),
+                    }
+                )
+        transaction.set_rollback(True)
+    return resultados
+
+
+def _cronometrar(funcao, repeticoes: int):
+    tempos = []
+    for _ in range(max(1, repeticoes)):
+        inicio = time.perf_counter()
+        dados = funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return round(statistics.median(tempos), 3), dados
@@ -0,0 +1,381 @@
+import json
+import runpy
+import threading
+from contextlib import contextmanager
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from biblioshare_core.servidor_falso import ServidorFalso
+from livros.models import Livro
+from transacoes.models import Mensagem, Transacao, TransacaoParticipante
+
+from . import benchmark, carga, prontidao, serializacao
+from .dados import popular
+from .metricas import registro
+from .models import PerfilRequisicao
+
+
+class PopularDadosTests(TestCase):
+    def test_popular_creates_consistent_dataset(self):
+        resumo = popular(usuarios=6, livros=30, transacoes=20, mensagens_por_transacao=3, prefixo='teste')
+
+        self.assertEqual(resumo.usuarios, 6)
+        self.assertEqual(Livro.objects.count(), 30)
+        self.assertEqual(Transacao.objects.count(), 20)
+        self.assertEqual(Mensagem.objects.count(), resumo.mensagens)
+        self.assertEqual(TransacaoParticipante.objects.count(), 40)
+        self.assertFalse(Transacao.objects.filter(solicitante=F('dono')).exists())
+        self.assertTrue(all(livro.modalidades for livro in Livro.objects.all()))
+
+    def test_command_refuses_to_reuse_prefix(self):
+        popular(usuarios=2, livros=2, transacoes=1, mensagens_por_transacao=0, prefixo='repetido')
+
+        with self.assertRaisesMessage(Exception, 'prefixo'):
+            call_command('popular_dados', prefixo='repetido', stdout=StringIO())
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        popular(usuarios=5, livros=20, transacoes=15, mensagens_por_transacao=2, prefixo='bench')
+
+    def test_executar_reports_latency_and_query_counts_for_each_endpoint(self):
+        relatorio = benchmark.executar(repeticoes=3, aquecimento=1)
+
+        self.assertEqual(set(relatorio['cenarios']), {cenario.nome for cenario in benchmark.CENARIOS})
+        for metricas in relatorio['cenarios'].values():
+            self.assertEqual(metricas['status'], 200)
+            self.assertGreater(metricas['consultas']['max'], 0)
+            self.assertGreater(metricas['bytes'], 0)
+            self.assertLessEqual(metricas['bytes_comprimidos'], metricas['bytes'])
+            self.assertLessEqual(metricas['latencia_ms']['p50'], metricas['latencia_ms']['max'])
+
+    def test_command_writes_report_and_compares_with_previous(self):
+        with TemporaryDirectory() as diretorio:
+            anterior = Path(diretorio) / 'anterior.json'
+            atual = Path(diretorio) / 'atual.json'
+            call_command(
+                'benchmark',
+                repeticoes=2,
+                aquecimento=0,
+                cenarios=['vitrine'],
+                saida=str(anterior),
+                stdout=StringIO(),
+            )
+            saida = StringIO()
+            call_command(
+                'benchmark',
+                repeticoes=2,
+                aquecimento=0,
+                cenarios=['vitrine'],
+                saida=str(atual),
+                comparar=str(anterior),
+                stdout=saida,
+            )
+
+            relatorio = json.loads(atual.read_text(encoding='utf-8'))
+        self.assertEqual(list(relatorio['cenarios']), ['vitrine'])
+        self.assertIn('vitrine: p95', saida.getvalue())
+
+
+class SerializacaoMicrobenchmarkTests(TestCase):
+    def test_measures_each_serializer_and_leaves_no_data_behind(self):
+        resultados = serializacao.medir(quantidades=[5, 20], repeticoes=1)
+
+        self.assertEqual(len(resultados), len(serializacao.ALVOS) * 2)
+        self.assertTrue(all(resultado['identico'] for resultado in resultados))
+        self.assertEqual(resultados[1]['linhas'], 20)
+        self.assertFalse(Livro.objects.exists())
+
+    def test_command_prints_one_line_per_size(self):
+        saida = StringIO()
+        call_command('benchmark_serializacao', quantidades=[5], repeticoes=1, stdout=saida)
+
+        self.assertEqual(saida.getvalue().count('idêntico'), len(serializacao.ALVOS))
+
+
+class InstrumentacaoMiddlewareTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        registro.limpar()
+        self.usuario = get_user_model().objects.create_user(
+            username='usuario',
+            email='usuario@example.com',
+            password='SenhaSegura123',
+        )
+        self.client.force_login(self.usuario)
+
+    def test_metrics_endpoint_exposes_histograms_per_url_name(self):
+        self.client.get(reverse('livros_api:livros-busca'))
+        self.client.get(reverse('livros_api:livros-busca'))
+        self.usuario.is_staff = True
+        self.usuario.save(update_fields=['is_staff'])
+
+        resposta = self.client.get(reverse('metricas'))
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta['Content-Type'].startswith('text/plain'))
+        corpo = resposta.content.decode()
+        self.assertIn('# TYPE biblioshare_requisicao_segundos histogram', corpo)
+        self.assertIn('biblioshare_consultas_count{rota="livros_api:livros-busca"} 2', corpo)
+        self.assertIn('biblioshare_requisicao_segundos_bucket{rota="livros_api:livros-busca",le="+Inf"} 2', corpo)
+        self.assertIn('biblioshare_requisicoes_total{rota="livros_api:livros-busca",status="200"} 2', corpo)
+        self.assertIn('biblioshare_serializacao_segundos_count{rota="livros_api:livros-busca"} 2', corpo)
+
+    @override_settings(METRICAS_TOKEN='')
+    def test_metrics_endpoint_is_staff_only_without_token(self):
+        self.assertEqual(self.client.get(reverse('metricas')).status_code, 403)
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('metricas')).status_code, 403)
+
+    @override_settings(METRICAS_TOKEN='segredo')
+    def test_metrics_endpoint_requires_configured_token(self):
+        self.assertEqual(self.client.get(reverse('metricas')).status_code, 403)
+        resposta = self.client.get(reverse('metricas'), headers={'Authorization': 'Bearer segredo'})
+        self.assertEqual(resposta.status_code, 200)
+
+    @override_settings(INSTRUMENTACAO_ORCAMENTO_CONSULTAS=0)
+    def test_logs_captured_sql_when_query_budget_is_exceeded(self):
+        with self.assertLogs('desempenho.middleware', level='WARNING') as logs:
+            self.client.get(reverse('livros_api:livros-busca'))
+
+        self.assertIn('livros_api:livros-busca', logs.output[0])
+        self.assertIn('livros_livro', logs.output[0])
+
+
+class PerfilamentoMiddlewareTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        diretorio = TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        self.diretorio = Path(diretorio.name)
+        configuracao = override_settings(PERFILAMENTO_DIR=self.diretorio, PERFILAMENTO_MAX_ARQUIVOS=2)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.staff = get_user_model().objects.create_user(
+            username='staff',
+            email='staff@example.com',
+            password='SenhaSegura123',
+            is_staff=True,
+        )
+
+    def test_header_profiles_request_for_staff_and_lists_it_in_admin(self):
+        self.client.force_login(self.staff)
+
+        resposta = self.client.get(reverse('livros_api:livros-busca'), headers={'X-Perfilar': '1'})
+
+        perfil = PerfilRequisicao.objects.get()
+        self.assertEqual(resposta['X-Perfil-Id'], str(perfil.pk))
+        self.assertEqual(perfil.rota, 'livros_api:livros-busca')
+        self.assertEqual(perfil.usuario, self.staff)
+        self.assertTrue((self.diretorio / perfil.arquivo).exists())
+
+        self.staff.is_superuser = True
+        self.staff.save(update_fields=['is_superuser'])
+        detalhe = self.client.get(reverse('admin:desempenho_perfilrequisicao_change', args=[perfil.pk]))
+        self.assertContains(detalhe, 'function calls')
+        download = self.client.get(reverse('admin:desempenho_perfilrequisicao_baixar', args=[perfil.pk]))
+        self.assertEqual(download.status_code, 200)
+
+    def test_jwt_staff_requests_can_be_profiled(self):
+        token = RefreshToken.for_user(self.staff).access_token
+
+        self.client.get(
+            reverse('livros_api:livros-busca'),
+            headers={'X-Perfilar': '1', 'Authorization': f'Bearer {token}'},
+        )
+
+        self.assertEqual(PerfilRequisicao.objects.get().usuario, self.staff)
+
+    def test_ignores_header_from_non_staff_users(self):
+        comum = get_user_model().objects.create_user(
+            username='comum',
+            email='comum@example.com',
+            password='SenhaSegura123',
+        )
+        self.client.force_login(comum)
+
+        resposta = self.client.get(reverse('livros_api:livros-busca'), headers={'X-Perfilar': '1'})
+
+        self.assertNotIn('X-Perfil-Id', resposta)
+        self.assertFalse(PerfilRequisicao.objects.exists())
+
+    @override_settings(PERFILAMENTO_AMOSTRAGEM=100)
+    def test_sampling_keeps_only_the_most_recent_profiles(self):
+        self.client.force_login(self.staff)
+
+        for _ in range(4):
+            self.client.get(reverse('livros_api:livros-busca'))
+
+        arquivos = sorted(caminho.name for caminho in self.diretorio.iterdir())
+        self.assertEqual(PerfilRequisicao.objects.count(), 2)
+        self.assertEqual(arquivos, sorted(PerfilRequisicao.objects.values_list('arquivo', flat=True)))
+
+
+class ProntidaoTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        prontidao.limpar_cache()
+        self.addCleanup(prontidao.limpar_cache)
+        diretorio = TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        configuracao = override_settings(MEDIA_ROOT=diretorio.name)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def test_reports_database_cache_and_media_checks(self):
+        resposta = self.client.get(reverse('prontidao'))
+
+        self.assertEqual(resposta.status_code, 200)
+        dados = resposta.json()
+        self.assertEqual(dados['status'], 'ok')
+        self.assertEqual(
+            {nome: resultado['status'] for nome, resultado in dados['verificacoes'].items()},
+            {'banco': 'ok', 'cache': 'ok', 'midia': 'ok', 'isbn_circuito': 'ok'},
+        )
+        self.assertEqual(dados['verificacoes']['isbn_circuito']['detalhe'], 'fechado')
+        self.assertEqual(self.client.get(reverse('saude')).status_code, 200)
+
+    def test_results_are_cached_between_polls(self):
+        chamadas = []
+        verificacoes = {'contador': prontidao.Verificacao('contador', lambda: chamadas.append(1))}
+
+        with patch.dict(prontidao.VERIFICACOES, verificacoes, clear=True):
+            self.client.get(reverse('prontidao'))
+            self.client.get(reverse('prontidao'))
+            with override_settings(PRONTIDAO_CACHE_SEGUNDOS=0):
+                self.client.get(reverse('prontidao'))
+
+        self.assertEqual(len(chamadas), 2)
+
+    def test_failing_or_slow_critical_check_returns_503(self):
+        liberar = threading.Event()
+        self.addCleanup(liberar.set)
+
+        def falhar():
+            raise ConnectionError('banco indisponível')
+
+        verificacoes = {
+            'quebrada': prontidao.Verificacao('quebrada', falhar),
+            'lenta': prontidao.Verificacao('lenta', lambda: liberar.wait(5), tempo_limite=0.05),
+        }
+        with patch.dict(prontidao.VERIFICACOES, verificacoes, clear=True):
+            with self.assertLogs('desempenho.prontidao', level='WARNING'):
+                resposta = self.client.get(reverse('prontidao'))
+
+        self.assertEqual(resposta.status_code, 503)
+        dados = resposta.json()
+        self.assertEqual(dados['status'], 'falha')
+        self.assertEqual(dados['verificacoes']['quebrada']['erro'], 'ConnectionError')
+        self.assertIn('tempo limite', dados['verificacoes']['lenta']['erro'])
+
+    def test_hung_check_is_not_started_again(self):
+        liberar = threading.Event()
+        self.addCleanup(liberar.set)
+        chamadas = []
+
+        def travar():
+            chamadas.append(1)
+            liberar.wait(5)
+
+        verificacoes = {'presa': prontidao.Verificacao('presa', travar, tempo_limite=0.05)}
+        with patch.dict(prontidao.VERIFICACOES, verificacoes, clear=True):
+            self.assertIn('tempo limite', prontidao.verificar(usar_cache=False)['verificacoes']['presa']['erro'])
+            segunda = prontidao.verificar(usar_cache=False)['verificacoes']['presa']
+            self.assertEqual(segunda['erro'], 'execução anterior ainda em andamento')
+            self.assertEqual(len(chamadas), 1)
+
+            liberar.set()
+            prontidao._em_andamento['presa'].result(timeout=5)
+            self.assertEqual(prontidao.verificar(usar_cache=False)['verificacoes']['presa']['status'], 'ok')
+        self.assertEqual(len(chamadas), 2)
+
+    def test_non_critical_failure_only_degrades(self):
+        def falhar():
+            raise RuntimeError('circuito aberto')
+
+        verificacoes = {'externa': prontidao.Verificacao('externa', falhar, critica=False)}
+        with patch.dict(prontidao.VERIFICACOES, verificacoes, clear=True):
+            with self.assertLogs('desempenho.prontidao', level='WARNING'):
+                resposta = self.client.get(reverse('prontidao'))
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['status'], 'degradado')
+
+
+class ServidorConfiguracaoTests(TestCase):
+    def carregar(self, **ambiente):
+        with patch.dict('os.environ', ambiente):
+            return runpy.run_path(str(settings.BASE_DIR / 'gunicorn.conf.py'))
+
+    def test_sizes_workers_and_selects_application_per_mode(self):
+        cpus = self.carregar()['cpus_disponiveis']()
+
+        gthread = self.carregar(GUNICORN_MODO='gthread')
+        self.assertEqual((gthread['workers'], gthread['threads']), (cpus + 1, 4))
+        self.assertEqual(gthread['wsgi_app'], 'biblioshare_core.wsgi:application')
+        self.assertTrue(gthread['preload_app'])
+        self.assertGreater(gthread['max_requests_jitter'], 0)
+
+        asgi = self.carregar(GUNICORN_MODO='asgi', GUNICORN_WORKERS='3')
+        self.assertEqual(asgi['workers'], 3)
+        self.assertEqual(asgi['worker_class'], 'uvicorn_worker.UvicornWorker')
+        self.assertEqual(asgi['wsgi_app'], 'biblioshare_core.asgi:application')
+
+        with self.assertRaises(ValueError):
+            self.carregar(GUNICORN_MODO='eventlet')
+
+    def test_medir_carga_reports_throughput_and_errors(self):
+        servidor = ServidorFalso().iniciar()
+        self.addCleanup(servidor.parar)
+        servidor.responder('/ok', corpo=b'ok')
+        servidor.responder('/erro', status=500, corpo=b'ok')
+        base = servidor.url
+
+        resultado = carga.medir_carga(f'{base}/ok', {}, requisicoes=20, concorrencia=4, aquecimento=2)
+        self.assertEqual(resultado['erros'], 0)
+        self.assertGreater(resultado['vazao_rps'], 0)
+        self.assertEqual(resultado['bytes'], 2)
+        self.assertIn('p95', resultado['latencia_ms'])
+
+        falhas = carga.medir_carga(f'{base}/erro', {}, requisicoes=5, concorrencia=2, aquecimento=0)
+        self.assertEqual(falhas['erros'], 5)
+
+    def test_runs_each_mode_per_database_configuration(self):
+        usuario = get_user_model().objects.create_user(username='carga', password='SenhaSegura123')
+        ambientes = []
+
+        @contextmanager
+        def servidor(modo, porta, workers=None, ambiente_extra=None):
+            ambientes.append((modo, ambiente_extra))
+            raise carga.ServidorIndisponivel('sem servidor')
+            yield
+
+        with (
+            patch.object(carga, 'preparar_contexto', return_value=benchmark.ContextoBenchmark(usuario, None)),
+            patch.object(carga, 'servidor_gunicorn', servidor),
+        ):
+            relatorio = carga.executar_modos(
+                modos=['gthread'],
+                apenas=['livros_busca'],
+                bancos=['sem_persistencia', 'persistente', 'pool'],
+            )
+
+        self.assertEqual(
+            ambientes,
+            [('gthread', carga.BANCOS['sem_persistencia']), ('gthread', carga.BANCOS['persistente'])],
+        )
+        self.assertEqual(relatorio['modos']['gthread/persistente'], {'erro': 'sem servidor'})
+        self.assertIn('ignorado', relatorio['modos']['gthread/pool'])
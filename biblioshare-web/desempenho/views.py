@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.utils.crypto import constant_time_compare
+
+from .metricas import registro
+from .prontidao import FALHA, verificar
+
+
+def metricas(request):
+    # Sem METRICAS_TOKEN configurado, só a equipe (sessão do admin) lê as métricas.
+    token = getattr(settings, 'METRICAS_TOKEN', '')
+    if not token:
+        if not request.user.is_staff:
+            return HttpResponseForbidden('Métricas restritas à equipe.')
+    elif not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponseForbidden('Token de métricas inválido.')
+    return HttpResponse(registro.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def prontidao(request):
+    resultado = verificar()
+    return JsonResponse(resultado, status=503 if resultado['status'] == FALHA else 200)
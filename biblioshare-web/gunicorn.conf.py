@@ -0,0 +1,131 @@
+import logging
+import math
+import os
+import sys
+import time
+import traceback
+
+logger = logging.getLogger('gunicorn.error')
+
+MODOS = {
+    'sync': 'sync',
+    'gthread': 'gthread',
+    'asgi': 'uvicorn_worker.UvicornWorker',
+}
+
+
+def cpus_disponiveis() -> int:
+    try:
+        total = len(os.sched_getaffinity(0))
+    except AttributeError:
+        total = os.cpu_count() or 1
+    # Em contêineres a cota do cgroup costuma ser menor que o número de CPUs visíveis.
+    try:
+        with open('/sys/fs/cgroup/cpu.max', encoding='ascii') as arquivo:
+            cota, periodo = arquivo.read().split()
+        if cota != 'max':
+            total = min(total, math.ceil(int(cota) / int(periodo)))
+    except (OSError, ValueError):
+        pass
+    return max(1, total)
+
+
+def dimensionar(modo: str, cpus: int):
+    if modo == 'gthread':
+        return cpus + 1, 4
+    # No modo ASGI as views síncronas rodam em uma única thread por worker (thread_sensitive),
+    # então o número de processos segue a mesma regra do modo sync.
+    return 2 * cpus + 1, 1
+
+
+def _env_bool(nome: str, padrao: bool) -> bool:
+    return os.getenv(nome, str(padrao)).lower() in ('true', '1', 'yes')
+
+
+modo = os.getenv('GUNICORN_MODO', 'gthread')
+if modo not in MODOS:
+    raise ValueError(f'GUNICORN_MODO inválido: {modo}. Use um de {", ".join(MODOS)}.')
+
+_workers, _threads = dimensionar(modo, cpus_disponiveis())
+
+wsgi_app = 'biblioshare_core.asgi:application' if modo == 'asgi' else 'biblioshare_core.wsgi:application'
+worker_class = MODOS[modo]
+workers = int(os.getenv('GUNICORN_WORKERS', _workers))
+threads = int(os.getenv('GUNICORN_THREADS', _threads))
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+preload_app = _env_bool('GUNICORN_PRELOAD', True)
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+loglevel = os.getenv('GUNICORN_LOGLEVEL', 'info')
+accesslog = '-' if _env_bool('GUNICORN_ACCESSLOG', False) else None
+statsd_host = os.getenv('GUNICORN_STATSD_HOST') or None
+statsd_prefix = 'biblioshare'
+
+
+def when_ready(server):
+    logger.info(
+        'Gunicorn pronto no modo %s: %d workers x %d threads (%s), preload=%s.',
+        modo,
+        server.cfg.workers,
+        server.cfg.threads,
+        server.cfg.worker_class_str,
+        server.cfg.preload_app,
+    )
+
+
+def pre_fork(server, worker):
+    # Com preload_app o processo mestre carrega o Django; nenhuma conexão aberta ali
+    # pode ser herdada pelos workers.
+    if server.cfg.preload_app:
+        from django.db import connections
+
+        connections.close_all()
+
+
+def post_fork(server, worker):
+    worker.estatisticas = {'inicio': time.monotonic(), 'requisicoes': 0, 'tempo': 0.0, 'maximo': 0.0}
+
+
+def pre_request(worker, req):
+    req.inicio_biblioshare = time.monotonic()
+
+
+def post_request(worker, req, environ, resp):
+    estatisticas = getattr(worker, 'estatisticas', None)
+    inicio = getattr(req, 'inicio_biblioshare', None)
+    if estatisticas is None or inicio is None:
+        return
+    duracao = time.monotonic() - inicio
+    estatisticas['requisicoes'] += 1
+    estatisticas['tempo'] += duracao
+    estatisticas['maximo'] = max(estatisticas['maximo'], duracao)
+
+
+def worker_exit(server, worker):
+    estatisticas = getattr(worker, 'estatisticas', None)
+    if not estatisticas:
+        return
+    requisicoes = estatisticas['requisicoes']
+    media = estatisticas['tempo'] / requisicoes * 1000 if requisicoes else 0.0
+    logger.info(
+        'Worker %s encerrado após %.0f s: %d requisições, média %.1f ms, máximo %.1f ms.',
+        worker.pid,
+        time.monotonic() - estatisticas['inicio'],
+        requisicoes,
+        media,
+        estatisticas['maximo'] * 1000,
+    )
+
+
+def worker_abort(worker):
+    pilhas = []
+    for identificador, quadro in sys._current_frames().items():
+        pilhas.append(f'Thread {identificador}:\n{"".join(traceback.format_stack(quadro))}')
+    logger.error('Worker %s abortado por tempo limite. Pilhas:\n%s', worker.pid, '\n'.join(pilhas))
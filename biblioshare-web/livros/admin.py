@@ -1,15 +1,39 @@
 from django.contrib import admin
 
+from biblioshare_core.administracao import ModelAdminEscalavel
+from biblioshare_core.exportacao import acao_exportar
+
+from .exportacao import COLUNAS_LISTA_DESEJO, COLUNAS_LIVRO, transformar_livro
+from .forms import LivroAdminForm
 from .models import ListaDesejo, Livro
+from .services import isbn_valido, normalizar_isbn
+
+
+class BuscaIsbnExataMixin:
+    # Um ISBN completo digitado na busca vai ao índice da coluna isbn com uma comparação exata.
+    def get_search_results(self, request, queryset, search_term):
+        isbn = normalizar_isbn(search_term)
+        if isbn and isbn_valido(isbn):
+            return queryset.filter(isbn__in={isbn, search_term.strip()}), False
+        return super().get_search_results(request, queryset, search_term)
 
 
 @admin.register(Livro)
-class LivroAdmin(admin.ModelAdmin):
+class LivroAdmin(BuscaIsbnExataMixin, ModelAdminEscalavel):
+    form = LivroAdminForm
     list_display = ('titulo', 'dono', 'listar_modalidades', 'disponivel', 'criado_em')
     list_filter = ('disponivel',)
-    search_fields = ('titulo', 'autor', 'isbn', 'dono__username', 'dono__first_name', 'dono__last_name')
+    list_select_related = ('dono',)
+    # Título e autor como na busca pública; o dono pelos campos do usuário. Todos têm índice de
+    # trigramas no PostgreSQL.
+    search_fields = ('titulo', 'autor', 'dono__username', 'dono__first_name', 'dono__last_name')
+    search_help_text = 'Busca por título, autor ou dono; um ISBN completo é buscado pelo índice exato.'
     autocomplete_fields = ('dono',)
     date_hierarchy = 'criado_em'
+    actions = [
+        acao_exportar('csv', COLUNAS_LIVRO, 'livros', transformar_livro),
+        acao_exportar('ndjson', COLUNAS_LIVRO, 'livros', transformar_livro),
+    ]
 
     @staticmethod
     def listar_modalidades(obj: Livro) -> str:
@@ -19,8 +43,14 @@ class LivroAdmin(admin.ModelAdmin):
 
 
 @admin.register(ListaDesejo)
-class ListaDesejoAdmin(admin.ModelAdmin):
+class ListaDesejoAdmin(BuscaIsbnExataMixin, ModelAdminEscalavel):
     list_display = ('usuario', 'titulo', 'autor', 'isbn', 'criado_em')
-    search_fields = ('titulo', 'autor', 'isbn', 'usuario__username', 'usuario__first_name', 'usuario__last_name')
+    list_select_related = ('usuario',)
+    search_fields = ('titulo', 'autor', 'usuario__username', 'usuario__first_name', 'usuario__last_name')
+    search_help_text = 'Busca por título, autor ou usuário; um ISBN completo é buscado pelo índice exato.'
     autocomplete_fields = ('usuario',)
     date_hierarchy = 'criado_em'
+    actions = [
+        acao_exportar('csv', COLUNAS_LISTA_DESEJO, 'lista-desejos'),
+        acao_exportar('ndjson', COLUNAS_LISTA_DESEJO, 'lista-desejos'),
+    ]
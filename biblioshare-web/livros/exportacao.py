@@ -0,0 +1,23 @@
+from .models import Livro
+
+COLUNAS_LIVRO = (
+    'id',
+    'dono__username',
+    'isbn',
+    'titulo',
+    'autor',
+    'editora',
+    'ano_publicacao',
+    'modalidades_mask',
+    'valor_aluguel_semanal',
+    'prazo_emprestimo_dias',
+    'disponivel',
+    'criado_em',
+    'atualizado_em',
+)
+COLUNAS_LISTA_DESEJO = ('id', 'usuario__username', 'titulo', 'autor', 'isbn', 'criado_em')
+
+
+def transformar_livro(linha):
+    linha['modalidades'] = ','.join(Livro.modalidades_de(linha.pop('modalidades_mask')))
+    return linha
@@ -1,4 +1,6 @@
-from django.db.models import Q
+from collections import Counter
+
+from django.db.models import Count, Q
 import django_filters
 
 from .models import Livro
@@ -10,6 +12,8 @@ class LivroFiltro(django_filters.FilterSet):
         ('titulo', 'Título A-Z'),
         ('cidade', 'Cidade'),
     )
+    CAMPOS_FACETADOS = ('modalidade', 'cidade')
+    LIMITE_FACETAS_CIDADE = 20
 
     q = django_filters.CharFilter(method='filtrar_q')
     modalidade = django_filters.ChoiceFilter(
@@ -39,7 +43,7 @@ class LivroFiltro(django_filters.FilterSet):
     def filtrar_modalidade(self, queryset, name, value):
         if not value:
             return queryset
-        return queryset.filter(modalidades__contains=[value])
+        return queryset.com_modalidade(value)
 
     def ordenar(self, queryset, name, value):
         if value == 'titulo':
@@ -48,3 +52,32 @@ class LivroFiltro(django_filters.FilterSet):
             return queryset.order_by('dono__cidade', '-criado_em')
         return queryset.order_by('-criado_em')
 
+    def facetas(self):
+        dados = self.data.copy()
+        for campo in self.CAMPOS_FACETADOS:
+            dados.pop(campo, None)
+        base = type(self)(dados, queryset=self.queryset, request=self.request).qs
+        linhas = (
+            base.order_by()
+            .values_list('modalidades_mask', 'dono__cidade')
+            .annotate(total=Count('id'))
+        )
+        bit_modalidade = Livro.MODALIDADES_BITS.get(self.data.get('modalidade'))
+        termo_cidade = (self.data.get('cidade') or '').strip().lower()
+        modalidades = {valor: 0 for valor in Livro.Modalidades.values}
+        cidades = Counter()
+        for mascara, cidade, total in linhas:
+            cidade = cidade or ''
+            if not termo_cidade or termo_cidade in cidade.lower():
+                for modalidade in Livro.modalidades_de(mascara):
+                    modalidades[modalidade] += total
+            if not bit_modalidade or mascara & bit_modalidade:
+                cidades[cidade] += total
+        cidades_ordenadas = sorted(cidades.items(), key=lambda item: (-item[1], item[0]))
+        return {
+            'modalidades': modalidades,
+            'cidades': [
+                {'cidade': cidade, 'total': total}
+                for cidade, total in cidades_ordenadas[: self.LIMITE_FACETAS_CIDADE]
+            ],
+        }
@@ -3,13 +3,27 @@ from django import forms
 from .models import ListaDesejo, Livro
 
 
-class LivroForm(forms.ModelForm):
+class ModalidadesFormMixin(forms.Form):
     modalidades = forms.MultipleChoiceField(
         label='Modalidades disponíveis',
         choices=Livro.Modalidades.choices,
         widget=forms.CheckboxSelectMultiple,
     )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance and self.instance.pk:
+            self.fields['modalidades'].initial = self.instance.modalidades
+
+    def clean_modalidades(self):
+        modalidades = self.cleaned_data.get('modalidades') or []
+        if not modalidades:
+            raise forms.ValidationError('Selecione ao menos uma modalidade.')
+        self.instance.modalidades = modalidades
+        return modalidades
+
+
+class LivroForm(ModalidadesFormMixin, forms.ModelForm):
     class Meta:
         model = Livro
         fields = (
@@ -31,8 +45,6 @@ class LivroForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        if self.instance and self.instance.pk:
-            self.fields['modalidades'].initial = self.instance.modalidades
         for nome, campo in self.fields.items():
             widget = campo.widget
             input_type = getattr(widget, 'input_type', None)
@@ -42,11 +54,11 @@ class LivroForm(forms.ModelForm):
                 classes = widget.attrs.get('class', '')
                 widget.attrs['class'] = f'{classes} form-control'.strip()
 
-    def clean_modalidades(self):
-        modalidades = self.cleaned_data.get('modalidades') or []
-        if not modalidades:
-            raise forms.ValidationError('Selecione ao menos uma modalidade.')
-        return modalidades
+
+class LivroAdminForm(ModalidadesFormMixin, forms.ModelForm):
+    class Meta:
+        model = Livro
+        fields = '__all__'
 
 
 class ListaDesejoForm(forms.ModelForm):
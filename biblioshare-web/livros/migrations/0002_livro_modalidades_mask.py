@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:07
+
+from django.db import migrations, models
+
+MODALIDADES_BITS = {
+    'DOACAO': 1,
+    'EMPRESTIMO': 2,
+    'ALUGUEL': 4,
+    'TROCA': 8,
+}
+
+
+def preencher_mascaras(apps, schema_editor):
+    Livro = apps.get_model('livros', 'Livro')
+    pendentes = []
+    for livro in Livro.objects.only('id', 'modalidades').iterator(chunk_size=1000):
+        mascara = 0
+        for modalidade in livro.modalidades or []:
+            mascara |= MODALIDADES_BITS.get(modalidade, 0)
+        livro.modalidades_mask = mascara
+        pendentes.append(livro)
+        if len(pendentes) >= 1000:
+            Livro.objects.bulk_update(pendentes, ['modalidades_mask'])
+            pendentes = []
+    if pendentes:
+        Livro.objects.bulk_update(pendentes, ['modalidades_mask'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livros', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='livro',
+            name='modalidades_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='máscara de modalidades'),
+        ),
+        migrations.RunPython(preencher_mascaras, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+MODALIDADES_BITS = {
+    'DOACAO': 1,
+    'EMPRESTIMO': 2,
+    'ALUGUEL': 4,
+    'TROCA': 8,
+}
+
+
+def sincronizar_mascaras(apps, schema_editor):
+    Livro = apps.get_model('livros', 'Livro')
+    pendentes = []
+    for livro in Livro.objects.only('id', 'modalidades', 'modalidades_mask').iterator(chunk_size=1000):
+        mascara = 0
+        for modalidade in livro.modalidades or []:
+            mascara |= MODALIDADES_BITS.get(modalidade, 0)
+        if mascara != livro.modalidades_mask:
+            livro.modalidades_mask = mascara
+            pendentes.append(livro)
+    Livro.objects.bulk_update(pendentes, ['modalidades_mask'], batch_size=1000)
+
+
+def restaurar_modalidades(apps, schema_editor):
+    Livro = apps.get_model('livros', 'Livro')
+    pendentes = []
+    for livro in Livro.objects.only('id', 'modalidades_mask').iterator(chunk_size=1000):
+        livro.modalidades = [
+            modalidade for modalidade, bit in MODALIDADES_BITS.items() if livro.modalidades_mask & bit
+        ]
+        pendentes.append(livro)
+    Livro.objects.bulk_update(pendentes, ['modalidades'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livros', '0002_livro_modalidades_mask'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(sincronizar_mascaras, restaurar_modalidades),
+        migrations.RemoveField(
+            model_name='livro',
+            name='modalidades',
+        ),
+        migrations.AddIndex(
+            model_name='livro',
+            index=models.Index(fields=['disponivel', 'modalidades_mask', '-criado_em'], name='livros_disp_modal_criado_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livros', '0003_livro_remove_modalidades_json'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listadesejo',
+            index=models.Index(fields=['usuario', '-criado_em'], name='livros_desejo_usuario_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='livro',
+            index=models.Index(condition=models.Q(('disponivel', True)), fields=['-criado_em'], name='livros_disponiveis_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='livro',
+            index=models.Index(fields=['dono', '-criado_em'], name='livros_dono_criado_idx'),
+        ),
+    ]
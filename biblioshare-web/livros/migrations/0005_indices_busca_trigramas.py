@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Os índices acompanham a expressão que o Django gera para icontains no PostgreSQL
+# (UPPER(coluna::text) LIKE UPPER(...)), usada tanto pela busca pública quanto pelo admin.
+INDICES = (
+    ('livros_titulo_trgm_idx', 'titulo'),
+    ('livros_autor_trgm_idx', 'autor'),
+)
+
+
+def criar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    tabela = apps.get_model('livros', 'Livro')._meta.db_table
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for nome, coluna in INDICES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {nome} ON {tabela} USING gin (UPPER({coluna}::text) gin_trgm_ops)'
+        )
+
+
+def remover_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nome, _ in INDICES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nome}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livros', '0004_indices_consultas_frequentes'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indices, remover_indices),
+    ]
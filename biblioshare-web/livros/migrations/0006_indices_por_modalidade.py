@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:43
+
+import livros.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livros', '0005_indices_busca_trigramas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='livro',
+            name='livros_disp_modal_criado_idx',
+        ),
+        migrations.AddIndex(
+            model_name='livro',
+            index=models.Index(livros.models.BitDaMascara('modalidades_mask', 1), models.OrderBy(models.F('criado_em'), descending=True), condition=models.Q(('disponivel', True)), name='livros_disp_doacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='livro',
+            index=models.Index(livros.models.BitDaMascara('modalidades_mask', 2), models.OrderBy(models.F('criado_em'), descending=True), condition=models.Q(('disponivel', True)), name='livros_disp_emprestimo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='livro',
+            index=models.Index(livros.models.BitDaMascara('modalidades_mask', 4), models.OrderBy(models.F('criado_em'), descending=True), condition=models.Q(('disponivel', True)), name='livros_disp_aluguel_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='livro',
+            index=models.Index(livros.models.BitDaMascara('modalidades_mask', 8), models.OrderBy(models.F('criado_em'), descending=True), condition=models.Q(('disponivel', True)), name='livros_disp_troca_idx'),
+        ),
+    ]
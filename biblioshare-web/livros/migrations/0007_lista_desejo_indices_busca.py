@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:48
+
+from django.db import migrations, models
+
+# Título e autor da lista de desejos entram na busca do admin com a mesma expressão de
+# 0005_indices_busca_trigramas.
+INDICES = (
+    ('livros_desejo_titulo_trgm_idx', 'titulo'),
+    ('livros_desejo_autor_trgm_idx', 'autor'),
+)
+
+
+def criar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    tabela = apps.get_model('livros', 'ListaDesejo')._meta.db_table
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for nome, coluna in INDICES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {nome} ON {tabela} USING gin (UPPER({coluna}::text) gin_trgm_ops)'
+        )
+
+
+def remover_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nome, _ in INDICES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nome}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livros', '0006_indices_por_modalidade'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='listadesejo',
+            name='isbn',
+            field=models.CharField(blank=True, db_index=True, max_length=20, verbose_name='ISBN desejado'),
+        ),
+        migrations.RunPython(criar_indices, remover_indices),
+    ]
@@ -1,9 +1,37 @@
+from django.apps import apps
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 
+class BitDaMascara(models.Func):
+    # O bit vai literal no SQL, e não como parâmetro: só assim a expressão da consulta é a mesma dos
+    # índices por modalidade e o planejador os usa.
+    template = '(%(expressions)s & %(bit)d)'
+    output_field = models.PositiveSmallIntegerField()
+
+    def __init__(self, expressao, bit: int, **extra):
+        super().__init__(expressao, bit=int(bit), **extra)
+
+
+def _indice_disponiveis_com(nome: str, bit: int) -> models.Index:
+    return models.Index(
+        BitDaMascara('modalidades_mask', bit),
+        models.F('criado_em').desc(),
+        condition=models.Q(disponivel=True),
+        name=f'livros_disp_{nome}_idx',
+    )
+
+
+class LivroQuerySet(models.QuerySet):
+    def com_modalidade(self, modalidade: str):
+        bit = Livro.MODALIDADES_BITS.get(modalidade)
+        if not bit:
+            return self.none()
+        return self.alias(bit_modalidade=BitDaMascara('modalidades_mask', bit)).filter(bit_modalidade=bit)
+
+
 class Livro(models.Model):
     class Modalidades(models.TextChoices):
         DOACAO = 'DOACAO', 'Doação'
@@ -11,6 +39,13 @@ class Livro(models.Model):
         ALUGUEL = 'ALUGUEL', 'Aluguel'
         TROCA = 'TROCA', 'Troca'
 
+    MODALIDADES_BITS = {
+        Modalidades.DOACAO: 1,
+        Modalidades.EMPRESTIMO: 2,
+        Modalidades.ALUGUEL: 4,
+        Modalidades.TROCA: 8,
+    }
+
     dono = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -29,7 +64,11 @@ class Livro(models.Model):
     ano_publicacao = models.CharField('ano de publicação', max_length=4, blank=True)
     capa_url = models.URLField('URL da capa', blank=True)
     sinopse = models.TextField('sinopse', blank=True)
-    modalidades = models.JSONField('modalidades', default=list)
+    modalidades_mask = models.PositiveSmallIntegerField(
+        'máscara de modalidades',
+        default=0,
+        editable=False,
+    )
     valor_aluguel_semanal = models.DecimalField(
         'valor semanal do aluguel',
         max_digits=8,
@@ -46,17 +85,69 @@ class Livro(models.Model):
     criado_em = models.DateTimeField('criado em', auto_now_add=True)
     atualizado_em = models.DateTimeField('atualizado em', auto_now=True)
 
+    objects = LivroQuerySet.as_manager()
+
     class Meta:
         ordering = ('-criado_em',)
         verbose_name = 'Livro'
         verbose_name_plural = 'Livros'
+        indexes = [
+            # Um índice por modalidade: disponíveis com aquele bit, dos mais recentes para os antigos.
+            *(
+                _indice_disponiveis_com(nome, bit)
+                for nome, bit in (('doacao', 1), ('emprestimo', 2), ('aluguel', 4), ('troca', 8))
+            ),
+            models.Index(
+                fields=('-criado_em',),
+                condition=models.Q(disponivel=True),
+                name='livros_disponiveis_idx',
+            ),
+            models.Index(fields=('dono', '-criado_em'), name='livros_dono_criado_idx'),
+        ]
 
     def __str__(self) -> str:
         return f'{self.titulo} ({self.dono.get_full_name() or self.dono.username})'
 
+    @property
+    def modalidades(self) -> list[str]:
+        return self.modalidades_de(self.modalidades_mask)
+
+    @modalidades.setter
+    def modalidades(self, valor) -> None:
+        self._modalidades_informadas = valor
+        self.modalidades_mask = self.mascara_de(valor)
+
+    def oferece(self, modalidade: str) -> bool:
+        return bool(self.modalidades_mask & self.MODALIDADES_BITS.get(modalidade, 0))
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'modalidades' in update_fields:
+            kwargs['update_fields'] = {
+                'modalidades_mask' if campo == 'modalidades' else campo for campo in update_fields
+            }
+        criando = self._state.adding
+        super().save(*args, **kwargs)
+        if not criando and (update_fields is None or {'titulo', 'autor'} & set(update_fields)):
+            # transacoes depende de livros; o caminho de volta passa pelo registro de apps.
+            apps.get_model('transacoes', 'TransacaoParticipante').objects.sincronizar_livro(self)
+
+    @classmethod
+    def mascara_de(cls, modalidades) -> int:
+        if not isinstance(modalidades, (list, tuple, set)):
+            return 0
+        mascara = 0
+        for modalidade in modalidades:
+            mascara |= cls.MODALIDADES_BITS.get(modalidade, 0)
+        return mascara
+
+    @classmethod
+    def modalidades_de(cls, mascara: int) -> list[str]:
+        return [modalidade.value for modalidade, bit in cls.MODALIDADES_BITS.items() if mascara & bit]
+
     def clean(self):
         super().clean()
-        modalidades = self.modalidades or []
+        modalidades = self.__dict__.get('_modalidades_informadas', self.modalidades) or []
         if not isinstance(modalidades, list):
             raise ValidationError({'modalidades': _('Formato inválido para modalidades.')})
         modalidades_invalidas = [
@@ -85,13 +176,16 @@ class ListaDesejo(models.Model):
     )
     titulo = models.CharField('título desejado', max_length=255, blank=True)
     autor = models.CharField('autor desejado', max_length=255, blank=True)
-    isbn = models.CharField('ISBN desejado', max_length=20, blank=True)
+    isbn = models.CharField('ISBN desejado', max_length=20, blank=True, db_index=True)
     criado_em = models.DateTimeField('criado em', auto_now_add=True)
 
     class Meta:
         ordering = ('-criado_em',)
         verbose_name = 'Item da lista de desejos'
         verbose_name_plural = 'Lista de desejos'
+        indexes = [
+            models.Index(fields=('usuario', '-criado_em'), name='livros_desejo_usuario_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.titulo or self.autor or self.isbn or f'Lista de {self.usuario}'
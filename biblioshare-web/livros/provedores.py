@@ -0,0 +1,375 @@
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from biblioshare_core.cliente_http import cliente_http
+from biblioshare_core.resiliencia import ABERTO, BaldeTokens, Circuito
+
+from .models import Livro
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_LIVRO = ('titulo', 'autor', 'editora', 'ano_publicacao', 'capa_url', 'sinopse')
+DIRETORIO_GRAVACOES = Path(__file__).resolve().parent / 'fixtures' / 'provedores'
+
+ENCONTRADO = 'encontrado'
+AUSENTE = 'ausente'
+FALHA = 'falha'
+
+
+class ProvedorIndisponivel(Exception):
+    pass
+
+
+class EstatisticasProvedor:
+    PESO_RECENTE = 0.2
+
+    def __init__(self, latencia_inicial: float):
+        self._trava = threading.Lock()
+        self.latencia = latencia_inicial
+        self.tentativas = 0
+        self.encontrados = 0
+        self.falhas = 0
+
+    def registrar(self, duracao: float, resultado: Optional[str]) -> None:
+        with self._trava:
+            self.latencia += self.PESO_RECENTE * (duracao - self.latencia)
+            if resultado is None:
+                return
+            self.tentativas += 1
+            if resultado == ENCONTRADO:
+                self.encontrados += 1
+            elif resultado == FALHA:
+                self.falhas += 1
+
+    @property
+    def custo(self) -> float:
+        # Latência esperada dividida pela chance de trazer dados (com suavização de Laplace).
+        with self._trava:
+            utilidade = (self.encontrados + 1) / (self.tentativas + 2)
+            return self.latencia / utilidade
+
+    def como_dict(self) -> Dict[str, Any]:
+        with self._trava:
+            return {
+                'latencia_ms': round(self.latencia * 1000, 2),
+                'tentativas': self.tentativas,
+                'encontrados': self.encontrados,
+                'falhas': self.falhas,
+            }
+
+
+class ProvedorIsbn:
+    nome = ''
+    rotulo = ''
+    latencia_inicial = 0.5
+    autoritativo = True
+
+    def __init__(self, circuito: Optional[Circuito] = None, cota: Optional[BaldeTokens] = None):
+        self.circuito = circuito
+        self.cota = cota
+        self.estatisticas = EstatisticasProvedor(self.latencia_inicial)
+
+    async def buscar(self, isbn: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def liberar(self) -> bool:
+        if self.circuito is not None and not self.circuito.permitir():
+            return False
+        if self.cota is not None and not self.cota.consumir():
+            logger.warning('Cota de consultas do provedor %s esgotada.', self.nome)
+            return False
+        return True
+
+    def registrar_resultado(self, falhou: bool) -> None:
+        if self.circuito is None:
+            return
+        if falhou:
+            self.circuito.registrar_falha()
+        else:
+            self.circuito.registrar_sucesso()
+
+
+class GoogleBooks(ProvedorIsbn):
+    nome = 'google_books'
+    rotulo = 'Google Books'
+    latencia_inicial = 0.3
+    ENDPOINT = 'https://www.googleapis.com/books/v1/volumes'
+
+    def __init__(self, endpoint: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.endpoint = endpoint or self.ENDPOINT
+
+    async def buscar(self, isbn: str) -> Optional[Dict[str, Any]]:
+        params = {
+            'q': f'isbn:{isbn}',
+            'maxResults': 1,
+        }
+
+        api_key = getattr(settings, 'GOOGLE_BOOKS_API_KEY', None)
+        if api_key:
+            params['key'] = api_key
+
+        resposta = await cliente_http.get(self.endpoint, params=params)
+        _verificar_status(self, resposta, isbn)
+        if resposta.status_code >= 400:
+            return None
+        return self.converter(isbn, resposta.json())
+
+    @staticmethod
+    def converter(isbn: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        itens = payload.get('items')
+        if not itens:
+            return None
+
+        volume_info = itens[0].get('volumeInfo', {})
+        return {
+            'isbn': isbn,
+            'titulo': volume_info.get('title', '').strip(),
+            'autor': ', '.join(volume_info.get('authors', [])),
+            'editora': volume_info.get('publisher', '').strip(),
+            'ano_publicacao': (volume_info.get('publishedDate') or '')[:4],
+            'capa_url': _primeira_capa(
+                volume_info.get('imageLinks', {}),
+                ('large', 'medium', 'thumbnail', 'smallThumbnail'),
+            ),
+            'sinopse': volume_info.get('description', '').strip(),
+        }
+
+
+class OpenLibrary(ProvedorIsbn):
+    nome = 'open_library'
+    rotulo = 'Open Library'
+    latencia_inicial = 0.5
+    ENDPOINT = 'https://openlibrary.org/api/books'
+
+    def __init__(self, endpoint: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.endpoint = endpoint or self.ENDPOINT
+
+    async def buscar(self, isbn: str) -> Optional[Dict[str, Any]]:
+        params = {'bibkeys': f'ISBN:{isbn}', 'format': 'json', 'jscmd': 'data'}
+        resposta = await cliente_http.get(self.endpoint, params=params)
+        _verificar_status(self, resposta, isbn)
+        if resposta.status_code >= 400:
+            return None
+        return self.converter(isbn, resposta.json())
+
+    @staticmethod
+    def converter(isbn: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        dados = payload.get(f'ISBN:{isbn}')
+        if not dados:
+            return None
+        ano = re.search(r'\d{4}', dados.get('publish_date') or '')
+        trechos = dados.get('excerpts') or []
+        return {
+            'isbn': isbn,
+            'titulo': (dados.get('title') or '').strip(),
+            'autor': ', '.join(autor.get('name', '') for autor in dados.get('authors', [])),
+            'editora': ', '.join(editora.get('name', '') for editora in dados.get('publishers', [])),
+            'ano_publicacao': ano.group(0) if ano else '',
+            'capa_url': _primeira_capa(dados.get('cover', {}), ('large', 'medium', 'small')),
+            'sinopse': (trechos[0].get('text') or '').strip() if trechos else '',
+        }
+
+
+class CatalogoLocal(ProvedorIsbn):
+    nome = 'catalogo'
+    rotulo = 'catálogo do BiblioShare'
+    latencia_inicial = 0.01
+    autoritativo = False
+
+    async def buscar(self, isbn: str) -> Optional[Dict[str, Any]]:
+        return await sync_to_async(self.buscar_sincrono)(isbn)
+
+    @staticmethod
+    def buscar_sincrono(isbn: str) -> Optional[Dict[str, Any]]:
+        dados = (
+            Livro.objects.filter(isbn=isbn)
+            .exclude(titulo='')
+            .order_by('-atualizado_em')
+            .values(*CAMPOS_LIVRO)
+            .first()
+        )
+        if dados is None:
+            return None
+        return {'isbn': isbn, **dados}
+
+
+class ProvedorGravado(ProvedorIsbn):
+    # Provedor para testes: responde a partir de gravações (dados já convertidos por ISBN),
+    # com latência e falha configuráveis.
+
+    def __init__(
+        self,
+        nome: str,
+        respostas: Optional[Dict[str, Optional[Dict[str, Any]]]] = None,
+        latencia: float = 0.0,
+        erro: Optional[Exception] = None,
+        autoritativo: bool = True,
+        **kwargs,
+    ):
+        self.nome = nome
+        self.rotulo = nome
+        self.latencia_inicial = latencia or 0.01
+        self.autoritativo = autoritativo
+        super().__init__(**kwargs)
+        self.respostas = respostas or {}
+        self.latencia = latencia
+        self.erro = erro
+        self.chamadas: List[str] = []
+        self.canceladas = 0
+
+    @classmethod
+    def de_gravacao(cls, nome: str, arquivo: str, **kwargs) -> 'ProvedorGravado':
+        conteudo = json.loads((DIRETORIO_GRAVACOES / arquivo).read_text(encoding='utf-8'))
+        conversor = PROVEDORES_DISPONIVEIS[conteudo['provedor']].converter
+        respostas = {isbn: conversor(isbn, payload) for isbn, payload in conteudo['respostas'].items()}
+        return cls(nome, respostas, **kwargs)
+
+    async def buscar(self, isbn: str) -> Optional[Dict[str, Any]]:
+        self.chamadas.append(isbn)
+        try:
+            if self.latencia:
+                await asyncio.sleep(self.latencia)
+        except asyncio.CancelledError:
+            self.canceladas += 1
+            raise
+        if self.erro is not None:
+            raise self.erro
+        return self.respostas.get(isbn)
+
+
+PROVEDORES_DISPONIVEIS = {
+    GoogleBooks.nome: GoogleBooks,
+    OpenLibrary.nome: OpenLibrary,
+    CatalogoLocal.nome: CatalogoLocal,
+}
+
+
+def criar_provedores(nomes: Iterable[str]) -> List[ProvedorIsbn]:
+    provedores = []
+    for nome in nomes:
+        classe = PROVEDORES_DISPONIVEIS[nome]
+        if classe is CatalogoLocal:
+            provedores.append(classe())
+            continue
+        circuito = Circuito(
+            nome,
+            limite_falhas=settings.ISBN_CIRCUITO_FALHAS,
+            espera=settings.ISBN_CIRCUITO_ESPERA_SEGUNDOS,
+        )
+        cota = None
+        if nome == GoogleBooks.nome:
+            cota = BaldeTokens(
+                nome,
+                capacidade=settings.ISBN_COTA_CAPACIDADE,
+                taxa_por_segundo=settings.ISBN_COTA_POR_SEGUNDO,
+            )
+        provedores.append(classe(circuito=circuito, cota=cota))
+    return provedores
+
+
+async def resolver(
+    isbn: str,
+    provedores: List[ProvedorIsbn],
+    atraso_maximo: Optional[float] = None,
+) -> Optional[Dict[str, Any]]:
+    # Do provedor mais barato ao mais caro: o próximo é disparado quando o atual falha, não encontra
+    # o ISBN ou demora mais que o dobro da sua latência habitual. A primeira resposta com dados vence.
+    atraso_maximo = settings.ISBN_HEDGE_SEGUNDOS if atraso_maximo is None else atraso_maximo
+    fila = sorted(provedores, key=lambda provedor: provedor.estatisticas.custo)
+    pendentes: Dict[asyncio.Task, ProvedorIsbn] = {}
+    respondeu = False
+
+    def disparar() -> Optional[ProvedorIsbn]:
+        if not fila:
+            return None
+        provedor = fila.pop(0)
+        pendentes[asyncio.create_task(_consultar(provedor, isbn))] = provedor
+        return provedor
+
+    ultimo = disparar()
+    try:
+        while pendentes:
+            atraso = min(atraso_maximo, 2 * ultimo.estatisticas.latencia) if fila else None
+            concluidas, _ = await asyncio.wait(pendentes, timeout=atraso, return_when=asyncio.FIRST_COMPLETED)
+            if not concluidas:
+                ultimo = disparar() or ultimo
+                continue
+            for tarefa in concluidas:
+                pendente = pendentes.pop(tarefa)
+                try:
+                    dados = tarefa.result()
+                except ProvedorIndisponivel:
+                    continue
+                respondeu = respondeu or pendente.autoritativo
+                if dados:
+                    return dados
+            ultimo = disparar() or ultimo
+    finally:
+        for tarefa in pendentes:
+            tarefa.cancel()
+        if pendentes:
+            await asyncio.gather(*pendentes, return_exceptions=True)
+    if not respondeu:
+        raise ProvedorIndisponivel('Nenhum provedor de ISBN respondeu.')
+    return None
+
+
+def estatisticas(provedores: Iterable[ProvedorIsbn]) -> Dict[str, Dict[str, Any]]:
+    resumo = {}
+    for provedor in provedores:
+        dados = provedor.estatisticas.como_dict()
+        dados['circuito'] = provedor.circuito.estado() if provedor.circuito else None
+        resumo[provedor.nome] = dados
+    return resumo
+
+
+def circuitos_abertos(provedores: Iterable[ProvedorIsbn]) -> List[str]:
+    return [provedor.nome for provedor in provedores if provedor.circuito and provedor.circuito.estado() == ABERTO]
+
+
+async def _consultar(provedor: ProvedorIsbn, isbn: str) -> Optional[Dict[str, Any]]:
+    if not await sync_to_async(provedor.liberar)():
+        raise ProvedorIndisponivel(f'Provedor {provedor.nome} indisponível no momento.')
+    inicio = time.perf_counter()
+    try:
+        dados = await provedor.buscar(isbn)
+    except asyncio.CancelledError:
+        provedor.estatisticas.registrar(time.perf_counter() - inicio, None)
+        raise
+    except Exception as erro:
+        provedor.estatisticas.registrar(time.perf_counter() - inicio, FALHA)
+        logger.warning('Falha ao consultar %s para ISBN %s: %s', provedor.rotulo, isbn, erro)
+        await sync_to_async(provedor.registrar_resultado)(True)
+        raise ProvedorIndisponivel(str(erro)) from erro
+    provedor.estatisticas.registrar(time.perf_counter() - inicio, ENCONTRADO if dados else AUSENTE)
+    await sync_to_async(provedor.registrar_resultado)(False)
+    if dados:
+        return {**dados, 'fonte': provedor.nome}
+    return dados
+
+
+def _verificar_status(provedor: ProvedorIsbn, resposta, isbn: str) -> None:
+    if resposta.status_code == 429 or resposta.status_code >= 500:
+        raise ProvedorIndisponivel(f'{provedor.rotulo} respondeu {resposta.status_code}.')
+    if resposta.status_code >= 400:
+        logger.warning('%s recusou a consulta do ISBN %s: %s', provedor.rotulo, isbn, resposta.status_code)
+
+
+def _primeira_capa(links: Dict[str, Any], tamanhos) -> str:
+    if not links:
+        return ''
+    for tamanho in tamanhos:
+        if links.get(tamanho):
+            return links[tamanho]
+    return ''
@@ -2,10 +2,17 @@ from typing import List
 
 from rest_framework import serializers
 
+from biblioshare_core.serializacao import (
+    CampoRapido,
+    CamposSelecionaveisMixin,
+    ListaRapidaSerializer,
+    nome_exibicao,
+)
+
 from .models import ListaDesejo, Livro
 
 
-class LivroSerializer(serializers.ModelSerializer):
+class LivroSerializer(CamposSelecionaveisMixin, serializers.ModelSerializer):
     modalidades = serializers.ListField(
         child=serializers.ChoiceField(choices=Livro.Modalidades.choices),
         allow_empty=False,
@@ -20,8 +27,30 @@ class LivroSerializer(serializers.ModelSerializer):
         read_only=True,
     )
 
+    campos_rapidos = {
+        'dono_nome': nome_exibicao('dono'),
+        'modalidades': CampoRapido(
+            ('modalidades_mask',),
+            lambda linha, contexto: Livro.modalidades_de(linha['modalidades_mask']),
+        ),
+    }
+    perfis_campos = {
+        'cartao': (
+            'id',
+            'dono',
+            'dono_cidade',
+            'dono_estado',
+            'titulo',
+            'autor',
+            'capa_url',
+            'modalidades',
+            'disponivel',
+        ),
+    }
+
     class Meta:
         model = Livro
+        list_serializer_class = ListaRapidaSerializer
         fields = (
             'id',
             'dono',
@@ -74,9 +103,12 @@ class LivroSerializer(serializers.ModelSerializer):
         return obj.dono.get_full_name() or obj.dono.username
 
 
-class ListaDesejoSerializer(serializers.ModelSerializer):
+class ListaDesejoSerializer(CamposSelecionaveisMixin, serializers.ModelSerializer):
+    perfis_campos = {'cartao': ('id', 'titulo', 'autor')}
+
     class Meta:
         model = ListaDesejo
+        list_serializer_class = ListaRapidaSerializer
         fields = ('id', 'usuario', 'titulo', 'autor', 'isbn', 'criado_em')
         read_only_fields = ('id', 'usuario', 'criado_em')
 
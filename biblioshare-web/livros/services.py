@@ -1,53 +1,95 @@
+import asyncio
 import logging
 import re
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
-import requests
+from asgiref.sync import async_to_sync, sync_to_async
 from django.conf import settings
+from django.core.cache import cache
+
+from biblioshare_core.cliente_http import tempo_restante
+from biblioshare_core.resiliencia import VooUnico
+
+from .provedores import ProvedorIndisponivel, ProvedorIsbn, criar_provedores, resolver
 
 logger = logging.getLogger(__name__)
 
-GOOGLE_BOOKS_ENDPOINT = 'https://www.googleapis.com/books/v1/volumes'
+voo_isbn = VooUnico()
+_provedores: Optional[List[ProvedorIsbn]] = None
+
+
+class IsbnIndisponivel(Exception):
+    def __init__(self, mensagem: str, tentar_em: float = 0.0):
+        super().__init__(mensagem)
+        self.tentar_em = tentar_em
+
+
+def provedores_isbn() -> List[ProvedorIsbn]:
+    global _provedores
+    if _provedores is None:
+        _provedores = criar_provedores(settings.ISBN_PROVEDORES)
+    return _provedores
 
 
 def buscar_livro_por_isbn(isbn: str) -> Optional[Dict[str, Any]]:
+    return async_to_sync(buscar_livro_por_isbn_async)(isbn)
+
+
+async def buscar_livro_por_isbn_async(isbn: str) -> Optional[Dict[str, Any]]:
     isbn_normalizado = normalizar_isbn(isbn)
     if not isbn_normalizado or not isbn_valido(isbn_normalizado):
         logger.debug('ISBN inválido informado para busca: %s', isbn)
         return None
 
-    params = {
-        'q': f'isbn:{isbn_normalizado}',
-        'maxResults': 1,
-    }
+    em_cache = await cache.aget(_chave_cache(isbn_normalizado))
+    if em_cache is not None:
+        return em_cache or None
+    return await voo_isbn.executar(isbn_normalizado, lambda: _buscar_remoto(isbn_normalizado))
 
-    api_key = getattr(settings, 'GOOGLE_BOOKS_API_KEY', None)
-    if api_key:
-        params['key'] = api_key
 
+async def _buscar_remoto(isbn: str) -> Optional[Dict[str, Any]]:
+    chave_voo = f'isbn:voo:{isbn}'
+    adquirido = await cache.aadd(chave_voo, 1, timeout=int(settings.ISBN_PRAZO_SEGUNDOS) + 1)
+    if not adquirido:
+        em_cache = await _aguardar_outro_worker(isbn)
+        if em_cache is not None:
+            return em_cache or None
     try:
-        resposta = requests.get(GOOGLE_BOOKS_ENDPOINT, params=params, timeout=5)
-        resposta.raise_for_status()
-    except requests.RequestException as erro:
-        logger.warning('Falha ao consultar Google Books para ISBN %s: %s', isbn_normalizado, erro)
-        return None
-
-    payload = resposta.json()
-    itens = payload.get('items')
-    if not itens:
-        return None
-
-    volume_info = itens[0].get('volumeInfo', {})
-    dados = {
-        'isbn': isbn_normalizado,
-        'titulo': volume_info.get('title', '').strip(),
-        'autor': ', '.join(volume_info.get('authors', [])),
-        'editora': volume_info.get('publisher', '').strip(),
-        'ano_publicacao': (volume_info.get('publishedDate') or '')[:4],
-        'capa_url': _extrair_capa(volume_info.get('imageLinks', {})),
-        'sinopse': volume_info.get('description', '').strip(),
-    }
-    return dados
+        provedores = provedores_isbn()
+        try:
+            dados = await resolver(isbn, provedores)
+        except ProvedorIndisponivel as erro:
+            tentar_em = await sync_to_async(_segundos_para_tentar)(provedores)
+            raise IsbnIndisponivel(str(erro), tentar_em=tentar_em) from erro
+        validade = settings.ISBN_CACHE_SEGUNDOS if dados else settings.ISBN_CACHE_NEGATIVO_SEGUNDOS
+        await cache.aset(_chave_cache(isbn), dados or {}, timeout=validade)
+        return dados
+    finally:
+        # Só quem gravou a chave a apaga: quem esperou em vão e consultou por conta própria não
+        # pode liberar o voo que o outro worker ainda está fazendo.
+        if adquirido:
+            await cache.adelete(chave_voo)
+
+
+async def _aguardar_outro_worker(isbn: str) -> Optional[Dict[str, Any]]:
+    restante = tempo_restante()
+    loop = asyncio.get_running_loop()
+    limite = loop.time() + (restante if restante is not None else settings.ISBN_PRAZO_SEGUNDOS)
+    while loop.time() < limite:
+        await asyncio.sleep(0.05)
+        em_cache = await cache.aget(_chave_cache(isbn))
+        if em_cache is not None:
+            return em_cache
+    return None
+
+
+def _segundos_para_tentar(provedores: List[ProvedorIsbn]) -> float:
+    esperas = [provedor.circuito.segundos_para_tentar() for provedor in provedores if provedor.circuito]
+    return min(esperas, default=0.0)
+
+
+def _chave_cache(isbn: str) -> str:
+    return f'isbn:dados:{isbn}'
 
 
 def normalizar_isbn(valor: str) -> str:
@@ -66,16 +108,3 @@ def isbn_valido(isbn: str) -> bool:
             return False
         return isbn[-1].isdigit() or isbn[-1].upper() == 'X'
     return False
-
-
-def _extrair_capa(image_links: Dict[str, Any]) -> str:
-    if not image_links:
-        return ''
-    return (
-        image_links.get('large')
-        or image_links.get('medium')
-        or image_links.get('thumbnail')
-        or image_links.get('smallThumbnail')
-        or ''
-    )
-
@@ -1,12 +1,14 @@
 from django.urls import path
 
 from .views import (
+    ListaDesejosExportarAPIView,
     LivroBuscaAPIView,
     LivroOfertaAPIView,
     ListaDesejoDestroyAPIView,
     ListaDesejosListCreateAPIView,
     LivroBuscarIsbnAPIView,
     LivroDetalheAPIView,
+    LivrosExportarAPIView,
     MeusLivrosListCreateAPIView,
 )
 
@@ -15,10 +17,12 @@ app_name = 'livros_api'
 urlpatterns = [
     path('livros/', MeusLivrosListCreateAPIView.as_view(), name='livros-lista'),
     path('livros/buscar/', LivroBuscaAPIView.as_view(), name='livros-busca'),
+    path('livros/exportar/', LivrosExportarAPIView.as_view(), name='livros-exportar'),
     path('livros/buscar-isbn/', LivroBuscarIsbnAPIView.as_view(), name='livros-buscar-isbn'),
     path('livros/oferta/<int:pk>/', LivroOfertaAPIView.as_view(), name='livros-oferta'),
     path('livros/<int:pk>/', LivroDetalheAPIView.as_view(), name='livros-detalhe'),
     path('lista-desejos/', ListaDesejosListCreateAPIView.as_view(), name='lista-desejos-lista'),
+    path('lista-desejos/exportar/', ListaDesejosExportarAPIView.as_view(), name='lista-desejos-exportar'),
     path('lista-desejos/<int:pk>/', ListaDesejoDestroyAPIView.as_view(), name='lista-desejos-detalhe'),
 ]
 
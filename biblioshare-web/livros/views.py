@@ -1,25 +1,34 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.views import redirect_to_login
 from django.db.models import Case, IntegerField, Value, When
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.views.generic import CreateView, DetailView, FormView, ListView, TemplateView, UpdateView
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
-from rest_framework.views import APIView
+
+from biblioshare_core.cliente_http import prazo
+from biblioshare_core.exportacao import ExportacaoAPIView
+from biblioshare_core.serializacao import CamposEsparsosMixin
+from biblioshare_core.views import APIViewAssincrona
 
 from .filters import LivroFiltro
 from .forms import ListaDesejoForm, LivroForm
+from .exportacao import COLUNAS_LISTA_DESEJO, COLUNAS_LIVRO, transformar_livro
 from .models import ListaDesejo, Livro
+from .provedores import PROVEDORES_DISPONIVEIS
 from .serializers import (
     ListaDesejoSerializer,
     LivroBuscarIsbnSerializer,
     LivroSerializer,
 )
-from .services import buscar_livro_por_isbn, isbn_valido, normalizar_isbn
+from .services import IsbnIndisponivel, buscar_livro_por_isbn_async, isbn_valido, normalizar_isbn
 
 
-class MeusLivrosListCreateAPIView(generics.ListCreateAPIView):
+class MeusLivrosListCreateAPIView(CamposEsparsosMixin, generics.ListCreateAPIView):
     serializer_class = LivroSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -46,13 +55,21 @@ class LivroOfertaAPIView(generics.RetrieveAPIView):
         return Livro.objects.filter(disponivel=True).select_related('dono')
 
 
-class LivroBuscarIsbnAPIView(APIView):
+class LivroBuscarIsbnAPIView(APIViewAssincrona):
     permission_classes = [permissions.IsAuthenticated]
 
-    def post(self, request):
+    async def post(self, request):
         serializer = LivroBuscarIsbnSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        dados = buscar_livro_por_isbn(serializer.validated_data['isbn'])
+        try:
+            with prazo(settings.ISBN_PRAZO_SEGUNDOS):
+                dados = await buscar_livro_por_isbn_async(serializer.validated_data['isbn'])
+        except IsbnIndisponivel as erro:
+            return Response(
+                {'detalhe': 'A busca por ISBN está indisponível no momento. Tente novamente em instantes.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(max(1, round(erro.tentar_em)))},
+            )
         if not dados:
             return Response(
                 {'detalhe': 'Não encontramos informações para este ISBN.'},
@@ -61,13 +78,20 @@ class LivroBuscarIsbnAPIView(APIView):
         return Response(dados, status=status.HTTP_200_OK)
 
 
-class LivroBuscaAPIView(generics.ListAPIView):
+class LivroBuscaAPIView(CamposEsparsosMixin, generics.ListAPIView):
     serializer_class = LivroSerializer
     permission_classes = [permissions.AllowAny]
     filterset_class = LivroFiltro
 
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get('facetas', '').lower() not in ('1', 'true', 'sim'):
+            return response
+        filtro = LivroFiltro(request.query_params, queryset=self.get_queryset(), request=request)
+        return Response({'resultados': response.data, 'facetas': filtro.facetas()})
+
     def get_queryset(self):
-        queryset = Livro.objects.filter(disponivel=True)
+        queryset = Livro.objects.filter(disponivel=True).select_related('dono')
         cidade = ''
         if self.request.user.is_authenticated:
             queryset = queryset.exclude(dono=self.request.user)
@@ -85,7 +109,7 @@ class LivroBuscaAPIView(generics.ListAPIView):
         return queryset.order_by('-criado_em')
 
 
-class ListaDesejosListCreateAPIView(generics.ListCreateAPIView):
+class ListaDesejosListCreateAPIView(CamposEsparsosMixin, generics.ListCreateAPIView):
     serializer_class = ListaDesejoSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -104,6 +128,31 @@ class ListaDesejoDestroyAPIView(generics.DestroyAPIView):
         return ListaDesejo.objects.filter(usuario=self.request.user)
 
 
+class LivrosExportarAPIView(ExportacaoAPIView):
+    colunas = COLUNAS_LIVRO
+    nome_arquivo = 'livros'
+
+    def get_queryset(self):
+        return Livro.objects.filter(dono=self.request.user)
+
+    def get_queryset_completo(self):
+        return Livro.objects.all()
+
+    def transformar(self, linha):
+        return transformar_livro(linha)
+
+
+class ListaDesejosExportarAPIView(ExportacaoAPIView):
+    colunas = COLUNAS_LISTA_DESEJO
+    nome_arquivo = 'lista-desejos'
+
+    def get_queryset(self):
+        return ListaDesejo.objects.filter(usuario=self.request.user)
+
+    def get_queryset_completo(self):
+        return ListaDesejo.objects.all()
+
+
 class MeusLivrosView(LoginRequiredMixin, ListView):
     template_name = 'livros/meus_livros.html'
     context_object_name = 'livros'
@@ -117,44 +166,66 @@ class MeusLivrosView(LoginRequiredMixin, ListView):
         return contexto
 
 
-class AdicionarLivroView(LoginRequiredMixin, CreateView):
+class AdicionarLivroView(CreateView):
     form_class = LivroForm
     template_name = 'livros/adicionar_livro.html'
     success_url = reverse_lazy('livros_web:meus-livros')
+    http_method_names = ['get', 'post', 'head', 'options']
 
-    def post(self, request, *args, **kwargs):
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        return await sync_to_async(super().get)(request, *args, **kwargs)
+
+    async def post(self, request, *args, **kwargs):
+        if 'acao_buscar_isbn' not in request.POST:
+            return await sync_to_async(super().post)(request, *args, **kwargs)
         self.object = None
-        if 'acao_buscar_isbn' in request.POST:
-            isbn_informado = (request.POST.get('isbn') or '').strip()
-            isbn = normalizar_isbn(isbn_informado)
-            if not isbn:
-                messages.error(request, 'Informe um ISBN para buscar.')
-                form = self.get_form()
-                return self.render_to_response(self.get_context_data(form=form))
-            if not isbn_valido(isbn):
-                messages.error(
-                    request,
-                    'Informe um ISBN válido com 10 ou 13 dígitos. Traços e espaços são aceitos.',
-                )
-                form = self.get_form()
-                return self.render_to_response(self.get_context_data(form=form))
-            dados = buscar_livro_por_isbn(isbn)
-            if not dados:
-                messages.warning(request, 'Não encontramos informações para este ISBN.')
-                form = self.get_form()
-                return self.render_to_response(self.get_context_data(form=form))
-            data = request.POST.copy()
-            for campo in ['titulo', 'autor', 'editora', 'ano_publicacao', 'capa_url', 'sinopse']:
-                valor = dados.get(campo)
-                if valor:
-                    data[campo] = valor
-            form = self.form_class(data=data)
-            messages.success(
+        isbn_informado = (request.POST.get('isbn') or '').strip()
+        isbn = normalizar_isbn(isbn_informado)
+        dados = None
+        if not isbn:
+            messages.error(request, 'Informe um ISBN para buscar.')
+        elif not isbn_valido(isbn):
+            messages.error(
                 request,
-                'Dados carregados do Google Books. Revise as informações antes de salvar.',
+                'Informe um ISBN válido com 10 ou 13 dígitos. Traços e espaços são aceitos.',
             )
-            return self.render_to_response(self.get_context_data(form=form))
-        return super().post(request, *args, **kwargs)
+        else:
+            try:
+                with prazo(settings.ISBN_PRAZO_SEGUNDOS):
+                    dados = await buscar_livro_por_isbn_async(isbn)
+            except IsbnIndisponivel:
+                messages.warning(
+                    request,
+                    'A busca por ISBN está indisponível no momento. '
+                    'Preencha os dados manualmente ou tente mais tarde.',
+                )
+            else:
+                if not dados:
+                    messages.warning(request, 'Não encontramos informações para este ISBN.')
+        return await sync_to_async(self.exibir_dados_isbn)(dados)
+
+    def exibir_dados_isbn(self, dados):
+        if not dados:
+            return self.render_to_response(self.get_context_data(form=self.get_form()))
+        data = self.request.POST.copy()
+        for campo in ['titulo', 'autor', 'editora', 'ano_publicacao', 'capa_url', 'sinopse']:
+            valor = dados.get(campo)
+            if valor:
+                data[campo] = valor
+        form = self.form_class(data=data)
+        provedor = PROVEDORES_DISPONIVEIS.get(dados.get('fonte'))
+        origem = f' do {provedor.rotulo}' if provedor else ''
+        messages.success(
+            self.request,
+            f'Dados carregados{origem}. Revise as informações antes de salvar.',
+        )
+        return self.render_to_response(self.get_context_data(form=form))
 
     def form_valid(self, form):
         form.instance.dono = self.request.user
@@ -228,8 +299,13 @@ class BuscarLivrosView(ListView):
         parametros = self.request.GET.copy()
         if 'page' in parametros:
             parametros.pop('page')
+        facetas = self.filtro.facetas()
         contexto['filtro'] = self.filtro
         contexto['modalidades_opcoes'] = Livro.Modalidades.choices
+        contexto['modalidades_facetas'] = [
+            (valor, label, facetas['modalidades'][valor]) for valor, label in Livro.Modalidades.choices
+        ]
+        contexto['cidades_facetas'] = facetas['cidades']
         contexto['ordenacoes'] = LivroFiltro.ORDENACOES
         contexto['parametros_sem_pagina'] = parametros.urlencode()
         return contexto
@@ -274,11 +350,10 @@ class OfertaLivroView(DetailView):
         contexto = super().get_context_data(**kwargs)
         livro: Livro = self.object
         usuario = self.request.user if self.request.user.is_authenticated else None
-        modalidades = livro.modalidades or []
         contexto['eh_dono'] = bool(usuario and livro.dono_id == usuario.id)
         contexto['modalidades_opcoes'] = Livro.Modalidades.choices
-        contexto['tem_doacao'] = Livro.Modalidades.DOACAO in modalidades
-        contexto['tem_emprestimo'] = Livro.Modalidades.EMPRESTIMO in modalidades
-        contexto['tem_aluguel'] = Livro.Modalidades.ALUGUEL in modalidades
-        contexto['tem_troca'] = Livro.Modalidades.TROCA in modalidades
+        contexto['tem_doacao'] = livro.oferece(Livro.Modalidades.DOACAO)
+        contexto['tem_emprestimo'] = livro.oferece(Livro.Modalidades.EMPRESTIMO)
+        contexto['tem_aluguel'] = livro.oferece(Livro.Modalidades.ALUGUEL)
+        contexto['tem_troca'] = livro.oferece(Livro.Modalidades.TROCA)
         return contexto
@@ -14,16 +14,6 @@
     });
   };
 
-  const extrairResultados = (payload) => {
-    if (Array.isArray(payload)) {
-      return payload;
-    }
-    if (payload && Array.isArray(payload.results)) {
-      return payload.results;
-    }
-    return [];
-  };
-
   const iniciarChat = (container) => {
     const mensagensContainer = container.querySelector('[data-chat-mensagens]');
     const placeholder = container.querySelector('[data-chat-placeholder]');
@@ -41,8 +31,13 @@
     const endpoint =
       container.dataset.chatEndpoint ||
       `/api/transacoes/${container.dataset.transacaoId}/mensagens/`;
+    const versaoEndpoint =
+      container.dataset.chatVersaoEndpoint || `${endpoint.replace(/\/$/, '')}/versao/`;
     const mensagens = [];
     let ultimoId = null;
+    let haAnteriores = false;
+    let carregandoAnteriores = false;
+    let versaoAtual = null;
     let intervalo = null;
 
     const atualizarStatus = (texto) => {
@@ -68,7 +63,33 @@
       mensagensContainer.scrollTop = mensagensContainer.scrollHeight;
     };
 
-    const renderizarMensagens = () => {
+    const buscarPagina = async (parametros = {}) => {
+      const url = new URL(endpoint, window.location.origin);
+      Object.entries(parametros).forEach(([nome, valor]) => url.searchParams.set(nome, valor));
+      const resposta = await fetch(url, {
+        headers: {
+          'X-Requested-With': 'XMLHttpRequest',
+        },
+        credentials: 'same-origin',
+      });
+      if (!resposta.ok) {
+        throw new Error('Falha ao carregar mensagens');
+      }
+      versaoAtual = resposta.headers.get('X-Chat-Versao') || versaoAtual;
+      return resposta.json();
+    };
+
+    const criarBotaoAnteriores = () => {
+      const botao = document.createElement('button');
+      botao.type = 'button';
+      botao.className = 'btn btn-link btn-sm w-100 mb-2';
+      botao.textContent = 'Carregar mensagens anteriores';
+      botao.disabled = carregandoAnteriores;
+      botao.addEventListener('click', () => carregarAnteriores());
+      return botao;
+    };
+
+    const renderizarMensagens = (rolar = true) => {
       mensagensContainer.replaceChildren();
       if (!mensagens.length) {
         if (placeholder) {
@@ -80,6 +101,9 @@
       if (placeholder) {
         placeholder.classList.add('d-none');
       }
+      if (haAnteriores) {
+        mensagensContainer.appendChild(criarBotaoAnteriores());
+      }
       mensagens.forEach((mensagem) => {
         const wrapper = document.createElement('div');
         wrapper.className = `d-flex mb-2 ${
@@ -102,16 +126,18 @@
         wrapper.appendChild(balao);
         mensagensContainer.appendChild(wrapper);
       });
-      rolarParaBase();
+      if (rolar) {
+        rolarParaBase();
+      }
     };
 
-    const registrarMensagens = (novas, substituir = false) => {
+    const registrarMensagens = (novas, substituir = false, rolar = true) => {
       if (substituir) {
         mensagens.length = 0;
       }
       if (!Array.isArray(novas) || !novas.length) {
         ultimoId = mensagens.length ? mensagens[mensagens.length - 1].id : null;
-        renderizarMensagens();
+        renderizarMensagens(rolar);
         return;
       }
       novas.forEach((mensagem) => {
@@ -121,29 +147,23 @@
       });
       mensagens.sort((a, b) => a.id - b.id);
       ultimoId = mensagens.length ? mensagens[mensagens.length - 1].id : null;
-      renderizarMensagens();
+      renderizarMensagens(rolar);
     };
 
     const carregarMensagens = async (incremental = false) => {
-      let url = endpoint;
-      if (incremental && ultimoId) {
-        const divisor = url.includes('?') ? '&' : '?';
-        url = `${url}${divisor}depois_de=${ultimoId}`;
-      }
       try {
         atualizarStatus('Sincronizando...');
-        const resposta = await fetch(url, {
-          headers: {
-            'X-Requested-With': 'XMLHttpRequest',
-          },
-          credentials: 'same-origin',
-        });
-        if (!resposta.ok) {
-          throw new Error('Falha ao carregar mensagens');
+        if (incremental && ultimoId) {
+          let payload;
+          do {
+            payload = await buscarPagina({ depois_de: ultimoId });
+            registrarMensagens(payload.results);
+          } while (payload.has_more && payload.results.length);
+        } else {
+          const payload = await buscarPagina();
+          haAnteriores = payload.has_more;
+          registrarMensagens(payload.results, true);
         }
-        const payload = await resposta.json();
-        const dados = extrairResultados(payload);
-        registrarMensagens(dados, !incremental);
         atualizarStatus(
           `Atualizado às ${new Date().toLocaleTimeString('pt-BR', {
             hour: '2-digit',
@@ -157,12 +177,54 @@
       }
     };
 
+    const carregarAnteriores = async () => {
+      if (!mensagens.length || carregandoAnteriores) {
+        return;
+      }
+      carregandoAnteriores = true;
+      const alturaAnterior = mensagensContainer.scrollHeight;
+      try {
+        const payload = await buscarPagina({ antes_de: mensagens[0].id });
+        haAnteriores = payload.has_more;
+        carregandoAnteriores = false;
+        registrarMensagens(payload.results, false, false);
+        mensagensContainer.scrollTop += mensagensContainer.scrollHeight - alturaAnterior;
+        mostrarErro('');
+      } catch (erro) {
+        carregandoAnteriores = false;
+        mostrarErro('Não foi possível carregar as mensagens anteriores.');
+      }
+    };
+
+    // A sondagem consulta só o carimbo de versão do chat (respondido pelo cache do servidor);
+    // a lista de mensagens é buscada apenas quando o carimbo muda.
+    const verificarVersao = async () => {
+      try {
+        const resposta = await fetch(versaoEndpoint, {
+          headers: {
+            'X-Requested-With': 'XMLHttpRequest',
+          },
+          credentials: 'same-origin',
+          cache: 'no-store',
+        });
+        if (!resposta.ok) {
+          throw new Error('Falha ao consultar a versão do chat');
+        }
+        const { versao } = await resposta.json();
+        if (versao !== versaoAtual) {
+          await carregarMensagens(true);
+        }
+      } catch (erro) {
+        await carregarMensagens(true);
+      }
+    };
+
     const iniciarPolling = () => {
       if (intervalo) {
         clearInterval(intervalo);
       }
       intervalo = setInterval(() => {
-        carregarMensagens(true);
+        verificarVersao();
       }, 4000);
     };
 
@@ -1,3 +1,64 @@
 from django.contrib import admin
 
-# Register your models here.
+from biblioshare_core.administracao import ModelAdminEscalavel
+
+from .models import HistoricoTransacao, Mensagem, MensagemArquivada, Transacao
+
+
+class HistoricoTransacaoInline(admin.TabularInline):
+    model = HistoricoTransacao
+    fields = ('status_anterior', 'status_novo', 'usuario', 'criado_em')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('usuario')
+
+
+@admin.register(Transacao)
+class TransacaoAdmin(ModelAdminEscalavel):
+    list_display = ('id', 'tipo', 'status', 'livro_principal', 'solicitante', 'dono', 'atualizado_em')
+    list_filter = ('status', 'tipo')
+    list_select_related = ('livro_principal__dono', 'solicitante', 'dono')
+    search_fields = ('livro_principal__titulo',)
+    search_help_text = 'Busca pelo título do livro principal ou pelo número da transação.'
+    autocomplete_fields = ('solicitante', 'dono', 'livro_principal', 'livros_oferecidos', 'livros_solicitados')
+    inlines = (HistoricoTransacaoInline,)
+
+    def get_search_results(self, request, queryset, search_term):
+        termo = search_term.strip().lstrip('#')
+        if termo.isdigit():
+            return queryset.filter(pk=int(termo)), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+@admin.register(HistoricoTransacao)
+class HistoricoTransacaoAdmin(ModelAdminEscalavel):
+    list_display = ('transacao', 'status_anterior', 'status_novo', 'usuario', 'criado_em')
+    list_filter = ('status_novo',)
+    list_select_related = ('transacao__livro_principal', 'usuario')
+    autocomplete_fields = ('transacao', 'usuario')
+
+
+@admin.register(Mensagem)
+class MensagemAdmin(ModelAdminEscalavel):
+    list_display = ('transacao', 'remetente', 'criado_em')
+    list_select_related = ('transacao__livro_principal', 'remetente')
+    autocomplete_fields = ('transacao', 'remetente')
+
+
+@admin.register(MensagemArquivada)
+class MensagemArquivadaAdmin(ModelAdminEscalavel):
+    list_display = ('transacao', 'remetente', 'criado_em', 'arquivada_em')
+    list_select_related = ('transacao__livro_principal', 'remetente')
+    readonly_fields = ('id', 'transacao', 'remetente', 'conteudo', 'criado_em', 'arquivada_em')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
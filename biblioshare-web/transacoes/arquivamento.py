@@ -0,0 +1,48 @@
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Mensagem, MensagemArquivada, Transacao
+
+STATUS_ENCERRADOS = (Transacao.Status.CONCLUIDA, Transacao.Status.CANCELADA)
+CAMPOS_MENSAGEM = ('id', 'transacao_id', 'remetente_id', 'conteudo', 'criado_em')
+
+
+def transacoes_para_arquivar(dias: Optional[int] = None):
+    dias = settings.MENSAGENS_ARQUIVAR_APOS_DIAS if dias is None else dias
+    return Transacao.objects.filter(
+        status__in=STATUS_ENCERRADOS,
+        atualizado_em__lt=timezone.now() - timedelta(days=dias),
+    )
+
+
+def arquivar_mensagens(dias: Optional[int] = None, lote: Optional[int] = None) -> int:
+    # Cada lote é copiado e removido da tabela quente na mesma transação, então uma interrupção
+    # no meio do processo não perde nem duplica mensagens.
+    lote = lote or settings.MENSAGENS_ARQUIVAMENTO_LOTE
+    transacoes = transacoes_para_arquivar(dias)
+    total = 0
+    while True:
+        with transaction.atomic():
+            mensagens = list(
+                Mensagem.objects.filter(transacao__in=transacoes).order_by('id').values(*CAMPOS_MENSAGEM)[:lote]
+            )
+            if not mensagens:
+                return total
+            MensagemArquivada.objects.bulk_create(
+                [MensagemArquivada(**mensagem) for mensagem in mensagens],
+                ignore_conflicts=True,
+            )
+            Mensagem.objects.filter(id__in=[mensagem['id'] for mensagem in mensagens]).delete()
+            Transacao.objects.filter(
+                id__in={mensagem['transacao_id'] for mensagem in mensagens},
+                mensagens_arquivadas_em__isnull=True,
+            ).update(mensagens_arquivadas_em=timezone.now())
+        total += len(mensagens)
+
+
+def mensagens_arquivadas(transacao: Transacao):
+    return MensagemArquivada.objects.filter(transacao=transacao).select_related('remetente')
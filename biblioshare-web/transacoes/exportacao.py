@@ -0,0 +1,13 @@
+COLUNAS_TRANSACAO = (
+    'id',
+    'tipo',
+    'status',
+    'solicitante__username',
+    'dono__username',
+    'livro_principal_id',
+    'livro_principal__titulo',
+    'data_limite_devolucao',
+    'criado_em',
+    'atualizado_em',
+)
+COLUNAS_HISTORICO = ('id', 'transacao_id', 'status_anterior', 'status_novo', 'usuario__username', 'criado_em')
@@ -0,0 +1,150 @@
+import atexit
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BigIntegerField, Case, F, PositiveIntegerField, Q, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.lookups import LessThanOrEqual
+
+from .models import Transacao, TransacaoParticipante
+
+logger = logging.getLogger(__name__)
+
+Chave = Tuple[int, int]
+
+
+class LeiturasPendentes:
+    # Avanços da marca de leitura acumulados neste processo e gravados em lote, para que o polling
+    # do chat não escreva no banco a cada consulta. Perder o buffer só atrasa o "lida".
+    # O lote é gravado por um temporizador próprio, CHAT_LEITURAS_INTERVALO_SEGUNDOS depois da
+    # primeira marca (ou logo, com o lote cheio), fora de qualquer requisição: um worker ocioso não
+    # segura marcas, e a escrita não cai no polling de outro usuário.
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._marcas: Dict[Chave, int] = {}
+        self._temporizador: Optional[threading.Timer] = None
+
+    def registrar(self, transacao_id: int, usuario_id: int, mensagem_id: int, imediato: bool = False) -> None:
+        # imediato grava já, sem passar pelo lote.
+        chave = (transacao_id, usuario_id)
+        with self._trava:
+            if mensagem_id <= self._marcas.get(chave, 0):
+                return
+            if imediato:
+                self._marcas.pop(chave, None)
+            else:
+                self._marcas[chave] = mensagem_id
+                cheio = len(self._marcas) >= settings.CHAT_LEITURAS_LOTE
+                self._agendar(0 if cheio else settings.CHAT_LEITURAS_INTERVALO_SEGUNDOS)
+                return
+        self._gravar_ou_devolver({chave: mensagem_id})
+
+    def marca(self, transacao_id: int, usuario_id: int) -> Optional[int]:
+        with self._trava:
+            return self._marcas.get((transacao_id, usuario_id))
+
+    def descarregar(self) -> int:
+        with self._trava:
+            marcas, self._marcas = self._marcas, {}
+            if self._temporizador is not None:
+                self._temporizador.cancel()
+                self._temporizador = None
+        if not marcas:
+            return 0
+        return self._gravar_ou_devolver(marcas)
+
+    def _gravar_ou_devolver(self, marcas: Dict[Chave, int]) -> int:
+        try:
+            return _gravar(marcas)
+        except Exception:
+            with self._trava:
+                for chave, mensagem_id in marcas.items():
+                    self._marcas[chave] = max(mensagem_id, self._marcas.get(chave, 0))
+                self._agendar(settings.CHAT_LEITURAS_INTERVALO_SEGUNDOS)
+            raise
+
+    def _agendar(self, atraso: float) -> None:
+        # Chamado com a trava. Um temporizador já armado só é trocado para adiantar a gravação.
+        if self._temporizador is not None:
+            if atraso > 0:
+                return
+            self._temporizador.cancel()
+        self._temporizador = threading.Timer(atraso, self._no_temporizador)
+        self._temporizador.daemon = True
+        self._temporizador.start()
+
+    def _no_temporizador(self) -> None:
+        try:
+            self.descarregar()
+        except Exception:
+            logger.exception('Falha ao gravar marcas de leitura; as marcas voltaram para o lote.')
+        finally:
+            # Conexões são por thread; a do temporizador não é reaproveitada.
+            connections.close_all()
+
+
+def _gravar(marcas: Dict[Chave, int]) -> int:
+    # Um único UPDATE por lote; o GREATEST mantém a marca monotônica mesmo com vários processos
+    # descarregando leituras da mesma conversa. Quem leu até a última mensagem fica sem não lidas.
+    filtro = Q()
+    casos = []
+    for (transacao_id, usuario_id), mensagem_id in marcas.items():
+        filtro |= Q(transacao_id=transacao_id, usuario_id=usuario_id)
+        casos.append(When(transacao_id=transacao_id, usuario_id=usuario_id, then=Value(mensagem_id)))
+    nova_marca = Case(*casos, default=Value(0), output_field=BigIntegerField())
+    em_dia = LessThanOrEqual(Coalesce(F('ultima_mensagem_id'), Value(0)), nova_marca)
+    return TransacaoParticipante.objects.filter(filtro).update(
+        ultima_lida_id=Greatest(Coalesce(F('ultima_lida_id'), Value(0)), nova_marca),
+        nao_lidas=Case(When(em_dia, then=Value(0)), default=F('nao_lidas'), output_field=PositiveIntegerField()),
+    )
+
+
+leituras_pendentes = LeiturasPendentes()
+atexit.register(leituras_pendentes.descarregar)
+
+
+def marcas_de_leitura(transacao: Transacao) -> Dict[int, int]:
+    marcas = {}
+    for usuario_id, ultima_lida_id in transacao.participantes.values_list('usuario_id', 'ultima_lida_id'):
+        pendente = leituras_pendentes.marca(transacao.pk, usuario_id)
+        marcas[usuario_id] = max(ultima_lida_id or 0, pendente or 0)
+    return marcas
+
+
+def registrar_leitura(
+    transacao: Transacao,
+    usuario_id: int,
+    mensagens_ids: Iterable[int],
+    marcas: Dict[int, int],
+    ultima_da_conversa: Optional[int] = None,
+):
+    ultima = max(mensagens_ids, default=0)
+    if ultima > marcas.get(usuario_id, 0):
+        # Chegar à última mensagem zera as não lidas da caixa de entrada, que os outros workers
+        # leem do banco; essa marca é gravada na hora.
+        em_dia = ultima_da_conversa is not None and ultima >= ultima_da_conversa
+        leituras_pendentes.registrar(transacao.pk, usuario_id, ultima, imediato=em_dia)
+
+
+def nao_lidas(participante: TransacaoParticipante) -> int:
+    return contar_nao_lidas(
+        participante.transacao_id,
+        participante.usuario_id,
+        participante.ultima_mensagem_id,
+        participante.nao_lidas,
+    )
+
+
+def contar_nao_lidas(transacao_id: int, usuario_id: int, ultima_mensagem_id: Optional[int], gravadas: int) -> int:
+    pendente = leituras_pendentes.marca(transacao_id, usuario_id)
+    if pendente is not None and pendente >= (ultima_mensagem_id or 0):
+        return 0
+    return gravadas
+
+
+def foi_lida(mensagem_id: int, remetente_id: int, marcas: Dict[int, int]) -> bool:
+    return any(usuario_id != remetente_id and marca >= mensagem_id for usuario_id, marca in marcas.items())
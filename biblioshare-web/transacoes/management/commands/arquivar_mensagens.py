@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from transacoes.arquivamento import arquivar_mensagens
+
+
+class Command(BaseCommand):
+    help = (
+        'Move para MensagemArquivada as mensagens de transações concluídas ou canceladas há mais '
+        'de --dias dias, em lotes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=settings.MENSAGENS_ARQUIVAR_APOS_DIAS)
+        parser.add_argument('--lote', type=int, default=settings.MENSAGENS_ARQUIVAMENTO_LOTE)
+
+    def handle(self, *args, **opcoes):
+        total = arquivar_mensagens(dias=opcoes['dias'], lote=opcoes['lote'])
+        self.stdout.write(self.style.SUCCESS(f'{total} mensagens arquivadas.'))
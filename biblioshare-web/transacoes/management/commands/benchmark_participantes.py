@@ -0,0 +1,104 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from livros.models import Livro
+from transacoes.models import Transacao, TransacaoParticipante
+
+Usuario = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara a consulta de transações por participante (OR entre solicitante e dono) '
+        'com a tabela TransacaoParticipante. Os dados são criados e descartados em uma transação.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transacoes', type=int, default=10_000)
+        parser.add_argument('--ruido', type=int, default=10_000, help='Transações entre outros usuários.')
+        parser.add_argument('--repeticoes', type=int, default=30)
+        parser.add_argument('--pagina', type=int, default=50)
+
+    def handle(self, *args, **opcoes):
+        with transaction.atomic():
+            usuario = self._popular(opcoes['transacoes'], opcoes['ruido'])
+            consultas = {
+                'or_solicitante_dono': Transacao.objects.filter(
+                    Q(solicitante=usuario) | Q(dono=usuario)
+                ).order_by('-atualizado_em'),
+                'tabela_participantes': Transacao.objects.do_participante(usuario),
+            }
+            for nome, queryset in consultas.items():
+                pagina = self._medir(lambda: list(queryset[: opcoes['pagina']]), opcoes['repeticoes'])
+                completa = self._medir(lambda: list(queryset.values_list('id', flat=True)), opcoes['repeticoes'])
+                self.stdout.write(self.style.MIGRATE_HEADING(nome))
+                self.stdout.write(f'  primeira página ({opcoes["pagina"]}): {pagina}')
+                self.stdout.write(f'  lista completa (ids): {completa}')
+                for linha in queryset.explain().splitlines():
+                    self.stdout.write(f'  plano: {linha}')
+            transaction.set_rollback(True)
+
+    def _popular(self, total_transacoes: int, total_ruido: int):
+        sufixo = int(time.time() * 1000)
+        usuarios = Usuario.objects.bulk_create(
+            [
+                Usuario(username=f'bench-{sufixo}-{indice}', email=f'bench-{sufixo}-{indice}@example.com', password='!')
+                for indice in range(51)
+            ]
+        )
+        usuario, contrapartes = usuarios[0], usuarios[1:]
+        livros = Livro.objects.bulk_create(
+            [
+                Livro(dono=dono, titulo=f'Livro {indice}', modalidades_mask=1)
+                for indice, dono in enumerate(usuarios)
+            ]
+        )
+        livro_por_dono = {livro.dono_id: livro for livro in livros}
+        agora = timezone.now()
+        transacoes = []
+        for indice in range(total_transacoes):
+            contraparte = contrapartes[indice % len(contrapartes)]
+            solicitante, dono = (usuario, contraparte) if indice % 2 else (contraparte, usuario)
+            transacoes.append((solicitante, dono, agora - timedelta(minutes=indice)))
+        for indice in range(total_ruido):
+            solicitante = contrapartes[indice % len(contrapartes)]
+            dono = contrapartes[(indice + 1) % len(contrapartes)]
+            transacoes.append((solicitante, dono, agora - timedelta(minutes=indice)))
+        criadas = Transacao.objects.bulk_create(
+            [
+                Transacao(
+                    tipo=Transacao.Tipo.DOACAO,
+                    status=Transacao.Status.CONCLUIDA,
+                    solicitante=solicitante,
+                    dono=dono,
+                    livro_principal=livro_por_dono[dono.id],
+                )
+                for solicitante, dono, _ in transacoes
+            ],
+            batch_size=1000,
+        )
+        for transacao, (_, _, atualizado_em) in zip(criadas, transacoes):
+            transacao.atualizado_em = atualizado_em
+        Transacao.objects.bulk_update(criadas, ['atualizado_em'], batch_size=1000)
+        TransacaoParticipante.objects.bulk_create(
+            [participante for transacao in criadas for participante in transacao.novos_participantes()],
+            batch_size=1000,
+        )
+        return usuario
+
+    def _medir(self, funcao, repeticoes: int) -> str:
+        funcao()
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        p95 = statistics.quantiles(tempos, n=20)[-1] if len(tempos) > 1 else tempos[0]
+        return f'mediana {statistics.median(tempos):.2f} ms · p95 {p95:.2f} ms'
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livros', '0004_indices_consultas_frequentes'),
+        ('transacoes', '0002_mensagem'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['solicitante', '-atualizado_em'], name='transacoes_solic_atual_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['dono', '-atualizado_em'], name='transacoes_dono_atual_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def preencher_participantes(apps, schema_editor):
+    Transacao = apps.get_model('transacoes', 'Transacao')
+    TransacaoParticipante = apps.get_model('transacoes', 'TransacaoParticipante')
+    pendentes = []
+    transacoes = Transacao.objects.values_list('id', 'solicitante_id', 'dono_id', 'atualizado_em')
+    for transacao_id, solicitante_id, dono_id, atualizado_em in transacoes.iterator(chunk_size=1000):
+        pendentes.append(
+            TransacaoParticipante(
+                transacao_id=transacao_id,
+                usuario_id=solicitante_id,
+                papel='SOLICITANTE',
+                atualizado_em=atualizado_em,
+            )
+        )
+        pendentes.append(
+            TransacaoParticipante(
+                transacao_id=transacao_id,
+                usuario_id=dono_id,
+                papel='DONO',
+                atualizado_em=atualizado_em,
+            )
+        )
+        if len(pendentes) >= 1000:
+            TransacaoParticipante.objects.bulk_create(pendentes, ignore_conflicts=True)
+            pendentes = []
+    TransacaoParticipante.objects.bulk_create(pendentes, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transacoes', '0003_indices_consultas_frequentes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransacaoParticipante',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('papel', models.CharField(choices=[('SOLICITANTE', 'Solicitante'), ('DONO', 'Dono')], max_length=20, verbose_name='papel')),
+                ('atualizado_em', models.DateTimeField(verbose_name='atualizado em')),
+                ('transacao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participantes', to='transacoes.transacao', verbose_name='transação')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participacoes_transacoes', to=settings.AUTH_USER_MODEL, verbose_name='usuário')),
+            ],
+            options={
+                'verbose_name': 'Participante da transação',
+                'verbose_name_plural': 'Participantes das transações',
+                'indexes': [models.Index(fields=['usuario', '-atualizado_em'], name='transacoes_partic_atual_idx')],
+                'constraints': [models.UniqueConstraint(fields=('transacao', 'usuario'), name='transacoes_participante_unico')],
+            },
+        ),
+        migrations.RunPython(preencher_participantes, migrations.RunPython.noop),
+    ]
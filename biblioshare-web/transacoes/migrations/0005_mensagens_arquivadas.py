@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transacoes', '0004_transacaoparticipante'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transacao',
+            name='mensagens_arquivadas_em',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='mensagens arquivadas em'),
+        ),
+        migrations.CreateModel(
+            name='MensagemArquivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('conteudo', models.TextField(verbose_name='conteúdo')),
+                ('lida', models.BooleanField(default=False, verbose_name='lida')),
+                ('criado_em', models.DateTimeField(verbose_name='criado em')),
+                ('arquivada_em', models.DateTimeField(auto_now_add=True, verbose_name='arquivada em')),
+                ('remetente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mensagens_arquivadas', to=settings.AUTH_USER_MODEL, verbose_name='remetente')),
+                ('transacao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mensagens_arquivadas', to='transacoes.transacao', verbose_name='transação')),
+            ],
+            options={
+                'verbose_name': 'Mensagem arquivada',
+                'verbose_name_plural': 'Mensagens arquivadas',
+                'ordering': ('criado_em',),
+                'indexes': [models.Index(fields=['transacao', 'id'], name='transacoes_msg_arq_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:13
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def preencher_marcas_de_leitura(apps, schema_editor):
+    TransacaoParticipante = apps.get_model('transacoes', 'TransacaoParticipante')
+    # O arquivo só guarda mensagens anteriores às da tabela quente, então ela tem a palavra final.
+    for nome in ('MensagemArquivada', 'Mensagem'):
+        modelo = apps.get_model('transacoes', nome)
+        ultima_lida = (
+            modelo.objects.filter(transacao_id=OuterRef('transacao_id'), lida=True)
+            .exclude(remetente_id=OuterRef('usuario_id'))
+            .order_by('-id')
+            .values('id')[:1]
+        )
+        TransacaoParticipante.objects.update(ultima_lida_id=Coalesce(Subquery(ultima_lida), F('ultima_lida_id')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transacoes', '0005_mensagens_arquivadas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transacaoparticipante',
+            name='ultima_lida_id',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='última mensagem lida'),
+        ),
+        migrations.RunPython(preencher_marcas_de_leitura, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='mensagem',
+            name='lida',
+        ),
+        migrations.RemoveField(
+            model_name='mensagemarquivada',
+            name='lida',
+        ),
+    ]
@@ -0,0 +1,176 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:40
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Left
+
+CAMPOS_DA_TRANSACAO = ['tipo', 'status', 'livro_titulo', 'livro_autor', 'contraparte_nome']
+
+
+def _nome(primeiro, ultimo, username):
+    return f'{primeiro} {ultimo}'.strip() or username
+
+
+def preencher_resumos(apps, schema_editor):
+    Transacao = apps.get_model('transacoes', 'Transacao')
+    TransacaoParticipante = apps.get_model('transacoes', 'TransacaoParticipante')
+    Mensagem = apps.get_model('transacoes', 'Mensagem')
+    MensagemArquivada = apps.get_model('transacoes', 'MensagemArquivada')
+
+    linhas = TransacaoParticipante.objects.values_list(
+        'id',
+        'papel',
+        'transacao__tipo',
+        'transacao__status',
+        'transacao__livro_principal__titulo',
+        'transacao__livro_principal__autor',
+        'transacao__solicitante__first_name',
+        'transacao__solicitante__last_name',
+        'transacao__solicitante__username',
+        'transacao__dono__first_name',
+        'transacao__dono__last_name',
+        'transacao__dono__username',
+    )
+    pendentes = []
+    for participante_id, papel, tipo, status, titulo, autor, *nomes in linhas.iterator(chunk_size=1000):
+        contraparte = nomes[3:] if papel == 'SOLICITANTE' else nomes[:3]
+        pendentes.append(
+            TransacaoParticipante(
+                id=participante_id,
+                tipo=tipo,
+                status=status,
+                livro_titulo=titulo,
+                livro_autor=autor,
+                contraparte_nome=_nome(*contraparte),
+            )
+        )
+        if len(pendentes) >= 1000:
+            TransacaoParticipante.objects.bulk_update(pendentes, CAMPOS_DA_TRANSACAO)
+            pendentes = []
+    TransacaoParticipante.objects.bulk_update(pendentes, CAMPOS_DA_TRANSACAO)
+
+    oferecidos = (
+        Transacao.livros_oferecidos.through.objects.filter(transacao_id=OuterRef('transacao_id'))
+        .order_by()
+        .values('transacao_id')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    solicitados = (
+        Transacao.livros_solicitados.through.objects.filter(transacao_id=OuterRef('transacao_id'))
+        .exclude(livro_id=F('transacao__livro_principal_id'))
+        .order_by()
+        .values('transacao_id')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    TransacaoParticipante.objects.update(
+        outros_livros=Coalesce(Subquery(oferecidos), Value(0)) + Coalesce(Subquery(solicitados), Value(0))
+    )
+
+    # O arquivo só guarda mensagens anteriores às da tabela quente, então ela tem a palavra final.
+    for modelo in (MensagemArquivada, Mensagem):
+        ultima = modelo.objects.filter(transacao_id=OuterRef('transacao_id')).order_by('-id')
+        TransacaoParticipante.objects.update(
+            ultima_mensagem_id=Coalesce(Subquery(ultima.values('id')[:1]), F('ultima_mensagem_id')),
+            ultima_mensagem=Coalesce(Left(Subquery(ultima.values('conteudo')[:1]), 140), F('ultima_mensagem')),
+            ultima_mensagem_em=Coalesce(Subquery(ultima.values('criado_em')[:1]), F('ultima_mensagem_em')),
+        )
+    nao_lidas = (
+        Mensagem.objects.filter(
+            transacao_id=OuterRef('transacao_id'),
+            id__gt=Coalesce(OuterRef('ultima_lida_id'), Value(0)),
+        )
+        .exclude(remetente_id=OuterRef('usuario_id'))
+        .order_by()
+        .values('transacao_id')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    TransacaoParticipante.objects.update(nao_lidas=Coalesce(Subquery(nao_lidas), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transacoes', '0006_marca_leitura_participante'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transacaoparticipante',
+            name='tipo',
+            field=models.CharField(
+                choices=[
+                    ('DOACAO', 'Doação'),
+                    ('EMPRESTIMO', 'Empréstimo'),
+                    ('ALUGUEL', 'Aluguel'),
+                    ('TROCA', 'Troca'),
+                ],
+                default='',
+                max_length=20,
+                verbose_name='tipo',
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='transacaoparticipante',
+            name='status',
+            field=models.CharField(
+                choices=[
+                    ('PENDENTE', 'Pendente'),
+                    ('ACEITA', 'Aceita'),
+                    ('EM_POSSE', 'Em posse'),
+                    ('CONCLUIDA', 'Concluída'),
+                    ('CANCELADA', 'Cancelada'),
+                ],
+                default='',
+                max_length=20,
+                verbose_name='status',
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='transacaoparticipante',
+            name='livro_titulo',
+            field=models.CharField(default='', max_length=255, verbose_name='título do livro'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='transacaoparticipante',
+            name='livro_autor',
+            field=models.CharField(blank=True, max_length=255, verbose_name='autor do livro'),
+        ),
+        migrations.AddField(
+            model_name='transacaoparticipante',
+            name='outros_livros',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='outros livros'),
+        ),
+        migrations.AddField(
+            model_name='transacaoparticipante',
+            name='contraparte_nome',
+            field=models.CharField(default='', max_length=300, verbose_name='nome da contraparte'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='transacaoparticipante',
+            name='ultima_mensagem',
+            field=models.CharField(blank=True, max_length=140, verbose_name='última mensagem'),
+        ),
+        migrations.AddField(
+            model_name='transacaoparticipante',
+            name='ultima_mensagem_id',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='id da última mensagem'),
+        ),
+        migrations.AddField(
+            model_name='transacaoparticipante',
+            name='ultima_mensagem_em',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='última mensagem em'),
+        ),
+        migrations.AddField(
+            model_name='transacaoparticipante',
+            name='nao_lidas',
+            field=models.PositiveIntegerField(default=0, verbose_name='mensagens não lidas'),
+        ),
+        migrations.RunPython(preencher_resumos, migrations.RunPython.noop),
+    ]
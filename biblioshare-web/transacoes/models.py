@@ -3,6 +3,11 @@ from django.core.exceptions import ValidationError
 from django.db import models
 
 
+class TransacaoQuerySet(models.QuerySet):
+    def do_participante(self, usuario):
+        return self.filter(participantes__usuario=usuario).order_by('-participantes__atualizado_em')
+
+
 class Transacao(models.Model):
     class Tipo(models.TextChoices):
         DOACAO = 'DOACAO', 'Doação'
@@ -50,17 +55,76 @@ class Transacao(models.Model):
         blank=True,
     )
     data_limite_devolucao = models.DateField('data limite de devolução', null=True, blank=True)
+    mensagens_arquivadas_em = models.DateTimeField('mensagens arquivadas em', null=True, blank=True, editable=False)
     criado_em = models.DateTimeField('criado em', auto_now_add=True)
     atualizado_em = models.DateTimeField('atualizado em', auto_now=True)
 
+    objects = TransacaoQuerySet.as_manager()
+
     class Meta:
         ordering = ('-criado_em',)
         verbose_name = 'Transação'
         verbose_name_plural = 'Transações'
+        indexes = [
+            models.Index(fields=('solicitante', '-atualizado_em'), name='transacoes_solic_atual_idx'),
+            models.Index(fields=('dono', '-atualizado_em'), name='transacoes_dono_atual_idx'),
+        ]
 
     def __str__(self):
         return f'{self.get_tipo_display()} · {self.livro_principal.titulo} · {self.get_status_display()}'
 
+    def save(self, *args, **kwargs):
+        criando = self._state.adding
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if criando:
+            TransacaoParticipante.objects.bulk_create(self.novos_participantes(), ignore_conflicts=True)
+        elif update_fields is None or {'solicitante', 'dono'} & set(update_fields):
+            self.sincronizar_participantes()
+        else:
+            self.participantes.update(atualizado_em=self.atualizado_em, status=self.status)
+
+    def sincronizar_participantes(self):
+        # Atualiza as linhas no lugar para não perder a marca de leitura nem o resumo do chat.
+        self.participantes.exclude(usuario_id__in=(self.solicitante_id, self.dono_id)).delete()
+        TransacaoParticipante.objects.bulk_create(
+            self.novos_participantes(self.contar_outros_livros()),
+            update_conflicts=True,
+            unique_fields=('transacao', 'usuario'),
+            update_fields=TransacaoParticipante.CAMPOS_DA_TRANSACAO,
+        )
+
+    def contar_outros_livros(self) -> int:
+        livros = set(self.livros_oferecidos.values_list('pk', flat=True))
+        livros.update(self.livros_solicitados.values_list('pk', flat=True))
+        livros.discard(self.livro_principal_id)
+        return len(livros)
+
+    def novos_participantes(self, outros_livros: int = 0) -> list['TransacaoParticipante']:
+        resumo = {
+            'transacao': self,
+            'atualizado_em': self.atualizado_em,
+            'tipo': self.tipo,
+            'status': self.status,
+            'livro_titulo': self.livro_principal.titulo,
+            'livro_autor': self.livro_principal.autor,
+            'outros_livros': outros_livros,
+        }
+        return [
+            TransacaoParticipante(
+                usuario_id=self.solicitante_id,
+                papel=TransacaoParticipante.Papel.SOLICITANTE,
+                contraparte_nome=_nome_exibicao(self.dono),
+                **resumo,
+            ),
+            TransacaoParticipante(
+                usuario_id=self.dono_id,
+                papel=TransacaoParticipante.Papel.DONO,
+                contraparte_nome=_nome_exibicao(self.solicitante),
+                **resumo,
+            ),
+        ]
+
     def clean(self):
         super().clean()
         if self.solicitante_id and self.dono_id and self.solicitante_id == self.dono_id:
@@ -74,6 +138,94 @@ class Transacao(models.Model):
                 raise ValidationError('Selecione pelo menos um livro solicitado na troca.')
 
 
+class TransacaoParticipanteQuerySet(models.QuerySet):
+    def caixa_de_entrada(self, usuario):
+        return self.filter(usuario=usuario).order_by('-atualizado_em')
+
+    # O resumo copia título, autor e nome da contraparte; estes dois métodos o acompanham quando o
+    # livro ou o usuário mudam. Só as linhas desatualizadas são gravadas.
+    def sincronizar_livro(self, livro) -> int:
+        return (
+            self.filter(transacao__livro_principal=livro)
+            .exclude(livro_titulo=livro.titulo, livro_autor=livro.autor)
+            .update(livro_titulo=livro.titulo, livro_autor=livro.autor)
+        )
+
+    def sincronizar_contraparte(self, usuario) -> int:
+        nome = _nome_exibicao(usuario)
+        return (
+            self.filter(transacao__participantes__usuario=usuario)
+            .exclude(usuario=usuario)
+            .exclude(contraparte_nome=nome)
+            .update(contraparte_nome=nome)
+        )
+
+
+class TransacaoParticipante(models.Model):
+    # Uma linha por participante, com o resumo que a caixa de entrada exibe: a listagem lê só esta
+    # tabela, pelo índice (usuario, -atualizado_em), sem juntar livros, usuários ou mensagens.
+    CAMPOS_DA_TRANSACAO = (
+        'papel',
+        'atualizado_em',
+        'tipo',
+        'status',
+        'livro_titulo',
+        'livro_autor',
+        'outros_livros',
+        'contraparte_nome',
+    )
+
+    class Papel(models.TextChoices):
+        SOLICITANTE = 'SOLICITANTE', 'Solicitante'
+        DONO = 'DONO', 'Dono'
+
+    transacao = models.ForeignKey(
+        Transacao,
+        on_delete=models.CASCADE,
+        related_name='participantes',
+        verbose_name='transação',
+    )
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='participacoes_transacoes',
+        verbose_name='usuário',
+    )
+    papel = models.CharField('papel', max_length=20, choices=Papel.choices)
+    atualizado_em = models.DateTimeField('atualizado em')
+    # Marca d'água de leitura: toda mensagem da transação com id até aqui já foi vista pelo usuário.
+    ultima_lida_id = models.BigIntegerField('última mensagem lida', null=True, blank=True)
+    tipo = models.CharField('tipo', max_length=20, choices=Transacao.Tipo.choices)
+    status = models.CharField('status', max_length=20, choices=Transacao.Status.choices)
+    livro_titulo = models.CharField('título do livro', max_length=255)
+    livro_autor = models.CharField('autor do livro', max_length=255, blank=True)
+    outros_livros = models.PositiveSmallIntegerField('outros livros', default=0)
+    contraparte_nome = models.CharField('nome da contraparte', max_length=300)
+    ultima_mensagem = models.CharField('última mensagem', max_length=140, blank=True)
+    ultima_mensagem_id = models.BigIntegerField('id da última mensagem', null=True, blank=True)
+    ultima_mensagem_em = models.DateTimeField('última mensagem em', null=True, blank=True)
+    nao_lidas = models.PositiveIntegerField('mensagens não lidas', default=0)
+
+    objects = TransacaoParticipanteQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Participante da transação'
+        verbose_name_plural = 'Participantes das transações'
+        constraints = [
+            models.UniqueConstraint(fields=('transacao', 'usuario'), name='transacoes_participante_unico'),
+        ]
+        indexes = [
+            models.Index(fields=('usuario', '-atualizado_em'), name='transacoes_partic_atual_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.transacao_id} · {self.usuario_id} · {self.get_papel_display()}'
+
+
+def _nome_exibicao(usuario) -> str:
+    return usuario.get_full_name() or usuario.username
+
+
 class HistoricoTransacao(models.Model):
     transacao = models.ForeignKey(
         Transacao,
@@ -114,7 +266,6 @@ class Mensagem(models.Model):
         verbose_name='remetente',
     )
     conteudo = models.TextField('conteúdo')
-    lida = models.BooleanField('lida', default=False)
     criado_em = models.DateTimeField('criado em', auto_now_add=True)
 
     class Meta:
@@ -126,4 +277,36 @@ class Mensagem(models.Model):
         ]
 
     def __str__(self):
-        return f'{self.transacao_id} · {self.remetente_id} · {self.criado_em:%d/%m %H:%M}'
\ No newline at end of file
+        return f'{self.transacao_id} · {self.remetente_id} · {self.criado_em:%d/%m %H:%M}'
+
+
+class MensagemArquivada(models.Model):
+    # Mensagens de transações encerradas há tempo, fora da tabela quente. Mantém o id original
+    # para que cursores e referências continuem válidos depois do arquivamento.
+    id = models.BigIntegerField(primary_key=True)
+    transacao = models.ForeignKey(
+        Transacao,
+        on_delete=models.CASCADE,
+        related_name='mensagens_arquivadas',
+        verbose_name='transação',
+    )
+    remetente = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='mensagens_arquivadas',
+        verbose_name='remetente',
+    )
+    conteudo = models.TextField('conteúdo')
+    criado_em = models.DateTimeField('criado em')
+    arquivada_em = models.DateTimeField('arquivada em', auto_now_add=True)
+
+    class Meta:
+        ordering = ('criado_em',)
+        verbose_name = 'Mensagem arquivada'
+        verbose_name_plural = 'Mensagens arquivadas'
+        indexes = [
+            models.Index(fields=('transacao', 'id'), name='transacoes_msg_arq_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.transacao_id} · {self.remetente_id} · {self.criado_em:%d/%m %H:%M}'
@@ -2,10 +2,17 @@ from django.core.exceptions import ValidationError
 from rest_framework import serializers
 from rest_framework.exceptions import PermissionDenied
 
+from biblioshare_core.serializacao import (
+    CampoRapido,
+    CamposSelecionaveisMixin,
+    ListaRapidaSerializer,
+    nome_exibicao,
+)
 from livros.models import Livro
 from usuarios.models import Usuario
 
-from .models import Mensagem, Transacao
+from .leituras import contar_nao_lidas, foi_lida, nao_lidas
+from .models import Mensagem, Transacao, TransacaoParticipante
 from .services import (
     ErroTransacao,
     LivroIndisponivelError,
@@ -73,6 +80,45 @@ class TransacaoSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class TransacaoResumoSerializer(CamposSelecionaveisMixin, serializers.ModelSerializer):
+    id = serializers.IntegerField(source='transacao_id', read_only=True)
+    nao_lidas = serializers.SerializerMethodField()
+
+    campos_rapidos = {
+        'nao_lidas': CampoRapido(
+            ('transacao_id', 'usuario_id', 'ultima_mensagem_id', 'nao_lidas'),
+            lambda linha, contexto: contar_nao_lidas(
+                linha['transacao_id'], linha['usuario_id'], linha['ultima_mensagem_id'], linha['nao_lidas']
+            ),
+        ),
+    }
+    perfis_campos = {
+        'cartao': ('id', 'tipo', 'status', 'livro_titulo', 'contraparte_nome', 'nao_lidas', 'atualizado_em'),
+    }
+
+    class Meta:
+        model = TransacaoParticipante
+        list_serializer_class = ListaRapidaSerializer
+        fields = (
+            'id',
+            'tipo',
+            'status',
+            'papel',
+            'livro_titulo',
+            'livro_autor',
+            'outros_livros',
+            'contraparte_nome',
+            'ultima_mensagem',
+            'ultima_mensagem_em',
+            'nao_lidas',
+            'atualizado_em',
+        )
+        read_only_fields = fields
+
+    def get_nao_lidas(self, obj: TransacaoParticipante) -> int:
+        return nao_lidas(obj)
+
+
 class TransacaoCriarSerializer(serializers.Serializer):
     tipo = serializers.ChoiceField(choices=Transacao.Tipo.choices)
     livro_principal = serializers.PrimaryKeyRelatedField(queryset=Livro.objects.all())
@@ -132,9 +178,19 @@ class TransacaoCriarSerializer(serializers.Serializer):
 
 class MensagemSerializer(serializers.ModelSerializer):
     remetente_nome = serializers.SerializerMethodField()
+    lida = serializers.SerializerMethodField()
+
+    campos_rapidos = {
+        'remetente_nome': nome_exibicao('remetente'),
+        'lida': CampoRapido(
+            ('id', 'remetente'),
+            lambda linha, contexto: foi_lida(linha['id'], linha['remetente'], contexto.get('marcas_leitura', {})),
+        ),
+    }
 
     class Meta:
         model = Mensagem
+        list_serializer_class = ListaRapidaSerializer
         fields = (
             'id',
             'transacao',
@@ -156,6 +212,9 @@ class MensagemSerializer(serializers.ModelSerializer):
     def get_remetente_nome(self, obj: Mensagem) -> str:
         return obj.remetente.get_full_name() or obj.remetente.username
 
+    def get_lida(self, obj: Mensagem) -> bool:
+        return foi_lida(obj.id, obj.remetente_id, self.context.get('marcas_leitura', {}))
+
     def validate_conteudo(self, valor: str) -> str:
         if not valor or not valor.strip():
             raise serializers.ValidationError('Informe o conteúdo da mensagem.')
@@ -3,11 +3,14 @@ from typing import Iterable, Sequence
 
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models import Case, F, When
 from django.utils import timezone
+from django.utils.text import Truncator
 
 from livros.models import Livro
 
-from .models import HistoricoTransacao, Transacao
+from .models import HistoricoTransacao, Mensagem, Transacao, TransacaoParticipante
+from .versoes import publicar_versao
 
 
 class ErroTransacao(Exception):
@@ -92,6 +95,8 @@ def criar_transacao_solicitacao(
             transacao.livros_solicitados.add(*[livro for livro in livros_solicitados_extra if livro.pk != livro_principal.pk])
             for livro in livros_oferecidos + livros_solicitados_extra:
                 livros_reservados[livro.pk] = livro
+            outros_livros = len(set(livros_reservados) - {livro_principal.pk})
+            transacao.participantes.update(outros_livros=outros_livros)
         _reservar_livros(livros_reservados.values())
         return transacao
 
@@ -142,6 +147,19 @@ def marcar_em_posse(transacao: Transacao, usuario) -> Transacao:
     return _alterar_status(transacao, Transacao.Status.EM_POSSE, usuario)
 
 
+def registrar_mensagem(mensagem: Mensagem) -> None:
+    # Leva a mensagem ao resumo da caixa de entrada dos participantes e soma uma não lida para
+    # quem a recebe.
+    TransacaoParticipante.objects.filter(transacao_id=mensagem.transacao_id).update(
+        ultima_mensagem=Truncator(mensagem.conteudo).chars(140),
+        ultima_mensagem_id=mensagem.pk,
+        ultima_mensagem_em=mensagem.criado_em,
+        atualizado_em=mensagem.criado_em,
+        nao_lidas=Case(When(usuario_id=mensagem.remetente_id, then=F('nao_lidas')), default=F('nao_lidas') + 1),
+    )
+    transaction.on_commit(lambda: publicar_versao(mensagem.transacao, ultima_mensagem_id=mensagem.pk))
+
+
 def _validar_disponibilidade(livros: Sequence[Livro]) -> None:
     for livro in livros:
         if not livro.disponivel:
@@ -192,5 +210,6 @@ def _alterar_status(transacao: Transacao, novo_status: str, usuario) -> Transaca
         status_novo=novo_status,
         usuario=usuario,
     )
+    transaction.on_commit(lambda: publicar_versao(transacao))
     return transacao
 
@@ -1,14 +1,34 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from operator import itemgetter
 from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.contrib.messages import get_messages
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.urls import reverse
-from rest_framework.test import APIClient
-
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from biblioshare_core.planos import PlanoConsultaMixin
+from biblioshare_core.serializacao import plano_de
 from livros.models import Livro
-from .models import Mensagem, Transacao
-from .services import PermissaoNegadaError
+from . import leituras, versoes
+from .arquivamento import arquivar_mensagens
+from .leituras import leituras_pendentes, marcas_de_leitura
+from .models import HistoricoTransacao, Mensagem, MensagemArquivada, Transacao, TransacaoParticipante
+from .serializers import MensagemSerializer, TransacaoResumoSerializer, TransacaoSerializer
+from .services import PermissaoNegadaError, aceitar_solicitacao, criar_transacao_solicitacao, registrar_mensagem
 
 User = get_user_model()
 
@@ -33,6 +53,7 @@ class TransacoesBaseTestCase(TestCase):
         )
         self.api_client = APIClient()
         self.api_client.force_authenticate(self.usuario)
+        self.addCleanup(leituras_pendentes.descarregar)
 
     def criar_livro(self, dono=None, **kwargs):
         dados = {
@@ -88,6 +109,141 @@ class TransacaoListCreateAPITests(TransacoesBaseTestCase):
         ids_retornados = {item['id'] for item in resposta.data}
         self.assertEqual(ids_retornados, {participante.id, como_dono.id})
 
+    def test_list_is_ordered_by_last_update_through_participant_index(self):
+        antiga = self.criar_transacao()
+        recente = self.criar_transacao()
+        antiga.status = Transacao.Status.ACEITA
+        antiga.save(update_fields=['status', 'atualizado_em'])
+
+        resposta = self.api_client.get(reverse('transacoes_api:transacoes-lista'))
+
+        self.assertEqual([item['id'] for item in resposta.data], [antiga.id, recente.id])
+        participacao = TransacaoParticipante.objects.get(transacao=antiga, usuario=self.usuario)
+        self.assertEqual(participacao.atualizado_em, antiga.atualizado_em)
+        self.assertEqual(participacao.papel, TransacaoParticipante.Papel.SOLICITANTE)
+
+    def test_list_renders_inbox_summary_from_single_query(self):
+        transacao = self.criar_transacao()
+        outro_client = APIClient()
+        outro_client.force_authenticate(self.outro_usuario)
+        url_mensagens = reverse('transacoes_api:transacoes-mensagens', args=[transacao.pk])
+        outro_client.post(url_mensagens, {'conteudo': 'Posso entregar amanhã'}, format='json')
+
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.api_client.get(reverse('transacoes_api:transacoes-lista'))
+
+        self.assertEqual(len(consultas), 1)
+        resumo = resposta.data[0]
+        self.assertEqual(resumo['id'], transacao.id)
+        self.assertEqual(resumo['livro_titulo'], 'Livro Transacao')
+        self.assertEqual(resumo['contraparte_nome'], 'outro')
+        self.assertEqual(resumo['papel'], TransacaoParticipante.Papel.SOLICITANTE)
+        self.assertEqual(resumo['ultima_mensagem'], 'Posso entregar amanhã')
+        self.assertEqual(resumo['nao_lidas'], 1)
+
+    @override_settings(CHAT_LEITURAS_INTERVALO_SEGUNDOS=3600)
+    def test_reading_the_chat_clears_unread_count(self):
+        transacao = self.criar_transacao()
+        outro_client = APIClient()
+        outro_client.force_authenticate(self.outro_usuario)
+        url_mensagens = reverse('transacoes_api:transacoes-mensagens', args=[transacao.pk])
+        for conteudo in ('Oi', 'Tudo bem?'):
+            outro_client.post(url_mensagens, {'conteudo': conteudo}, format='json')
+        self.api_client.post(url_mensagens, {'conteudo': 'Tudo'}, format='json')
+        participacoes = dict(transacao.participantes.values_list('usuario_id', 'nao_lidas'))
+        self.assertEqual(participacoes, {self.usuario.id: 2, self.outro_usuario.id: 1})
+
+        self.api_client.get(url_mensagens)
+        resposta = self.api_client.get(reverse('transacoes_api:transacoes-lista'))
+        self.assertEqual(resposta.data[0]['nao_lidas'], 0)
+
+        leituras_pendentes.descarregar()
+        participacao = transacao.participantes.get(usuario=self.usuario)
+        self.assertEqual(participacao.nao_lidas, 0)
+        self.assertEqual(participacao.ultima_lida_id, participacao.ultima_mensagem_id)
+
+    def test_summary_follows_transitions_and_full_saves_keep_read_state(self):
+        transacao = self.criar_transacao()
+        TransacaoParticipante.objects.filter(transacao=transacao).update(ultima_lida_id=10, nao_lidas=3)
+
+        aceitar_solicitacao(transacao, self.outro_usuario)
+        transacao.refresh_from_db()
+        transacao.save()
+
+        participacao = TransacaoParticipante.objects.get(transacao=transacao, usuario=self.usuario)
+        self.assertEqual(participacao.status, Transacao.Status.ACEITA)
+        self.assertEqual((participacao.ultima_lida_id, participacao.nao_lidas), (10, 3))
+
+    def test_summary_follows_book_edits(self):
+        transacao = self.criar_transacao()
+        livro = transacao.livro_principal
+        livro.titulo = 'Título revisto'
+        livro.save(update_fields=['titulo'])
+
+        resumos = set(transacao.participantes.values_list('livro_titulo', 'livro_autor'))
+        self.assertEqual(resumos, {('Título revisto', livro.autor)})
+
+        with self.assertNumQueries(1):
+            livro.save(update_fields=['disponivel'])
+
+    def test_summary_follows_profile_name_changes(self):
+        transacao = self.criar_transacao()
+        self.client.force_login(self.outro_usuario)
+        resposta = self.client.post(
+            reverse('usuarios_web:perfil'),
+            {'first_name': 'Capitu', 'last_name': 'Pádua', 'cidade': '', 'estado': ''},
+        )
+        self.assertEqual(resposta.status_code, 302)
+
+        nomes = dict(transacao.participantes.values_list('usuario_id', 'contraparte_nome'))
+        self.assertEqual(nomes[self.usuario.id], 'Capitu Pádua')
+        self.assertEqual(nomes[self.outro_usuario.id], self.usuario.get_full_name() or self.usuario.username)
+
+    def test_trade_summary_counts_extra_books(self):
+        principal = self.criar_livro(titulo='Principal', modalidades=[Livro.Modalidades.TROCA])
+        oferecidos = [
+            self.criar_livro(dono=self.usuario, titulo=f'Oferecido {indice}', isbn=f'99900000{indice}')
+            for indice in range(2)
+        ]
+
+        transacao = criar_transacao_solicitacao(
+            self.usuario,
+            principal.pk,
+            Transacao.Tipo.TROCA,
+            livros_oferecidos_ids=[livro.pk for livro in oferecidos],
+        )
+
+        resumo = TransacaoParticipante.objects.get(transacao=transacao, usuario=self.usuario)
+        self.assertEqual((resumo.livro_titulo, resumo.outros_livros), ('Principal', 2))
+
+    def test_list_accepts_sparse_fields(self):
+        self.criar_transacao()
+
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.api_client.get(reverse('transacoes_api:transacoes-lista'), {'campos': 'id,status'})
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(list(resposta.data[0]), ['id', 'status'])
+        self.assertNotIn('ultima_mensagem', consultas[-1]['sql'])
+        resposta = self.api_client.get(reverse('transacoes_api:transacoes-lista'), {'campos': 'cartao'})
+        self.assertEqual(list(resposta.data[0]), list(TransacaoResumoSerializer.perfis_campos['cartao']))
+
+    def test_detail_prefetches_owners_of_related_books(self):
+        transacao = self.criar_transacao()
+        url = reverse('transacoes_api:transacoes-detalhe', args=[transacao.pk])
+        with CaptureQueriesContext(connection) as uma:
+            self.api_client.get(url)
+        for indice in range(3):
+            transacao.livros_oferecidos.add(
+                self.criar_livro(dono=self.usuario, titulo=f'Oferecido {indice}', isbn=f'99900000{indice}')
+            )
+
+        with CaptureQueriesContext(connection) as varias:
+            resposta = self.api_client.get(url)
+
+        self.assertEqual(len(resposta.data['livros_oferecidos']), 3)
+        self.assertEqual(len(varias), len(uma))
+
     def test_create_uses_service_and_returns_serialized_payload(self):
         livro = self.criar_livro(dono=self.outro_usuario, titulo='Livro Alvo')
         existente = self.criar_transacao(
@@ -153,46 +309,331 @@ class TransacaoAcoesAPITests(TransacoesBaseTestCase):
         mock_cancelar.assert_called_once()
 
 
+class ExportacaoTransacoesTests(TransacoesBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.minha = self.criar_transacao()
+        self.alheia = self.criar_transacao(solicitante=self.terceiro_usuario)
+        for transacao in (self.minha, self.alheia):
+            HistoricoTransacao.objects.create(
+                transacao=transacao,
+                status_anterior=Transacao.Status.PENDENTE,
+                status_novo=Transacao.Status.ACEITA,
+                usuario=transacao.dono,
+            )
+
+    def exportar(self, nome, **params):
+        resposta = self.api_client.get(reverse(nome), params)
+        self.assertTrue(resposta.streaming)
+        return b''.join(resposta.streaming_content).decode()
+
+    def test_exports_only_transactions_of_the_participant(self):
+        linhas = list(csv.DictReader(io.StringIO(self.exportar('transacoes_api:transacoes-exportar'))))
+
+        self.assertEqual([int(linha['id']) for linha in linhas], [self.minha.pk])
+        self.assertEqual(linhas[0]['solicitante__username'], 'usuario')
+        self.assertEqual(linhas[0]['livro_principal__titulo'], 'Livro Transacao')
+
+    def test_exports_history_as_ndjson(self):
+        conteudo = self.exportar('transacoes_api:transacoes-historico-exportar', formato='ndjson')
+
+        linhas = [json.loads(linha) for linha in conteudo.splitlines()]
+        self.assertEqual([linha['transacao_id'] for linha in linhas], [self.minha.pk])
+        self.assertEqual(linhas[0]['status_novo'], Transacao.Status.ACEITA)
+
+    def test_staff_exports_full_history(self):
+        self.usuario.is_staff = True
+        self.usuario.save(update_fields=['is_staff'])
+
+        conteudo = self.exportar('transacoes_api:transacoes-historico-exportar', escopo='todos', formato='ndjson')
+
+        self.assertEqual(len(conteudo.splitlines()), 2)
+
+
+class AdminTransacoesTests(TransacoesBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.usuario.is_staff = True
+        self.usuario.is_superuser = True
+        self.usuario.save(update_fields=['is_staff', 'is_superuser'])
+        self.client.force_login(self.usuario)
+
+    def test_changelist_query_count_does_not_grow_with_rows(self):
+        url = reverse('admin:transacoes_transacao_changelist')
+        self.criar_transacao()
+        with CaptureQueriesContext(connection) as poucas:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        for _ in range(4):
+            self.criar_transacao(solicitante=self.terceiro_usuario)
+        with CaptureQueriesContext(connection) as muitas:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.assertEqual(len(poucas), len(muitas))
+
+    def test_search_by_number_and_book_title(self):
+        transacao = self.criar_transacao(livro=self.criar_livro(titulo='Memórias Póstumas'))
+        self.criar_transacao()
+        url = reverse('admin:transacoes_transacao_changelist')
+
+        por_numero = self.client.get(url, {'q': f'#{transacao.pk}'})
+        por_titulo = self.client.get(url, {'q': 'póstumas'})
+
+        self.assertEqual(list(por_numero.context['cl'].result_list), [transacao])
+        self.assertEqual(por_titulo.context['cl'].result_count, 1)
+
+    def test_message_and_history_changelists_render(self):
+        transacao = self.criar_transacao()
+        Mensagem.objects.create(transacao=transacao, remetente=self.usuario, conteudo='Olá')
+        HistoricoTransacao.objects.create(
+            transacao=transacao,
+            status_anterior=Transacao.Status.PENDENTE,
+            status_novo=Transacao.Status.ACEITA,
+            usuario=self.outro_usuario,
+        )
+
+        for nome in ('mensagem', 'historicotransacao'):
+            self.assertEqual(self.client.get(reverse(f'admin:transacoes_{nome}_changelist')).status_code, 200)
+        self.assertEqual(
+            self.client.get(reverse('admin:transacoes_transacao_change', args=[transacao.pk])).status_code, 200
+        )
+
+
+class ArquivamentoMensagensTests(TransacoesBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.antiga = self.criar_transacao(status=Transacao.Status.CONCLUIDA)
+        self.ativa = self.criar_transacao(status=Transacao.Status.ACEITA)
+        self.recente = self.criar_transacao(status=Transacao.Status.CANCELADA)
+        Transacao.objects.filter(pk__in=[self.antiga.pk, self.ativa.pk]).update(
+            atualizado_em=timezone.now() - timedelta(days=200)
+        )
+        for transacao in (self.antiga, self.ativa, self.recente):
+            for conteudo in ('Olá', 'Tudo certo?', 'Combinado'):
+                Mensagem.objects.create(transacao=transacao, remetente=self.usuario, conteudo=conteudo)
+
+    def test_moves_only_old_closed_conversations_in_batches(self):
+        saida = io.StringIO()
+        with CaptureQueriesContext(connection) as consultas:
+            call_command('arquivar_mensagens', dias=90, lote=2, stdout=saida)
+
+        self.assertIn('3 mensagens arquivadas', saida.getvalue())
+        self.assertEqual(sum(sql.startswith('DELETE') for sql in map(itemgetter('sql'), consultas)), 2)
+        self.assertFalse(Mensagem.objects.filter(transacao=self.antiga).exists())
+        self.assertEqual(Mensagem.objects.filter(transacao__in=[self.ativa, self.recente]).count(), 6)
+        self.assertEqual(
+            list(MensagemArquivada.objects.filter(transacao=self.antiga).values_list('conteudo', flat=True)),
+            ['Olá', 'Tudo certo?', 'Combinado'],
+        )
+        self.antiga.refresh_from_db()
+        self.assertIsNotNone(self.antiga.mensagens_arquivadas_em)
+        self.assertEqual(arquivar_mensagens(dias=90), 0)
+
+    def test_api_reads_archived_and_new_messages_transparently(self):
+        arquivar_mensagens(dias=90)
+        Mensagem.objects.create(transacao=self.antiga, remetente=self.outro_usuario, conteudo='Ainda por aí?')
+        url = reverse('transacoes_api:transacoes-mensagens', args=[self.antiga.pk])
+
+        resposta = self.api_client.get(url)
+
+        self.assertEqual(resposta.status_code, 200)
+        conteudos = [item['conteudo'] for item in resposta.data['results']]
+        self.assertEqual(conteudos, ['Olá', 'Tudo certo?', 'Combinado', 'Ainda por aí?'])
+        terceira = resposta.data['results'][2]['id']
+        resposta = self.api_client.get(url, {'depois_de': terceira})
+        self.assertEqual([item['conteudo'] for item in resposta.data['results']], ['Ainda por aí?'])
+
+        resposta = self.api_client.get(url, {'page_size': 2})
+        self.assertEqual([item['conteudo'] for item in resposta.data['results']], ['Combinado', 'Ainda por aí?'])
+        self.assertTrue(resposta.data['has_more'])
+        resposta = self.api_client.get(url, {'page_size': 2, 'antes_de': resposta.data['antes_de']})
+        self.assertEqual([item['conteudo'] for item in resposta.data['results']], ['Olá', 'Tudo certo?'])
+        self.assertFalse(resposta.data['has_more'])
+
+    def test_active_conversations_do_not_touch_the_archive(self):
+        url = reverse('transacoes_api:transacoes-mensagens', args=[self.ativa.pk])
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.api_client.get(url)
+
+        self.assertFalse(any('mensagemarquivada' in consulta['sql'] for consulta in consultas))
+
+
+class VersaoChatAPITests(TransacoesBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.transacao = self.criar_transacao()
+        self.url = reverse('transacoes_api:transacoes-mensagens-versao', args=[self.transacao.pk])
+        self.jwt_client = APIClient()
+        self.jwt_client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.usuario).access_token}')
+
+    def test_warm_probe_is_answered_from_cache_without_queries(self):
+        primeira = self.jwt_client.get(self.url)
+
+        with self.assertNumQueries(0):
+            resposta = self.jwt_client.get(self.url)
+            nao_modificada = self.jwt_client.get(self.url, HTTP_IF_NONE_MATCH=resposta['ETag'])
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.data, primeira.data)
+        self.assertEqual(resposta.data['ultima_mensagem_id'], 0)
+        self.assertNotIn('participantes', resposta.data)
+        self.assertEqual(nao_modificada.status_code, 304)
+
+    def test_version_moves_on_new_message_and_status_change(self):
+        inicial = self.jwt_client.get(self.url).data['versao']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            mensagem = self.api_client.post(
+                reverse('transacoes_api:transacoes-mensagens', args=[self.transacao.pk]),
+                {'conteudo': 'Olá'},
+                format='json',
+            ).data
+        com_mensagem = self.jwt_client.get(self.url).data
+        self.assertEqual(com_mensagem['ultima_mensagem_id'], mensagem['id'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.api_client.post(reverse('transacoes_api:transacoes-cancelar', args=[self.transacao.pk]))
+        cancelada = self.jwt_client.get(self.url).data
+
+        self.assertEqual(len({inicial, com_mensagem['versao'], cancelada['versao']}), 3)
+        self.assertGreater(cancelada['transacao_atualizada_em'], com_mensagem['transacao_atualizada_em'])
+
+    def test_list_exposes_current_version(self):
+        resposta = self.api_client.get(reverse('transacoes_api:transacoes-mensagens', args=[self.transacao.pk]))
+
+        self.assertEqual(resposta['X-Chat-Versao'], self.jwt_client.get(self.url).data['versao'])
+
+    @override_settings(CHAT_VERSAO_CACHE_SEGUNDOS=86400, CHAT_VERSAO_CACHE_LOCAL_SEGUNDOS=3)
+    def test_process_local_cache_keeps_version_briefly(self):
+        with patch.object(cache, 'set') as gravar:
+            versoes.publicar_versao(self.transacao)
+        self.assertEqual(gravar.call_args.kwargs['timeout'], 3)
+
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://x'}}
+        with override_settings(CACHES=redis), patch.object(cache, 'set') as gravar:
+            versoes.publicar_versao(self.transacao)
+        self.assertEqual(gravar.call_args.kwargs['timeout'], 86400)
+
+    def test_only_participants_can_probe(self):
+        estranho = APIClient()
+        estranho.force_authenticate(self.terceiro_usuario)
+
+        self.assertEqual(estranho.get(self.url).status_code, 403)
+        self.assertEqual(
+            self.jwt_client.get(reverse('transacoes_api:transacoes-mensagens-versao', args=[999999])).status_code,
+            404,
+        )
+
+
+@override_settings(CHAT_LEITURAS_INTERVALO_SEGUNDOS=3600)
 class MensagensTransacaoAPITests(TransacoesBaseTestCase):
     def setUp(self):
         super().setUp()
         self.transacao = self.criar_transacao()
         self.url = reverse('transacoes_api:transacoes-mensagens', args=[self.transacao.pk])
 
-    def test_list_marks_messages_from_other_user_as_read(self):
+    def test_list_advances_read_mark_in_memory_and_derives_lida(self):
         mensagem_outro = Mensagem.objects.create(
-            transacao=self.transacao,
-            remetente=self.outro_usuario,
-            conteudo='Olá',
-            lida=False,
-        )
-        mensagem_propria = Mensagem.objects.create(
-            transacao=self.transacao,
-            remetente=self.usuario,
-            conteudo='Oi',
-            lida=False,
+            transacao=self.transacao, remetente=self.outro_usuario, conteudo='Olá'
         )
+        mensagem_propria = Mensagem.objects.create(transacao=self.transacao, remetente=self.usuario, conteudo='Oi')
+        # Uma página que não chega à última mensagem: a marca fica no lote.
+        ultima = Mensagem.objects.create(transacao=self.transacao, remetente=self.outro_usuario, conteudo='Ainda aí?')
+        pagina = {'antes_de': ultima.id}
 
-        resposta = self.api_client.get(self.url)
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.api_client.get(self.url, pagina)
 
         self.assertEqual(resposta.status_code, 200)
-        mensagem_outro.refresh_from_db()
-        mensagem_propria.refresh_from_db()
-        self.assertTrue(mensagem_outro.lida)
-        self.assertFalse(mensagem_propria.lida)
+        self.assertFalse(any(consulta['sql'].startswith('UPDATE') for consulta in consultas))
+        participacao = TransacaoParticipante.objects.get(transacao=self.transacao, usuario=self.usuario)
+        self.assertIsNone(participacao.ultima_lida_id)
+
+        outro_client = APIClient()
+        outro_client.force_authenticate(self.outro_usuario)
+        lidas = {item['id']: item['lida'] for item in outro_client.get(self.url, pagina).data['results']}
+        self.assertEqual(lidas, {mensagem_outro.id: True, mensagem_propria.id: False})
+
+        self.assertEqual(leituras_pendentes.descarregar(), 2)
+        participacao.refresh_from_db()
+        self.assertEqual(participacao.ultima_lida_id, mensagem_propria.id)
+
+    def test_reading_up_to_last_message_writes_through(self):
+        Mensagem.objects.create(transacao=self.transacao, remetente=self.outro_usuario, conteudo='Olá')
+        ultima = Mensagem.objects.create(transacao=self.transacao, remetente=self.outro_usuario, conteudo='Oi?')
+        with self.captureOnCommitCallbacks(execute=True):
+            registrar_mensagem(ultima)
+        participacao = TransacaoParticipante.objects.get(transacao=self.transacao, usuario=self.usuario)
+        self.assertEqual(participacao.nao_lidas, 1)
+
+        self.api_client.get(self.url)
+
+        participacao.refresh_from_db()
+        self.assertEqual((participacao.ultima_lida_id, participacao.nao_lidas), (ultima.id, 0))
+        self.assertEqual(leituras_pendentes.descarregar(), 0)
+
+    def test_buffered_marks_are_flushed_by_a_timer(self):
+        mensagem = Mensagem.objects.create(transacao=self.transacao, remetente=self.outro_usuario, conteudo='Olá')
+        with patch.object(leituras.threading, 'Timer') as temporizador:
+            leituras_pendentes.registrar(self.transacao.pk, self.usuario.pk, mensagem.id)
+            leituras_pendentes.registrar(self.transacao.pk, self.outro_usuario.pk, mensagem.id)
+
+        temporizador.assert_called_once_with(3600, leituras_pendentes._no_temporizador)
+        temporizador.return_value.start.assert_called_once_with()
+        self.assertTrue(temporizador.return_value.daemon)
+
+        self.assertEqual(leituras_pendentes.descarregar(), 2)
+        temporizador.return_value.cancel.assert_called_once_with()
+
+    def test_repeated_polls_do_not_write(self):
+        Mensagem.objects.create(transacao=self.transacao, remetente=self.outro_usuario, conteudo='Olá')
+        self.api_client.get(self.url)
+        leituras_pendentes.descarregar()
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.api_client.get(self.url)
+
+        self.assertFalse(any(consulta['sql'].startswith('UPDATE') for consulta in consultas))
+        self.assertEqual(leituras_pendentes.descarregar(), 0)
+
+    def test_flush_writes_batch_in_one_monotonic_update(self):
+        outra = self.criar_transacao(livro=self.criar_livro(titulo='Outro'))
+        participacao = TransacaoParticipante.objects.get(transacao=outra, usuario=self.usuario)
+        participacao.ultima_lida_id = 50
+        participacao.save(update_fields=['ultima_lida_id'])
+        leituras_pendentes.registrar(self.transacao.pk, self.usuario.pk, 10)
+        leituras_pendentes.registrar(self.transacao.pk, self.usuario.pk, 7)
+        leituras_pendentes.registrar(outra.pk, self.usuario.pk, 30)
+
+        with CaptureQueriesContext(connection) as consultas:
+            leituras_pendentes.descarregar()
+
+        self.assertEqual(len(consultas), 1)
+        marcas = dict(
+            TransacaoParticipante.objects.filter(usuario=self.usuario).values_list('transacao_id', 'ultima_lida_id')
+        )
+        self.assertEqual(marcas, {self.transacao.pk: 10, outra.pk: 50})
+
+    @override_settings(CHAT_LEITURAS_LOTE=1)
+    def test_full_batch_is_flushed_right_away(self):
+        with patch.object(leituras.threading, 'Timer') as temporizador:
+            leituras_pendentes.registrar(self.transacao.pk, self.usuario.pk, 10)
+
+        temporizador.assert_called_once_with(0, leituras_pendentes._no_temporizador)
 
     def test_list_supports_depois_de_filter(self):
         primeira = Mensagem.objects.create(
             transacao=self.transacao,
             remetente=self.outro_usuario,
             conteudo='Primeira',
-            lida=False,
         )
         segunda = Mensagem.objects.create(
             transacao=self.transacao,
             remetente=self.outro_usuario,
             conteudo='Segunda',
-            lida=False,
         )
 
         resposta = self.api_client.get(f'{self.url}?depois_de={primeira.id}')
@@ -201,6 +642,52 @@ class MensagensTransacaoAPITests(TransacoesBaseTestCase):
         ids = [item['id'] for item in resposta.data['results']]
         self.assertEqual(ids, [segunda.id])
 
+    def criar_mensagens(self, quantidade):
+        return [
+            Mensagem.objects.create(transacao=self.transacao, remetente=self.outro_usuario, conteudo=f'Msg {indice}')
+            for indice in range(quantidade)
+        ]
+
+    def test_list_without_cursor_returns_latest_page_without_count(self):
+        mensagens = self.criar_mensagens(5)
+
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.api_client.get(self.url, {'page_size': 3})
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual([item['id'] for item in resposta.data['results']], [m.id for m in mensagens[2:]])
+        self.assertTrue(resposta.data['has_more'])
+        self.assertEqual(resposta.data['antes_de'], mensagens[2].id)
+        self.assertEqual(resposta.data['depois_de'], mensagens[4].id)
+        self.assertFalse(any('COUNT(' in consulta['sql'].upper() for consulta in consultas.captured_queries))
+
+    def test_list_pages_backwards_with_antes_de(self):
+        mensagens = self.criar_mensagens(5)
+
+        resposta = self.api_client.get(self.url, {'page_size': 3, 'antes_de': mensagens[2].id})
+
+        self.assertEqual([item['id'] for item in resposta.data['results']], [mensagens[0].id, mensagens[1].id])
+        self.assertFalse(resposta.data['has_more'])
+
+    def test_list_pages_forward_with_depois_de(self):
+        mensagens = self.criar_mensagens(5)
+
+        resposta = self.api_client.get(self.url, {'page_size': 2, 'depois_de': mensagens[0].id})
+        self.assertEqual([item['id'] for item in resposta.data['results']], [mensagens[1].id, mensagens[2].id])
+        self.assertTrue(resposta.data['has_more'])
+
+        resposta = self.api_client.get(self.url, {'page_size': 2, 'depois_de': resposta.data['depois_de']})
+        self.assertEqual([item['id'] for item in resposta.data['results']], [mensagens[3].id, mensagens[4].id])
+        self.assertFalse(resposta.data['has_more'])
+
+        resposta = self.api_client.get(self.url, {'depois_de': mensagens[4].id})
+        self.assertEqual(resposta.data['results'], [])
+        self.assertEqual(resposta.data['depois_de'], mensagens[4].id)
+
+    def test_list_rejects_invalid_cursor_and_page_size(self):
+        self.assertEqual(self.api_client.get(self.url, {'antes_de': 'x'}).status_code, 400)
+        self.assertEqual(self.api_client.get(self.url, {'page_size': 'x'}).status_code, 400)
+
     def test_create_assigns_authenticated_user(self):
         resposta = self.api_client.post(self.url, {'conteudo': 'Mensagem nova'}, format='json')
 
@@ -210,6 +697,58 @@ class MensagensTransacaoAPITests(TransacoesBaseTestCase):
         self.assertEqual(mensagem.transacao, self.transacao)
 
 
+class SerializacaoRapidaTransacoesTests(TransacoesBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.outro_usuario.first_name = 'Bruno'
+        self.outro_usuario.save()
+        self.transacao = self.criar_transacao(status=Transacao.Status.CONCLUIDA)
+        self.criar_transacao(livro=self.criar_livro(titulo='Outro', dono=self.terceiro_usuario))
+        for remetente, conteudo in ((self.usuario, 'Olá'), (self.outro_usuario, 'Oi, tudo "bem"?')):
+            mensagem = Mensagem.objects.create(transacao=self.transacao, remetente=remetente, conteudo=conteudo)
+            registrar_mensagem(mensagem)
+        Transacao.objects.filter(pk=self.transacao.pk).update(atualizado_em=timezone.now() - timedelta(days=200))
+        arquivar_mensagens(dias=90)
+        self.ultima = Mensagem.objects.create(transacao=self.transacao, remetente=self.outro_usuario, conteudo='E aí?')
+        registrar_mensagem(self.ultima)
+
+    def assertMesmoJson(self, classe, queryset, **contexto):
+        contexto['request'] = Request(APIRequestFactory().get('/'))
+        normal = serializers.ListSerializer(queryset, child=classe(), context=contexto).data
+        rapido = classe(queryset, many=True, context=contexto).data
+        self.assertEqual(JSONRenderer().render(rapido), JSONRenderer().render(normal))
+
+    def test_messages_and_archive_render_byte_identical_json(self):
+        self.transacao.refresh_from_db()
+        leituras_pendentes.registrar(self.transacao.pk, self.outro_usuario.pk, self.ultima.pk - 1)
+        marcas = marcas_de_leitura(self.transacao)
+
+        for modelo in (MensagemArquivada, Mensagem):
+            with self.subTest(modelo=modelo.__name__):
+                queryset = modelo.objects.filter(transacao=self.transacao).select_related('remetente').order_by('id')
+                self.assertMesmoJson(MensagemSerializer, queryset, marcas_leitura=marcas)
+
+    def test_inbox_renders_byte_identical_json_with_pending_reads(self):
+        leituras_pendentes.registrar(self.transacao.pk, self.usuario.pk, self.ultima.pk)
+
+        self.assertMesmoJson(TransacaoResumoSerializer, TransacaoParticipante.objects.order_by('id'))
+
+    def test_get_lists_skip_the_regular_serializer(self):
+        url = reverse('transacoes_api:transacoes-mensagens', args=[self.transacao.pk])
+        falha = AssertionError('caminho normal')
+        with patch.object(MensagemSerializer, 'to_representation', side_effect=falha), \
+                patch.object(TransacaoResumoSerializer, 'to_representation', side_effect=falha):
+            mensagens = self.api_client.get(url).data['results']
+            caixa = self.api_client.get(reverse('transacoes_api:transacoes-lista'))
+
+        self.assertEqual([item['conteudo'] for item in mensagens], ['Olá', 'Oi, tudo "bem"?', 'E aí?'])
+        self.assertEqual([item['remetente_nome'] for item in mensagens], ['usuario', 'Bruno', 'Bruno'])
+        self.assertEqual(caixa.data[0]['nao_lidas'], 0)
+
+    def test_nested_serializers_fall_back_to_regular_path(self):
+        self.assertIsNone(plano_de(TransacaoSerializer()))
+
+
 class TransacoesViewsTests(TransacoesBaseTestCase):
     def setUp(self):
         super().setUp()
@@ -269,7 +808,7 @@ class TransacoesViewsTests(TransacoesBaseTestCase):
         self.assertEqual(resposta.status_code, 200)
         transacoes = list(resposta.context['transacoes'])
         self.assertEqual(len(transacoes), 1)
-        self.assertEqual(transacoes[0].id, transacao_aceita.id)
+        self.assertEqual(transacoes[0].transacao_id, transacao_aceita.id)
 
     def test_transacao_detalhes_view_calls_services_based_on_action(self):
         livro = self.criar_livro(dono=self.usuario, titulo='Livro do Dono')
@@ -286,3 +825,41 @@ class TransacoesViewsTests(TransacoesBaseTestCase):
 
         self.assertRedirects(resposta, url)
         mock_aceitar.assert_called_once_with(transacao, self.usuario)
+
+
+class PlanosConsultaTransacoesTests(PlanoConsultaMixin, TransacoesBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for _ in range(10):
+            self.criar_transacao()
+            self.criar_transacao(
+                solicitante=self.outro_usuario,
+                dono=self.usuario,
+                livro=self.criar_livro(dono=self.usuario),
+            )
+            self.criar_transacao(
+                solicitante=self.outro_usuario,
+                dono=self.terceiro_usuario,
+                livro=self.criar_livro(dono=self.terceiro_usuario),
+            )
+
+    def test_requester_transactions_use_composite_index(self):
+        self.assertPlanoIndexado(
+            Transacao.objects.filter(solicitante=self.usuario).order_by('-atualizado_em')
+        )
+
+    def test_owner_transactions_use_composite_index(self):
+        self.assertPlanoIndexado(Transacao.objects.filter(dono=self.usuario).order_by('-atualizado_em'))
+
+    def test_participant_transactions_use_participant_index_without_sort(self):
+        self.assertPlanoIndexado(Transacao.objects.do_participante(self.usuario))
+        self.assertPlanoIndexado(
+            Transacao.objects.do_participante(self.usuario).filter(status=Transacao.Status.PENDENTE)
+        )
+
+    def test_inbox_uses_participant_index_without_sort(self):
+        self.assertPlanoIndexado(TransacaoParticipante.objects.caixa_de_entrada(self.usuario))
+
+    def test_transaction_messages_use_index(self):
+        transacao = Transacao.objects.first()
+        self.assertPlanoIndexado(Mensagem.objects.filter(transacao=transacao).order_by('criado_em'))
@@ -1,22 +1,32 @@
 from django.urls import path
 
 from .views import (
+    HistoricoTransacoesExportarAPIView,
     MensagensTransacaoAPIView,
     TransacaoAceitarAPIView,
     TransacaoCancelarAPIView,
     TransacaoDetailAPIView,
     TransacaoListCreateAPIView,
     TransacaoRecusarAPIView,
+    TransacoesExportarAPIView,
+    VersaoChatAPIView,
 )
 
 app_name = 'transacoes_api'
 
 urlpatterns = [
     path('transacoes/', TransacaoListCreateAPIView.as_view(), name='transacoes-lista'),
+    path('transacoes/exportar/', TransacoesExportarAPIView.as_view(), name='transacoes-exportar'),
+    path(
+        'transacoes/historico/exportar/',
+        HistoricoTransacoesExportarAPIView.as_view(),
+        name='transacoes-historico-exportar',
+    ),
     path('transacoes/<int:pk>/', TransacaoDetailAPIView.as_view(), name='transacoes-detalhe'),
     path('transacoes/<int:pk>/aceitar/', TransacaoAceitarAPIView.as_view(), name='transacoes-aceitar'),
     path('transacoes/<int:pk>/recusar/', TransacaoRecusarAPIView.as_view(), name='transacoes-recusar'),
     path('transacoes/<int:pk>/cancelar/', TransacaoCancelarAPIView.as_view(), name='transacoes-cancelar'),
     path('transacoes/<int:pk>/mensagens/', MensagensTransacaoAPIView.as_view(), name='transacoes-mensagens'),
+    path('transacoes/<int:pk>/mensagens/versao/', VersaoChatAPIView.as_view(), name='transacoes-mensagens-versao'),
 ]
 
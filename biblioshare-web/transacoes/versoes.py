@@ -0,0 +1,68 @@
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+
+from biblioshare_core.caches import cache_compartilhado
+
+from .models import Mensagem, MensagemArquivada, Transacao
+
+# Carimbo de versão do chat: muda quando chega mensagem nova ou quando a transação é atualizada.
+# Fica no cache junto com os participantes, para que a sondagem dos clientes seja respondida sem
+# tocar no banco.
+
+
+def _chave(transacao_id: int) -> str:
+    return f'chat:versao:{transacao_id}'
+
+
+def publicar_versao(transacao: Transacao, ultima_mensagem_id: Optional[int] = None) -> Dict[str, Any]:
+    if ultima_mensagem_id is None:
+        ultima_mensagem_id = _ultima_mensagem_id(transacao.pk)
+    dados = _montar(transacao, ultima_mensagem_id)
+    cache.set(_chave(transacao.pk), dados, timeout=_validade())
+    return dados
+
+
+def versao_do_chat(transacao_id: int) -> Optional[Dict[str, Any]]:
+    dados = cache.get(_chave(transacao_id))
+    if dados is not None:
+        return dados
+    transacao = (
+        Transacao.objects.only('id', 'solicitante_id', 'dono_id', 'atualizado_em').filter(pk=transacao_id).first()
+    )
+    if transacao is None:
+        return None
+    dados = _montar(transacao, _ultima_mensagem_id(transacao_id))
+    # add e não set: se uma escrita publicou um carimbo mais novo enquanto este era calculado,
+    # ele prevalece.
+    if not cache.add(_chave(transacao_id), dados, timeout=_validade()):
+        return cache.get(_chave(transacao_id)) or dados
+    return dados
+
+
+def _validade() -> int:
+    # Num cache do processo (LocMem), o carimbo publicado por um worker não chega aos outros, que
+    # responderiam com o carimbo antigo até ele expirar; ali a validade fica em poucos segundos.
+    if cache_compartilhado():
+        return settings.CHAT_VERSAO_CACHE_SEGUNDOS
+    return settings.CHAT_VERSAO_CACHE_LOCAL_SEGUNDOS
+
+
+def _montar(transacao: Transacao, ultima_mensagem_id: int) -> Dict[str, Any]:
+    atualizada_em = int(transacao.atualizado_em.timestamp() * 1000)
+    return {
+        'versao': f'{ultima_mensagem_id}-{atualizada_em}',
+        'ultima_mensagem_id': ultima_mensagem_id,
+        'transacao_atualizada_em': atualizada_em,
+        'participantes': [transacao.solicitante_id, transacao.dono_id],
+    }
+
+
+def _ultima_mensagem_id(transacao_id: int) -> int:
+    for modelo in (Mensagem, MensagemArquivada):
+        ultima = modelo.objects.filter(transacao_id=transacao_id).aggregate(ultima=Max('id'))['ultima']
+        if ultima is not None:
+            return ultima
+    return 0
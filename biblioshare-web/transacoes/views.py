@@ -1,24 +1,38 @@
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
 from django.utils.dateparse import parse_date
 from django.views import View
 from django.views.generic import DetailView, FormView, ListView
 from rest_framework import generics, permissions, status
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.exceptions import PermissionDenied, ValidationError as DRFValidationError
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import BasePagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
 
+from biblioshare_core.exportacao import ExportacaoAPIView
+from biblioshare_core.serializacao import CamposEsparsosMixin, linhas_rapidas
 from livros.models import Livro
 
+from .arquivamento import mensagens_arquivadas
+from .exportacao import COLUNAS_HISTORICO, COLUNAS_TRANSACAO
+from .leituras import marcas_de_leitura, nao_lidas, registrar_leitura
 from .forms import ProporTrocaForm
-from .models import Mensagem, Transacao
+from .models import HistoricoTransacao, Mensagem, Transacao, TransacaoParticipante
 from .permissions import EhParticipanteDaTransacao
-from .serializers import MensagemSerializer, TransacaoCriarSerializer, TransacaoSerializer
+from .serializers import (
+    MensagemSerializer,
+    TransacaoCriarSerializer,
+    TransacaoResumoSerializer,
+    TransacaoSerializer,
+)
 from .services import (
     ErroTransacao,
     EstadoInvalidoError,
@@ -28,26 +42,42 @@ from .services import (
     cancelar_transacao,
     criar_transacao_solicitacao,
     recusar_solicitacao,
+    registrar_mensagem,
 )
+from .versoes import versao_do_chat
+
+
+def livros_com_dono():
+    return Livro.objects.select_related('dono')
 
 
 class TransacaoQuerysetMixin:
     def get_queryset(self):
         usuario = self.request.user
         return (
-            Transacao.objects.filter(Q(solicitante=usuario) | Q(dono=usuario))
-            .select_related('solicitante', 'dono', 'livro_principal')
-            .prefetch_related('livros_oferecidos', 'livros_solicitados')
+            Transacao.objects.do_participante(usuario)
+            .select_related('solicitante', 'dono', 'livro_principal__dono')
+            .prefetch_related(
+                Prefetch('livros_oferecidos', queryset=livros_com_dono()),
+                Prefetch('livros_solicitados', queryset=livros_com_dono()),
+            )
         )
 
 
-class TransacaoListCreateAPIView(TransacaoQuerysetMixin, generics.ListCreateAPIView):
+class TransacaoListCreateAPIView(CamposEsparsosMixin, TransacaoQuerysetMixin, generics.ListCreateAPIView):
+    # A listagem devolve o resumo desnormalizado da caixa de entrada; o serializer aninhado completo
+    # fica para o detalhe e para as respostas das ações.
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        if self.request.method == 'POST':
+            return super().get_queryset()
+        return TransacaoParticipante.objects.caixa_de_entrada(self.request.user)
+
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return TransacaoCriarSerializer
-        return TransacaoSerializer
+        return TransacaoResumoSerializer
 
     def get_serializer_context(self):
         contexto = super().get_serializer_context()
@@ -93,11 +123,90 @@ class TransacaoCancelarAPIView(TransacaoAcaoBaseAPIView):
         return cancelar_transacao(transacao, usuario)
 
 
-class MensagemPaginacao(PageNumberPagination):
+class TransacoesExportarAPIView(ExportacaoAPIView):
+    colunas = COLUNAS_TRANSACAO
+    nome_arquivo = 'transacoes'
+
+    def get_queryset(self):
+        return Transacao.objects.filter(participantes__usuario=self.request.user)
+
+    def get_queryset_completo(self):
+        return Transacao.objects.all()
+
+
+class HistoricoTransacoesExportarAPIView(ExportacaoAPIView):
+    colunas = COLUNAS_HISTORICO
+    nome_arquivo = 'historico-transacoes'
+
+    def get_queryset(self):
+        return HistoricoTransacao.objects.filter(transacao__participantes__usuario=self.request.user)
+
+    def get_queryset_completo(self):
+        return HistoricoTransacao.objects.all()
+
+
+class MensagemPaginacao(BasePagination):
+    # Cursores por id nas duas direções: depois_de para o polling, antes_de para carregar o
+    # histórico. Busca limite + 1 linhas para saber se há mais sem COUNT(*). Sem cursor, devolve
+    # as mensagens mais recentes.
     page_size = 50
     page_size_query_param = 'page_size'
     max_page_size = 200
 
+    def paginate_queryset(self, queryset, request, view=None):
+        depois_de = self._cursor(request, 'depois_de')
+        antes_de = self._cursor(request, 'antes_de')
+        limite = self._limite(request)
+        self.para_tras = depois_de is None
+        self.depois_de = depois_de
+        fontes = queryset if isinstance(queryset, tuple) else (queryset,)
+        linhas = sorted(
+            (linha for fonte in fontes for linha in self._janela(fonte, depois_de, antes_de, limite + 1)),
+            key=_id_da_linha,
+        )
+        self.has_more = len(linhas) > limite
+        return linhas[-limite:] if self.para_tras else linhas[:limite]
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                'results': data,
+                'has_more': self.has_more,
+                'antes_de': data[0]['id'] if data else None,
+                'depois_de': data[-1]['id'] if data else self.depois_de,
+            }
+        )
+
+    def _janela(self, queryset, depois_de, antes_de, quantidade):
+        if depois_de is not None:
+            queryset = queryset.filter(id__gt=depois_de)
+        if antes_de is not None:
+            queryset = queryset.filter(id__lt=antes_de)
+        if self.para_tras:
+            return queryset.order_by('-id')[:quantidade]
+        return queryset.order_by('id')[:quantidade]
+
+    def _limite(self, request):
+        try:
+            limite = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError) as erro:
+            raise DRFValidationError({self.page_size_query_param: 'Parâmetro inválido.'}) from erro
+        return max(1, min(limite, self.max_page_size))
+
+    @staticmethod
+    def _cursor(request, nome):
+        valor = request.query_params.get(nome)
+        if valor is None:
+            return None
+        try:
+            return int(valor)
+        except (TypeError, ValueError) as erro:
+            raise DRFValidationError({nome: 'Parâmetro inválido.'}) from erro
+
+
+def _id_da_linha(linha):
+    return linha['id'] if isinstance(linha, dict) else linha.pk
+
 
 class MensagensTransacaoAPIView(generics.ListCreateAPIView):
     serializer_class = MensagemSerializer
@@ -106,19 +215,15 @@ class MensagensTransacaoAPIView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         transacao = self.get_transacao()
-        queryset = (
-            Mensagem.objects.filter(transacao=transacao)
-            .select_related('remetente')
-            .order_by('criado_em')
-        )
-        depois_de = self.request.query_params.get('depois_de')
-        if depois_de is not None:
-            try:
-                depois_de_id = int(depois_de)
-            except (TypeError, ValueError) as erro:
-                raise DRFValidationError({'depois_de': 'Parâmetro inválido.'}) from erro
-            queryset = queryset.filter(id__gt=depois_de_id)
-        return queryset
+        fontes = [Mensagem.objects.filter(transacao=transacao).select_related('remetente')]
+        if transacao.mensagens_arquivadas_em is not None:
+            fontes.insert(0, mensagens_arquivadas(transacao))
+        if self.request.method == 'GET':
+            # A página é montada pela paginação a partir das duas fontes; já em linhas values(),
+            # ela segue pelo caminho rápido da serialização.
+            serializer = self.get_serializer()
+            fontes = [linhas_rapidas(fonte, serializer) for fonte in fontes]
+        return tuple(fontes) if len(fontes) > 1 else fontes[0]
 
     def get_transacao(self):
         if not hasattr(self, '_transacao_cache'):
@@ -128,25 +233,51 @@ class MensagensTransacaoAPIView(generics.ListCreateAPIView):
             )
         return self._transacao_cache
 
+    def get_serializer_context(self):
+        contexto = super().get_serializer_context()
+        contexto['marcas_leitura'] = getattr(self, 'marcas_leitura', {})
+        return contexto
+
     def list(self, request, *args, **kwargs):
+        # A marca de leitura avança em memória e é gravada depois, em lote; só a leitura que chega à
+        # última mensagem vai direto ao banco.
+        transacao = self.get_transacao()
+        self.marcas_leitura = marcas_de_leitura(transacao)
         response = super().list(request, *args, **kwargs)
-        self._marcar_mensagens_como_lidas(response.data)
+        mensagens_ids = [item['id'] for item in response.data['results']]
+        versao = versao_do_chat(transacao.pk)
+        ultima_da_conversa = versao['ultima_mensagem_id'] if versao is not None else None
+        registrar_leitura(transacao, request.user.id, mensagens_ids, self.marcas_leitura, ultima_da_conversa)
+        if versao is not None:
+            response['X-Chat-Versao'] = versao['versao']
         return response
 
     def perform_create(self, serializer):
         transacao = self.get_transacao()
-        serializer.save(transacao=transacao, remetente=self.request.user)
-
-    def _marcar_mensagens_como_lidas(self, payload):
-        mensagens_payload = payload.get('results', payload) if isinstance(payload, dict) else payload
-        if not isinstance(mensagens_payload, list):
-            return
-        usuario_id = self.request.user.id
-        mensagens_ids = [item['id'] for item in mensagens_payload if item.get('remetente') != usuario_id]
-        if mensagens_ids:
-            Mensagem.objects.filter(id__in=mensagens_ids, lida=False).exclude(remetente_id=usuario_id).update(
-                lida=True
-            )
+        with transaction.atomic():
+            mensagem = serializer.save(transacao=transacao, remetente=self.request.user)
+            registrar_mensagem(mensagem)
+
+
+class VersaoChatAPIView(APIView):
+    # Sondagem barata para o polling do chat: com JWT, a resposta sai só do cache, sem consultar
+    # o banco nem para carregar o usuário.
+    authentication_classes = [JWTStatelessUserAuthentication, SessionAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk: int):
+        versao = versao_do_chat(pk)
+        if versao is None:
+            raise Http404
+        # O id do TokenUser vem da claim do JWT, que pode ser texto.
+        if str(request.user.id) not in map(str, versao['participantes']):
+            raise PermissionDenied(EhParticipanteDaTransacao.message)
+        etag = f'"{versao["versao"]}"'
+        cabecalhos = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos)
+        dados = {campo: valor for campo, valor in versao.items() if campo != 'participantes'}
+        return Response(dados, headers=cabecalhos)
 
 
 class CriarTransacaoSimplesView(LoginRequiredMixin, View):
@@ -213,13 +344,7 @@ class TransacoesListaView(LoginRequiredMixin, ListView):
     context_object_name = 'transacoes'
 
     def get_queryset(self):
-        usuario = self.request.user
-        queryset = (
-            Transacao.objects.filter(Q(solicitante=usuario) | Q(dono=usuario))
-            .select_related('solicitante', 'dono', 'livro_principal')
-            .prefetch_related('livros_oferecidos', 'livros_solicitados')
-            .order_by('-atualizado_em')
-        )
+        queryset = TransacaoParticipante.objects.caixa_de_entrada(self.request.user)
         status_param = self.request.GET.get('status')
         if status_param:
             queryset = queryset.filter(status=status_param)
@@ -229,6 +354,8 @@ class TransacoesListaView(LoginRequiredMixin, ListView):
         contexto = super().get_context_data(**kwargs)
         contexto['status_opcoes'] = Transacao.Status.choices
         contexto['status_selecionado'] = self.request.GET.get('status', '')
+        for participacao in contexto['transacoes']:
+            participacao.nao_lidas = nao_lidas(participacao)
         return contexto
 
 
@@ -239,9 +366,13 @@ class TransacaoDetalhesView(LoginRequiredMixin, DetailView):
     def get_queryset(self):
         usuario = self.request.user
         return (
-            Transacao.objects.filter(Q(solicitante=usuario) | Q(dono=usuario))
-            .select_related('solicitante', 'dono', 'livro_principal')
-            .prefetch_related('livros_oferecidos', 'livros_solicitados', 'historicos__usuario')
+            Transacao.objects.do_participante(usuario)
+            .select_related('solicitante', 'dono', 'livro_principal__dono')
+            .prefetch_related(
+                Prefetch('livros_oferecidos', queryset=livros_com_dono()),
+                Prefetch('livros_solicitados', queryset=livros_com_dono()),
+                'historicos__usuario',
+            )
         )
 
     def get_context_data(self, **kwargs):
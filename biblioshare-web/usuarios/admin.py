@@ -1,11 +1,13 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
+from biblioshare_core.administracao import AdminEscalavelMixin
+
 from .models import Usuario
 
 
 @admin.register(Usuario)
-class UsuarioAdmin(UserAdmin):
+class UsuarioAdmin(AdminEscalavelMixin, UserAdmin):
     list_display = (
         'username',
         'email',
@@ -16,19 +18,19 @@ class UsuarioAdmin(UserAdmin):
         'vinculo_verificado',
         'is_staff',
     )
+    # Cada campo tem um índice de trigramas no PostgreSQL; cidade e estado ficam nos filtros.
     search_fields = (
         'username',
         'email',
         'first_name',
         'last_name',
-        'cidade',
-        'estado',
     )
     list_filter = (
         'vinculo_verificado',
         'is_staff',
         'is_superuser',
         'estado',
+        'cidade',
     )
     ordering = ('username',)
     fieldsets = UserAdmin.fieldsets + (
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# Mesma expressão que o Django gera para icontains no PostgreSQL, usada pela busca do admin.
+INDICES = (
+    ('usuarios_username_trgm_idx', 'username'),
+    ('usuarios_email_trgm_idx', 'email'),
+    ('usuarios_first_name_trgm_idx', 'first_name'),
+    ('usuarios_last_name_trgm_idx', 'last_name'),
+)
+
+
+def criar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    tabela = apps.get_model('usuarios', 'Usuario')._meta.db_table
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for nome, coluna in INDICES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {nome} ON {tabela} USING gin (UPPER({coluna}::text) gin_trgm_ops)'
+        )
+
+
+def remover_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nome, _ in INDICES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nome}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0003_remove_usuario_email_institucional_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indices, remover_indices),
+    ]
@@ -1,3 +1,4 @@
+from django.apps import apps
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
@@ -28,3 +29,11 @@ class Usuario(AbstractUser):
     class Meta:
         verbose_name = 'Usuário'
         verbose_name_plural = 'Usuários'
+
+    def save(self, *args, **kwargs):
+        criando = self._state.adding
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if not criando and (update_fields is None or {'username', 'first_name', 'last_name'} & set(update_fields)):
+            # O nome aparece como contraparte na caixa de entrada de quem negocia com o usuário.
+            apps.get_model('transacoes', 'TransacaoParticipante').objects.sincronizar_contraparte(self)
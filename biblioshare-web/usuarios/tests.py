@@ -123,3 +123,22 @@ class UsuariosViewsTests(UsuariosBaseTestCase):
         self.assertEqual(self.usuario.first_name, 'Perfil')
         mensagens = list(get_messages(resposta.wsgi_request))
         self.assertTrue(any('Perfil atualizado' in mensagem.message for mensagem in mensagens))
+
+
+class UsuarioAdminTests(UsuariosBaseTestCase):
+    def test_search_matches_indexed_fields_only(self):
+        admin = self.User.objects.create_superuser(username='admin', email='admin@example.com', password='x')
+        self.usuario.cidade = 'Palmas'
+        self.usuario.save(update_fields=['cidade'])
+        self.client.force_login(admin)
+        url = reverse('admin:usuarios_usuario_changelist')
+
+        por_email = self.client.get(url, {'q': 'usuario@example'})
+        por_cidade = self.client.get(url, {'q': 'Palmas'})
+
+        self.assertEqual(list(por_email.context['cl'].result_list), [self.usuario])
+        self.assertEqual(por_cidade.context['cl'].result_count, 0)
+        self.assertFalse(por_email.context['cl'].show_full_result_count)
+
+        filtrados = self.client.get(url, {'cidade': 'Palmas'})
+        self.assertEqual(list(filtrados.context['cl'].result_list), [self.usuario])